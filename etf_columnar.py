@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""Versioned columnar wire format for the published ETF dataset.
+
+Layout (minified JSON):
+
+    {
+      "format": "etfsave-columnar",
+      "version": 1,
+      "rows": 59,
+      "schema": [{"name": "구분", "type": "dict"}, {"name": "종목코드", "type": "str"}, ...],
+      "dictionaries": {"구분": ["S&P500", "나스닥100", ...]},
+      "columns": [[0, 0, 1, ...], ["360200", ...], ...]
+    }
+
+Keys are stored once in the schema, and each column is one array in schema order.
+Columns of type "dict" hold indexes into their dictionary. Missing values are
+null; a key absent from a record decodes as null.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+from typing import Any
+
+FORMAT_NAME = "etfsave-columnar"
+FORMAT_VERSION = 1
+COLUMNAR_FILE = Path("data.columnar.json")
+
+# Low-cardinality columns that are dictionary-encoded.
+DICTIONARY_COLUMNS = {"구분"}
+
+
+def _column_type(name: str, values: list[Any]) -> str:
+    if name in DICTIONARY_COLUMNS:
+        return "dict"
+    present = [value for value in values if value is not None]
+    if present and all(isinstance(value, bool) for value in present):
+        return "bool"
+    if present and all(isinstance(value, int) and not isinstance(value, bool) for value in present):
+        return "int"
+    if present and all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in present):
+        return "float"
+    if all(isinstance(value, str) for value in present):
+        return "str"
+    return "json"
+
+
+def encode(records: list[dict[str, Any]]) -> dict[str, Any]:
+    """list-of-dicts -> columnar payload."""
+    names: list[str] = []
+    seen: set[str] = set()
+    for record in records:
+        for key in record:
+            if key not in seen:
+                seen.add(key)
+                names.append(key)
+
+    schema = []
+    dictionaries: dict[str, list[Any]] = {}
+    columns = []
+    for name in names:
+        values = [record.get(name) for record in records]
+        column_type = _column_type(name, values)
+        schema.append({"name": name, "type": column_type})
+
+        if column_type == "dict":
+            dictionary: dict[Any, int] = {}
+            codes = [None if value is None else dictionary.setdefault(value, len(dictionary)) for value in values]
+            dictionaries[name] = list(dictionary)
+            columns.append(codes)
+        else:
+            columns.append(values)
+
+    return {
+        "format": FORMAT_NAME,
+        "version": FORMAT_VERSION,
+        "rows": len(records),
+        "schema": schema,
+        "dictionaries": dictionaries,
+        "columns": columns,
+    }
+
+
+def decode(payload: dict[str, Any]) -> list[dict[str, Any]]:
+    """Columnar payload -> list-of-dicts (legacy data.json shape)."""
+    if payload.get("format") != FORMAT_NAME:
+        raise ValueError(f"not an {FORMAT_NAME} payload")
+    if payload.get("version") != FORMAT_VERSION:
+        raise ValueError(f"unsupported {FORMAT_NAME} version: {payload.get('version')}")
+
+    schema = payload["schema"]
+    columns = payload["columns"]
+    rows = payload["rows"]
+    if len(schema) != len(columns) or any(len(column) != rows for column in columns):
+        raise ValueError("column lengths do not match schema/rows")
+
+    decoded_columns = []
+    for field, column in zip(schema, columns):
+        if field["type"] == "dict":
+            dictionary = payload["dictionaries"][field["name"]]
+            column = [None if code is None else dictionary[code] for code in column]
+        decoded_columns.append(column)
+
+    names = [field["name"] for field in schema]
+    return [dict(zip(names, values)) for values in zip(*decoded_columns)] if rows else []
+
+
+def dumps(records: list[dict[str, Any]]) -> str:
+    return json.dumps(encode(records), ensure_ascii=False, separators=(",", ":"))
+
+
+def loads(text: str) -> list[dict[str, Any]]:
+    return decode(json.loads(text))
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Convert data.json to the columnar format and verify the round trip.")
+    parser.add_argument("source", nargs="?", type=Path, default=Path("data.json"))
+    parser.add_argument("--output", type=Path, default=COLUMNAR_FILE)
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    records = json.loads(args.source.read_text(encoding="utf-8"))
+    serialized = dumps(records)
+
+    if loads(serialized) != records:
+        print("[columnar] round trip mismatch")
+        return 1
+
+    args.output.write_text(serialized, encoding="utf-8")
+    legacy = len(args.source.read_bytes())
+    compact = len(serialized.encode("utf-8"))
+    print(f"[columnar] {args.output}: {compact} bytes ({compact / legacy:.0%} of {legacy} bytes in {args.source})")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
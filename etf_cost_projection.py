@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""Projected holding cost of each ETF over a grid of amounts and horizons.
+
+실부담비용 is an annual percentage of the assets, so its cost compounds: money
+paid out in fees does not grow any more. For every fund, every principal in
+PRINCIPALS, every monthly contribution in MONTHLY and every horizon in HORIZONS
+(years), the engine projects
+
+    gross   ending value at ANNUAL_RETURN with no cost (the same for every fund)
+    value   ending value when the assets also lose 실부담비용 per year
+    cost    gross - value: fees paid plus the growth they would have earned
+    vs      cost - cost of the cheapest fund in the same 구분 (not published:
+            readers take cost[i] - cost[cheapest[구분]])
+
+Contributions are made at the start of each month; returns and costs compound
+monthly. Ending values are linear in the principal and the contribution, so the
+engine computes two cost factors per fund and horizon in one NumPy pass (the
+whole KOFIA universe in milliseconds) and broadcasts them to the grid only for
+the funds that are published.
+
+Published layout (minified JSON, amounts in `unit` won, rounded):
+
+    {
+      "format": "etfsave-projection",
+      "version": 2,
+      "annualReturn": 0.05,
+      "unit": 10000,
+      "principals": [10000000, ...], "monthly": [0, ...], "horizons": [1, ..., 30],
+      "fields": ["종목코드", "구분", "실부담비용"],
+      "funds": [["360200", "S&P500", 0.0887], ...],
+      "cheapest": {"S&P500": "360200", ...},
+      "gross": [...],                 principal x monthly x horizon, row-major
+      "cost": [[...], ...]            one grid per fund, same order as "funds"
+    }
+
+Ending value = gross - cost. Cells are indexed
+(principal * len(monthly) + monthly) * len(horizons) + (horizon - 1).
+A payload over SIZE_BUDGET_BYTES is not published.
+
+    python etf_cost_projection.py data.json
+    python etf_cost_projection.py data/universe.json --repeat 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Sequence
+
+import numpy as np
+
+FORMAT_NAME = "etfsave-projection"
+FORMAT_VERSION = 2
+PROJECTION_FILE = "projection.json"
+# About 2 KiB per fund: room for roughly twice the published ETF list, not the KOFIA universe.
+SIZE_BUDGET_BYTES = 256 * 1024
+
+PRINCIPALS = [10_000_000, 30_000_000, 50_000_000, 100_000_000]
+MONTHLY = [0, 300_000, 500_000, 1_000_000]
+HORIZONS = list(range(1, 31))
+# Assumed gross annual return before costs. The cost gap between two funds barely
+# depends on it; the absolute amounts do.
+ANNUAL_RETURN = 0.05
+UNIT = 10_000  # 만원
+FIELDS = ["종목코드", "구분", "실부담비용"]
+
+
+@dataclass
+class Projection:
+    """
+    Per-fund cost factors. Ending values are linear in the principal P and the
+    monthly contribution M, so each fund needs only two rows over the horizons:
+
+        cost(P, M, h) = P * cost_lump[h] + M * cost_monthly[h]
+
+    and likewise for the no-cost gross value. The (fund, P, M, h) grids are
+    materialized on demand by gross(), cost(), vs() and value().
+    """
+
+    codes: list[str]
+    categories: list[str | None]
+    costs: np.ndarray          # (fund,) 실부담비용 in percent
+    gross_lump: np.ndarray     # (horizon,) ending value of 1 won invested once, no cost
+    gross_monthly: np.ndarray  # (horizon,) ending value of 1 won per month, no cost
+    cost_lump: np.ndarray      # (fund, horizon)
+    cost_monthly: np.ndarray   # (fund, horizon)
+    best: np.ndarray           # (fund,) position of the cheapest fund of the same 구분
+    cheapest: dict[str, str]
+
+    def gross(self, principals: Sequence[float] = PRINCIPALS, monthly: Sequence[float] = MONTHLY) -> np.ndarray:
+        """(principal, monthly, horizon)"""
+        return _grid(self.gross_lump[None], self.gross_monthly[None], principals, monthly)[0]
+
+    def cost(self, principals: Sequence[float] = PRINCIPALS, monthly: Sequence[float] = MONTHLY) -> np.ndarray:
+        """(fund, principal, monthly, horizon)"""
+        return _grid(self.cost_lump, self.cost_monthly, principals, monthly)
+
+    def vs(self, principals: Sequence[float] = PRINCIPALS, monthly: Sequence[float] = MONTHLY) -> np.ndarray:
+        """cost minus the cost of the cheapest fund in the same 구분; (fund, principal, monthly, horizon)"""
+        return _grid(
+            self.cost_lump - self.cost_lump[self.best],
+            self.cost_monthly - self.cost_monthly[self.best],
+            principals,
+            monthly,
+        )
+
+    def value(self, principals: Sequence[float] = PRINCIPALS, monthly: Sequence[float] = MONTHLY) -> np.ndarray:
+        return self.gross(principals, monthly)[None] - self.cost(principals, monthly)
+
+
+def _grid(lump: np.ndarray, per_month: np.ndarray, principals: Sequence[float], monthly: Sequence[float]) -> np.ndarray:
+    p = np.asarray(principals, dtype=np.float64)
+    m = np.asarray(monthly, dtype=np.float64)
+    return p[None, :, None, None] * lump[:, None, None, :] + m[None, None, :, None] * per_month[:, None, None, :]
+
+
+def growth_factors(monthly_factor: np.ndarray, months: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    For each monthly factor f and month count n: f^n (1 won invested once) and
+    f * (f^n - 1) / (f - 1) (1 won at the start of every month). Shapes (f, n).
+    """
+    lump = monthly_factor[:, None] ** months[None, :]
+    step = monthly_factor - 1.0
+    scale = np.divide(monthly_factor, step, out=np.zeros_like(step), where=step != 0.0)
+    per_month = (lump - 1.0) * scale[:, None]
+    # Annuity due; with f == 1 (no return, no cost) it is just n contributions.
+    per_month[step == 0.0] = months
+    return lump, per_month
+
+
+def cheapest_positions(categories: Sequence[str | None], costs: np.ndarray) -> np.ndarray:
+    """Per fund, the position of the cheapest fund of its 구분 (ties: first in input order)."""
+    if not len(costs):
+        return np.zeros(0, dtype=np.int64)
+    ids = {category: i for i, category in enumerate(dict.fromkeys(categories))}
+    group = np.fromiter(map(ids.__getitem__, categories), dtype=np.int64, count=len(costs))
+    order = np.lexsort((costs, group))
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = group[order[1:]] != group[order[:-1]]
+    best = np.empty(len(ids), dtype=np.int64)
+    best[group[order[first]]] = order[first]
+    return best[group]
+
+
+def project(
+    codes: Sequence[str],
+    categories: Sequence[str | None],
+    costs: Sequence[float],
+    horizons: Sequence[int] = HORIZONS,
+    annual_return: float = ANNUAL_RETURN,
+) -> Projection:
+    cost_pct = np.asarray(costs, dtype=np.float64)
+    months = np.asarray(horizons, dtype=np.float64) * 12.0
+
+    gross_lump, gross_monthly = growth_factors(np.array([(1.0 + annual_return) ** (1 / 12)]), months)
+    net_lump, net_monthly = growth_factors(((1.0 + annual_return) * (1.0 - cost_pct / 100.0)) ** (1 / 12), months)
+
+    best = cheapest_positions(categories, cost_pct)
+    # Every fund of a 구분 has the same `best`; the dict keeps the first-seen 구분 order.
+    by_category = dict(zip(categories, best.tolist()))
+    cheapest = {str(category): str(codes[pos]) for category, pos in by_category.items() if category is not None}
+    return Projection(
+        codes=list(map(str, codes)),
+        categories=list(categories),
+        costs=cost_pct,
+        gross_lump=gross_lump[0],
+        gross_monthly=gross_monthly[0],
+        cost_lump=gross_lump - net_lump,
+        cost_monthly=gross_monthly - net_monthly,
+        best=best,
+        cheapest=cheapest,
+    )
+
+
+def project_records(records: list[dict[str, Any]], **options: Any) -> Projection:
+    """Projection of data.json-style records; rows without a 실부담비용 are left out."""
+    rows = [r for r in records if r.get("실부담비용") is not None]
+    return project(
+        [r.get("종목코드") for r in rows],
+        [r.get("구분") for r in rows],
+        [float(r["실부담비용"]) for r in rows],
+        **options,
+    )
+
+
+def to_units(values: np.ndarray, unit: int = UNIT) -> list[Any]:
+    return np.rint(values / unit).astype(np.int64).tolist()
+
+
+def build_payload(
+    projection: Projection,
+    principals: Sequence[float] = PRINCIPALS,
+    monthly: Sequence[float] = MONTHLY,
+    horizons: Sequence[int] = HORIZONS,
+    annual_return: float = ANNUAL_RETURN,
+    unit: int = UNIT,
+) -> dict[str, Any]:
+    funds = len(projection.codes)
+    return {
+        "format": FORMAT_NAME,
+        "version": FORMAT_VERSION,
+        "annualReturn": annual_return,
+        "unit": unit,
+        "principals": list(principals),
+        "monthly": list(monthly),
+        "horizons": list(horizons),
+        "fields": FIELDS,
+        "funds": [
+            [code, category, round(float(cost), 4)]
+            for code, category, cost in zip(projection.codes, projection.categories, projection.costs)
+        ],
+        "cheapest": projection.cheapest,
+        "gross": to_units(projection.gross(principals, monthly).reshape(-1), unit),
+        "cost": to_units(projection.cost(principals, monthly).reshape(funds, -1), unit),
+    }
+
+
+def dumps(records: list[dict[str, Any]], budget: int = SIZE_BUDGET_BYTES) -> str:
+    """The published payload; raises ValueError when it does not fit `budget` bytes."""
+    projection = project_records(records)
+    payload = json.dumps(build_payload(projection), ensure_ascii=False, separators=(",", ":"))
+    size = len(payload.encode("utf-8"))
+    if size > budget:
+        raise ValueError(f"{len(projection.codes)} funds need {size:,} bytes, over the {budget:,} byte budget")
+    return payload
+
+
+def load_records(path: Path) -> list[dict[str, Any]]:
+    """data.json rows, or the rows of a published universe.json ({fields, rows})."""
+    payload = json.loads(path.read_text(encoding="utf-8"))
+    if isinstance(payload, dict):
+        return [dict(zip(payload["fields"], row)) for row in payload["rows"]]
+    return payload
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Project holding costs of the published ETFs.")
+    parser.add_argument("source", type=Path, help="data.json or data/universe.json")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs (default: %(default)s)")
+    parser.add_argument("--out", type=Path, help="Also write the published payload here.")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    records = load_records(args.source)
+    timings = []
+    for _ in range(max(1, args.repeat)):
+        started = time.perf_counter()
+        projection = project_records(records)
+        timings.append(time.perf_counter() - started)
+    started = time.perf_counter()
+    grid = projection.cost()
+    print(f"{len(projection.codes)} funds: factors min {min(timings) * 1000:.2f} ms, "
+          f"{grid.size:,} grid cells {(time.perf_counter() - started) * 1000:.2f} ms")
+
+    principal, per_month, h = 100_000_000, 1_000_000, HORIZONS.index(30)
+    gross = principal * projection.gross_lump[h] + per_month * projection.gross_monthly[h]
+    cost = principal * projection.cost_lump[:, h] + per_month * projection.cost_monthly[:, h]
+    print(f"1억 + 월 100만원, 30년 (연 {ANNUAL_RETURN:.0%}, 비용 없을 때 {gross:,.0f}원):")
+    for pos in np.argsort(cost, kind="stable")[:5]:
+        print(f"  {projection.codes[pos]} {projection.categories[pos]}  실부담비용 {projection.costs[pos]:.4f}%  "
+              f"비용 {cost[pos]:,.0f}원  최저 대비 +{cost[pos] - cost[projection.best[pos]]:,.0f}원")
+
+    if args.out:
+        payload = json.dumps(build_payload(projection), ensure_ascii=False, separators=(",", ":"))
+        args.out.write_text(payload, encoding="utf-8")
+        print(f"Wrote {args.out} ({len(payload.encode('utf-8')):,} bytes)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""Local read API over the published ETF rows (a fast stand-in for the GAS doGet).
+
+data.json is loaded once into an EtfTable: the rows, a position index by 종목코드,
+position lists by 구분, and the row order by 실부담비용 (cheapest first, nulls last).
+Other sort orders are built on first use and memoized. data.json is re-read when
+its mtime changes, so the server follows the daily run or etl_daemon.py.
+
+    GET /data.json                  all rows, same body as the static file (GAS_API_URL drop-in)
+    GET /etfs?구분=S%26P500&q=tiger&sort=-AUM&offset=0&limit=20
+                                    {"total", "offset", "limit", "items"}; `category` is an
+                                    alias of 구분, `sort` defaults to 실부담비용 ('-' = descending)
+    GET /etfs/360200                one row, 404 when unknown
+    GET /categories                 [{"구분", "count", "cheapest"}], by each 구분's cheapest row
+
+Every 200 carries a strong ETag (sha256 of the body; '-gzip' appended for the
+gzip representation) and answers If-None-Match with 304. Bodies over
+GZIP_MIN_BYTES are gzipped for clients that accept it. Encoded responses are
+cached per table version.
+
+    python etf_read_api.py --port 8788
+    python scripts/load_test_api.py http://127.0.0.1:8788
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qs, unquote, urlsplit
+
+DATA_FILE = Path("data.json")
+API_PORT = 8788
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+GZIP_MIN_BYTES = 1024
+RESPONSE_CACHE_SIZE = 256
+# data.json is stat'ed at most this often.
+RELOAD_CHECK_SECONDS = 1.0
+
+COST_FIELD = "실부담비용"
+CATEGORY_FIELD = "구분"
+CODE_FIELD = "종목코드"
+NAME_FIELD = "종목명"
+SORT_FIELDS = ("실부담비용", "총보수", "기타비용", "매매중개수수료", "AUM", "거래량", "종목명", "종목코드")
+
+
+class QueryError(ValueError):
+    """A request parameter that cannot be served; answered with 400."""
+
+
+class EtfTable:
+    def __init__(self, raw: bytes) -> None:
+        rows = json.loads(raw)
+        if not isinstance(rows, list):
+            raise ValueError("data is not a JSON array")
+        self.raw = raw
+        self.rows: list[dict[str, Any]] = rows
+        self.version = hashlib.sha256(raw).hexdigest()[:16]
+        self.by_code = {str(row.get(CODE_FIELD)): pos for pos, row in enumerate(rows)}
+        self.names = [str(row.get(NAME_FIELD) or "").lower() for row in rows]
+        self._orders: dict[tuple[str, bool], list[int]] = {}
+        self.cost_order = self.order(COST_FIELD, False)
+        self.by_category: dict[str, list[int]] = {}
+        for pos in self.cost_order:
+            self.by_category.setdefault(str(rows[pos].get(CATEGORY_FIELD)), []).append(pos)
+        self._category_orders: dict[tuple[str, str, bool], list[int]] = {}
+
+    def order(self, field: str, descending: bool) -> list[int]:
+        """Row positions sorted by `field`; nulls last either way, ties by 실부담비용 then 종목코드."""
+        key = (field, descending)
+        if key not in self._orders:
+            present = [pos for pos, row in enumerate(self.rows) if row.get(field) is not None]
+            nulls = [pos for pos, row in enumerate(self.rows) if row.get(field) is None]
+            tie = self._orders.get((COST_FIELD, False))
+            rank = {pos: i for i, pos in enumerate(tie)} if tie else {}
+            present.sort(key=lambda pos: (rank.get(pos, 0), str(self.rows[pos].get(CODE_FIELD))))
+            present.sort(key=lambda pos: self.rows[pos][field], reverse=descending)
+            self._orders[key] = present + nulls
+        return self._orders[key]
+
+    def category_order(self, category: str, field: str, descending: bool) -> list[int]:
+        if field == COST_FIELD and not descending:
+            return self.by_category.get(category, [])
+        key = (category, field, descending)
+        if key not in self._category_orders:
+            members = set(self.by_category.get(category, []))
+            self._category_orders[key] = [pos for pos in self.order(field, descending) if pos in members]
+        return self._category_orders[key]
+
+    def query(self, params: dict[str, str]) -> dict[str, Any]:
+        sort = params.get("sort") or COST_FIELD
+        descending = sort.startswith("-")
+        field = sort.lstrip("-")
+        if field not in SORT_FIELDS:
+            raise QueryError(f"sort must be one of {', '.join(SORT_FIELDS)}")
+        try:
+            offset = max(0, int(params.get("offset") or 0))
+            limit = min(MAX_LIMIT, max(1, int(params.get("limit") or DEFAULT_LIMIT)))
+        except ValueError:
+            raise QueryError("offset and limit must be integers") from None
+
+        category = params.get(CATEGORY_FIELD) or params.get("category")
+        positions = self.category_order(category, field, descending) if category else self.order(field, descending)
+        codes = [code for code in (params.get("code") or "").split(",") if code]
+        if codes:
+            wanted = {self.by_code[code] for code in codes if code in self.by_code}
+            positions = [pos for pos in positions if pos in wanted]
+        needle = (params.get("q") or "").strip().lower()
+        if needle:
+            positions = [pos for pos in positions if needle in self.names[pos]]
+
+        return {
+            "total": len(positions),
+            "offset": offset,
+            "limit": limit,
+            "items": [self.rows[pos] for pos in positions[offset:offset + limit]],
+        }
+
+    def categories(self) -> list[dict[str, Any]]:
+        return [
+            {CATEGORY_FIELD: category, "count": len(positions), "cheapest": self.rows[positions[0]].get(CODE_FIELD)}
+            for category, positions in self.by_category.items()
+        ]
+
+
+class Encoded:
+    """One response body with its gzip variant and strong ETags."""
+
+    def __init__(self, body: bytes) -> None:
+        self.body = body
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        self.etag = f'"{digest}"'
+        self.gzipped = gzip.compress(body, compresslevel=6, mtime=0) if len(body) >= GZIP_MIN_BYTES else None
+        self.gzip_etag = f'"{digest}-gzip"'
+
+
+def dumps(payload: Any) -> bytes:
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class ReadApi:
+    """Holds the current EtfTable, reloads it when data.json changes, and caches encoded responses."""
+
+    def __init__(self, data_file: Path) -> None:
+        self.data_file = data_file
+        self.quiet = False
+        self._lock = threading.Lock()
+        self._mtime = 0.0
+        self._checked = 0.0
+        self.table = self._reload()
+        self._cache: OrderedDict[tuple[str, str], Encoded] = OrderedDict()
+
+    def _reload(self) -> EtfTable:
+        mtime = self.data_file.stat().st_mtime
+        table = EtfTable(self.data_file.read_bytes())
+        self._mtime = mtime
+        print(f"[api] loaded {len(table.rows)} rows from {self.data_file} (version {table.version})")
+        return table
+
+    def current(self) -> EtfTable:
+        now = time.monotonic()
+        if now - self._checked < RELOAD_CHECK_SECONDS:
+            return self.table
+        with self._lock:
+            self._checked = now
+            try:
+                if self.data_file.stat().st_mtime != self._mtime:
+                    self.table = self._reload()
+                    self._cache.clear()
+            except Exception as e:
+                # A half-written or missing file: keep serving the last good table.
+                print(f"[api] reload failed, keeping version {self.table.version}: {e}")
+        return self.table
+
+    def response(self, path: str, params: dict[str, str]) -> Encoded:
+        table = self.current()
+        cache_key = (table.version, path + "?" + "&".join(f"{k}={v}" for k, v in sorted(params.items())))
+        with self._lock:
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                self._cache.move_to_end(cache_key)
+                return cached
+
+        if path in ("/data.json", "/"):
+            encoded = Encoded(table.raw)
+        elif path == "/etfs":
+            encoded = Encoded(dumps(table.query(params)))
+        elif path == "/categories":
+            encoded = Encoded(dumps(table.categories()))
+        elif path.startswith("/etfs/"):
+            pos = table.by_code.get(path[len("/etfs/"):])
+            if pos is None:
+                raise LookupError(path)
+            encoded = Encoded(dumps(table.rows[pos]))
+        else:
+            raise LookupError(path)
+
+        with self._lock:
+            self._cache[cache_key] = encoded
+            while len(self._cache) > RESPONSE_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return encoded
+
+
+def etag_matches(header: str | None, encoded: Encoded) -> bool:
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return encoded.etag in tags or encoded.gzip_etag in tags
+
+
+def make_handler(api: ReadApi) -> type[BaseHTTPRequestHandler]:
+    class ApiHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body go out in separate writes; without this, keep-alive
+        # clients wait on delayed ACKs.
+        disable_nagle_algorithm = True
+
+        def do_GET(self) -> None:
+            url = urlsplit(self.path)
+            params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            try:
+                encoded = api.response(unquote(url.path).rstrip("/") or "/", params)
+            except LookupError:
+                return self._send_error(404, "not found")
+            except QueryError as e:
+                return self._send_error(400, str(e))
+
+            use_gzip = encoded.gzipped is not None and "gzip" in self.headers.get("Accept-Encoding", "")
+            etag = encoded.gzip_etag if use_gzip else encoded.etag
+            if etag_matches(self.headers.get("If-None-Match"), encoded):
+                self.send_response(304)
+                self._common_headers(etag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            body = encoded.gzipped if use_gzip else encoded.body
+            self.send_response(200)
+            self._common_headers(etag)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            if use_gzip:
+                self.send_header("Content-Encoding", "gzip")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _common_headers(self, etag: str) -> None:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Vary", "Accept-Encoding")
+            self.send_header("Access-Control-Allow-Origin", "*")
+
+        def _send_error(self, status: int, message: str) -> None:
+            body = dumps({"error": message})
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            if not api.quiet:
+                super().log_message(format, *args)
+
+    return ApiHandler
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Serve the published ETF rows with filtering, sorting and paging.")
+    parser.add_argument("--data", type=Path, default=DATA_FILE, help="(default: %(default)s)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=API_PORT, help="(default: %(default)s)")
+    parser.add_argument("--quiet", action="store_true", help="No per-request access log.")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    api = ReadApi(args.data)
+    api.quiet = args.quiet
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(api))
+    server.daemon_threads = True
+    print(f"[api] serving http://{args.host}:{server.server_address[1]}/etfs")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
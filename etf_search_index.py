@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""Prebuilt search index over 종목명 / 종목코드 of the published ETF list.
+
+Layout (minified JSON, written next to data.json):
+
+    {
+      "format": "etfsave-search",
+      "version": 1,
+      "fields": ["종목코드", "종목명", "구분"],
+      "docs": [["360200", "ACE 미국S&P500", "S&P500"], ...],
+      "maxPrefix": 6,
+      "postings": {
+        "prefix":  {"tig": [6, 8, 3], "미국": [0, 1, 1], ...},   token prefixes of 종목명
+        "chosung": {"ㅁㄱ": [0, 1, 1], ...},                      initial consonants of Hangul tokens
+        "gram":    {"p5": [0, 1, 1], ...},                         character bigrams (infix search)
+        "brand":   {"tiger": [6, 8], ...},                         first token of 종목명 (TIGER, KODEX, ...)
+        "code":    {"36": [0, 5], ...}                             종목코드 prefixes
+      },
+      "stop": {"prefix": ["m"], "gram": [...]}
+    }
+
+Names are normalized with NFKC + lower case and split into Hangul and Latin/digit
+tokens ('TIGER 미국S&P500(H)' -> tiger, 미국, s&p500, h). Postings are sorted doc
+ids, delta-encoded. Keys that hit more than STOP_SHARE of the docs narrow nothing,
+so they are dropped and listed under "stop"; a query token that only has stop
+keys is checked against the candidates of the other tokens instead.
+
+The serialized index must fit `budget` bytes: the prefix length is shortened and,
+as a last resort, the bigram postings are left out before build_index gives up.
+"""
+
+from __future__ import annotations
+
+import argparse
+import heapq
+import json
+import re
+import unicodedata
+from pathlib import Path
+from typing import Any, Iterable
+
+FORMAT_NAME = "etfsave-search"
+FORMAT_VERSION = 1
+SEARCH_INDEX_FILE = Path("search-index.json")
+SIZE_BUDGET_BYTES = 1024 * 1024
+FIELDS = ["종목코드", "종목명", "구분"]
+
+MAX_PREFIX = 6
+MIN_PREFIX = 3
+STOP_SHARE = 0.3
+STOP_MIN_DOCS = 32
+
+CHOSUNG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+TOKEN = re.compile(r"[가-힣]+|[ㄱ-ㅎ]+|[0-9a-z&]+")
+
+# Renamed brands and Hangul spellings people type for the Latin brand names.
+BRAND_ALIASES = {
+    "kbstar": "rise", "arirang": "plus", "kosef": "kiwoom",
+    "타이거": "tiger", "코덱스": "kodex", "에이스": "ace", "라이즈": "rise", "솔": "sol",
+    "플러스": "plus", "하나로": "hanaro", "키움": "kiwoom", "아리랑": "plus", "케이비스타": "rise",
+}
+
+
+# NFKC turns typed compatibility jamo (ㄴ) into conjoining jamo (ᄂ); map them back.
+JAMO_BACK = {ord(unicodedata.normalize("NFKC", ch)): ch for ch in CHOSUNG}
+
+
+def normalize(text: Any) -> str:
+    return unicodedata.normalize("NFKC", str(text or "")).lower().translate(JAMO_BACK)
+
+
+def tokenize(text: Any) -> list[str]:
+    return TOKEN.findall(normalize(text))
+
+
+def chosung(token: str) -> str:
+    """'미국' -> 'ㅁㄱ'; '' when the token is not all Hangul syllables."""
+    if not token or not all("가" <= ch <= "힣" for ch in token):
+        return ""
+    return "".join(CHOSUNG[(ord(ch) - 0xAC00) // 588] for ch in token)
+
+
+def bigrams(text: str) -> set[str]:
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+def _delta(ids: Iterable[int]) -> list[int]:
+    out, previous = [], 0
+    for doc_id in sorted(ids):
+        out.append(doc_id - previous)
+        previous = doc_id
+    return out
+
+
+def _undelta(gaps: list[int]) -> list[int]:
+    out, total = [], 0
+    for gap in gaps:
+        total += gap
+        out.append(total)
+    return out
+
+
+def _postings(records: list[dict[str, Any]], max_prefix: int) -> dict[str, dict[str, set[int]]]:
+    postings: dict[str, dict[str, set[int]]] = {name: {} for name in ("prefix", "chosung", "gram", "brand", "code")}
+
+    def add(kind: str, key: str, doc_id: int) -> None:
+        postings[kind].setdefault(key, set()).add(doc_id)
+
+    for doc_id, record in enumerate(records):
+        name = str(record.get("종목명") or "")
+        tokens = tokenize(name)
+        initials = []
+        for token in tokens:
+            for n in range(1, min(len(token), max_prefix) + 1):
+                add("prefix", token[:n], doc_id)
+            initials.append(chosung(token))
+            for n in range(1, min(len(initials[-1]), max_prefix) + 1):
+                add("chosung", initials[-1][:n], doc_id)
+        # Bigrams of the name and of its 초성, so both can be found mid-token.
+        for gram in bigrams("".join(tokens)) | bigrams("".join(initials)):
+            add("gram", gram, doc_id)
+        words = normalize(name).split()
+        if words:
+            add("brand", words[0], doc_id)
+        code = str(record.get("종목코드") or "").strip().lower()
+        for n in range(2, len(code) + 1):
+            add("code", code[:n], doc_id)
+    return postings
+
+
+def build_index(
+    records: list[dict[str, Any]],
+    budget: int = SIZE_BUDGET_BYTES,
+    max_prefix: int = MAX_PREFIX,
+) -> dict[str, Any]:
+    """
+    Builds the index payload for data.json-shaped records. Raises ValueError when
+    even the smallest variant (MIN_PREFIX, no bigrams) is over `budget` bytes.
+    """
+    stop_docs = max(STOP_MIN_DOCS, int(len(records) * STOP_SHARE))
+    docs = [[str(record.get(field) or "") for field in FIELDS] for record in records]
+
+    full: dict[str, dict[str, list[int]]] = {}
+    full_stop: dict[str, list[str]] = {}
+    for kind, entries in _postings(records, max_prefix).items():
+        full[kind] = {}
+        for key, ids in sorted(entries.items()):
+            if kind in ("prefix", "chosung", "gram") and len(ids) > stop_docs:
+                full_stop.setdefault(kind, []).append(key)
+            else:
+                full[kind][key] = _delta(ids)
+
+    variants = [(n, True) for n in range(max_prefix, MIN_PREFIX - 1, -1)] + [(MIN_PREFIX, False)]
+    size = 0
+    for prefix_len, with_grams in variants:
+        # Shorter prefixes and no bigrams are subsets of the full postings.
+        postings = {
+            kind: {key: ids for key, ids in entries.items() if kind not in ("prefix", "chosung") or len(key) <= prefix_len}
+            for kind, entries in full.items()
+        }
+        stop = {kind: [key for key in keys if len(key) <= prefix_len] for kind, keys in full_stop.items()}
+        if not with_grams:
+            postings["gram"] = {}
+            stop.pop("gram", None)
+
+        payload = {
+            "format": FORMAT_NAME,
+            "version": FORMAT_VERSION,
+            "fields": FIELDS,
+            "docs": docs,
+            "maxPrefix": prefix_len,
+            "postings": postings,
+            "stop": stop,
+        }
+        size = len(dumps(payload).encode("utf-8"))
+        if size <= budget:
+            return payload
+    raise ValueError(f"search index for {len(records)} docs is {size} bytes, over the {budget} byte budget")
+
+
+def dumps(payload: dict[str, Any]) -> str:
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+
+
+class SearchIndex:
+    """Query API over a built or loaded index payload."""
+
+    def __init__(self, payload: dict[str, Any]) -> None:
+        if payload.get("format") != FORMAT_NAME:
+            raise ValueError(f"not an {FORMAT_NAME} payload")
+        if payload.get("version") != FORMAT_VERSION:
+            raise ValueError(f"unsupported {FORMAT_NAME} version: {payload.get('version')}")
+        self.fields = payload["fields"]
+        self.docs = payload["docs"]
+        self.max_prefix = payload["maxPrefix"]
+        self.postings = payload["postings"]
+        self.stop = {kind: set(keys) for kind, keys in payload.get("stop", {}).items()}
+        self._name_pos = self.fields.index("종목명")
+        self._tokens: list[list[str] | None] = [None] * len(self.docs)  # tokenized lazily, for hits only
+        self._decoded: dict[tuple[str, str], frozenset[int]] = {}
+
+    @classmethod
+    def load(cls, path: Path = SEARCH_INDEX_FILE) -> "SearchIndex":
+        return cls(json.loads(Path(path).read_text(encoding="utf-8")))
+
+    def _ids(self, kind: str, key: str) -> frozenset[int] | None:
+        """Decoded postings; each key is decoded once and then served from memory."""
+        cached = self._decoded.get((kind, key))
+        if cached is None:
+            gaps = self.postings.get(kind, {}).get(key)
+            if gaps is None:
+                return None
+            cached = self._decoded[(kind, key)] = frozenset(_undelta(gaps))
+        return cached
+
+    def _token_matches(self, token: str) -> frozenset[int] | None:
+        """
+        Doc ids a query token matches (brand, 종목코드 prefix, name-token prefix,
+        초성 prefix, else infix); None when its keys are too common to narrow.
+        """
+        ids = self._ids("brand", BRAND_ALIASES.get(token, token))
+        if ids:
+            return ids
+        key = token[:self.max_prefix]
+        if all(ch in CHOSUNG for ch in token):
+            if key in self.stop.get("chosung", ()):
+                return None
+            ids = self._ids("chosung", key)
+            if ids:
+                return ids
+        else:
+            # Digits can be a code prefix and a name token ('200' in 'KODEX 200').
+            code_ids = self._ids("code", token) or frozenset()
+            if key in self.stop.get("prefix", ()):
+                return None
+            ids = self._ids("prefix", key)
+            if ids or code_ids:
+                return (ids or frozenset()) | code_ids
+
+        # Infix: every bigram of the token must be present.
+        grams = bigrams(token)
+        if not grams or not self.postings.get("gram"):
+            return frozenset()
+        result: frozenset[int] | None = None
+        for gram in sorted(grams):
+            if gram in self.stop.get("gram", ()):
+                continue
+            ids = self._ids("gram", gram)
+            if not ids:
+                return frozenset()
+            result = ids if result is None else result & ids
+        return result
+
+    def _doc_tokens(self, doc_id: int) -> list[str]:
+        if self._tokens[doc_id] is None:
+            self._tokens[doc_id] = tokenize(self.docs[doc_id][self._name_pos])
+        return self._tokens[doc_id]
+
+    def _doc_text(self, doc_id: int) -> str:
+        """Compact name and its 초성, for checking stop tokens."""
+        tokens = self._doc_tokens(doc_id)
+        return "".join(tokens) + "\n" + "".join(chosung(token) for token in tokens)
+
+    def search(self, query: str, limit: int = 20) -> list[dict[str, Any]]:
+        """
+        Docs matching every token of `query`, best first: most query tokens that
+        are whole tokens of the 종목명, then the shorter 종목명.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        candidates: frozenset[int] | None = None
+        unchecked: list[str] = []
+        for token in tokens:
+            ids = self._token_matches(token)
+            if ids is None:
+                unchecked.append(token)
+                continue
+            candidates = ids if candidates is None else candidates & ids
+            if not candidates:
+                return []
+
+        ordered = sorted(candidates) if candidates is not None else range(len(self.docs))
+        hits = []
+        for doc_id in ordered:
+            if unchecked and not all(token in self._doc_text(doc_id) for token in unchecked):
+                continue
+            hits.append(doc_id)
+            if candidates is None and len(hits) >= limit:
+                break  # only stop tokens: first matches in list order, without a full scan
+
+        wanted = {BRAND_ALIASES.get(token, token) for token in tokens}
+
+        def rank(doc_id: int) -> tuple[int, int, int]:
+            exact = len(wanted.intersection(self._doc_tokens(doc_id)))
+            return (-exact, len(self.docs[doc_id][self._name_pos]), doc_id)
+
+        return [dict(zip(self.fields, self.docs[doc_id])) for doc_id in heapq.nsmallest(limit, hits, key=rank)]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build or query the ETF search index.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="Build the index from data.json.")
+    build.add_argument("source", nargs="?", type=Path, default=Path("data.json"))
+    build.add_argument("--output", type=Path, default=SEARCH_INDEX_FILE)
+    build.add_argument("--budget", type=int, default=SIZE_BUDGET_BYTES, help="Size budget in bytes (default: %(default)s)")
+
+    query = sub.add_parser("query", help="Search the index.")
+    query.add_argument("query")
+    query.add_argument("--index", type=Path, default=SEARCH_INDEX_FILE)
+    query.add_argument("--limit", type=int, default=20)
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    if args.command == "build":
+        records = json.loads(args.source.read_text(encoding="utf-8"))
+        try:
+            payload = build_index(records, budget=args.budget)
+        except ValueError as exc:
+            print(f"[search] {exc}")
+            return 1
+        serialized = dumps(payload)
+        args.output.write_text(serialized, encoding="utf-8")
+        print(f"[search] {args.output}: {len(records)} docs, prefix {payload['maxPrefix']}, "
+              f"{len(serialized.encode('utf-8'))} bytes (budget {args.budget})")
+        return 0
+
+    for hit in SearchIndex.load(args.index).search(args.query, args.limit):
+        print(f"{hit['종목코드']}  {hit['종목명']}  [{hit['구분']}]")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
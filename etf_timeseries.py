@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""Embedded time-series store (SQLite) of daily fees, AUM and volume per 종목코드."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sqlite3
+from pathlib import Path
+from typing import Any, Iterable
+
+STORE_FILE = Path("history/etf_timeseries.sqlite")
+
+# data.json key -> SQL column
+COLUMNS = {
+    "구분": "category",
+    "종목코드": "code",
+    "종목명": "name",
+    "총보수": "total_fee",
+    "기타비용": "other_cost",
+    "매매중개수수료": "trading_fee",
+    "실부담비용": "real_cost",
+    "AUM": "aum",
+    "거래량": "volume",
+}
+VALUE_COLUMNS = [col for col in COLUMNS.values() if col != "code"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS etf_daily (
+    date        TEXT NOT NULL,
+    code        TEXT NOT NULL,
+    category    TEXT,
+    name        TEXT,
+    total_fee   REAL,
+    other_cost  REAL,
+    trading_fee REAL,
+    real_cost   REAL,
+    aum         REAL,
+    volume      INTEGER,
+    PRIMARY KEY (code, date)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_etf_daily_category_date ON etf_daily (category, date);
+CREATE INDEX IF NOT EXISTS idx_etf_daily_date ON etf_daily (date);
+"""
+
+
+def connect(path: Path = STORE_FILE) -> sqlite3.Connection:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path))
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _to_number(value: Any) -> float | None:
+    if value is None:
+        return None
+    try:
+        return float(str(value).replace(",", "").replace("%", "").strip())
+    except ValueError:
+        return None
+
+
+def _row_to_record(row: sqlite3.Row) -> dict[str, Any]:
+    record: dict[str, Any] = {"date": row["date"]}
+    for key, col in COLUMNS.items():
+        record[key] = row[col]
+    return record
+
+
+def upsert_day(
+    conn: sqlite3.Connection,
+    run_date: str,
+    rows: Iterable[dict[str, Any]],
+    keep_missing: bool = False,
+) -> int:
+    """
+    Inserts or replaces one row per (run_date, 종목코드). Re-running the same day
+    overwrites that day's values, so daily loads are idempotent. With
+    `keep_missing`, values missing from `rows` keep what is stored, so a backfill
+    without market data does not erase the AUM/거래량 of a day the ETL recorded.
+    """
+    params = []
+    for row in rows:
+        code = str(row.get("종목코드", "")).strip()
+        if not code:
+            continue
+        volume = _to_number(row.get("거래량"))
+        params.append(
+            (
+                run_date,
+                code,
+                row.get("구분"),
+                row.get("종목명"),
+                _to_number(row.get("총보수")),
+                _to_number(row.get("기타비용")),
+                _to_number(row.get("매매중개수수료")),
+                _to_number(row.get("실부담비용")),
+                _to_number(row.get("AUM")),
+                int(volume) if volume is not None else None,
+            )
+        )
+
+    if keep_missing:
+        assignments = ", ".join(f"{col} = COALESCE(excluded.{col}, {col})" for col in VALUE_COLUMNS)
+    else:
+        assignments = ", ".join(f"{col} = excluded.{col}" for col in VALUE_COLUMNS)
+    with conn:
+        conn.executemany(
+            f"""
+            INSERT INTO etf_daily (date, code, {", ".join(VALUE_COLUMNS)})
+            VALUES (?, ?, {", ".join("?" for _ in VALUE_COLUMNS)})
+            ON CONFLICT (code, date) DO UPDATE SET {assignments}
+            """,
+            params,
+        )
+    return len(params)
+
+
+def list_dates(conn: sqlite3.Connection) -> list[str]:
+    return [row["date"] for row in conn.execute("SELECT DISTINCT date FROM etf_daily ORDER BY date")]
+
+
+def query_range(
+    conn: sqlite3.Connection,
+    code: str | None = None,
+    category: str | None = None,
+    start: str | None = None,
+    end: str | None = None,
+) -> list[dict[str, Any]]:
+    """Rows for a 종목코드 or 구분 with start <= date <= end, ordered by date."""
+    clauses = []
+    params: list[Any] = []
+    if code is not None:
+        clauses.append("code = ?")
+        params.append(str(code))
+    if category is not None:
+        clauses.append("category = ?")
+        params.append(category)
+    if start:
+        clauses.append("date >= ?")
+        params.append(start)
+    if end:
+        clauses.append("date <= ?")
+        params.append(end)
+
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    cursor = conn.execute(f"SELECT * FROM etf_daily {where} ORDER BY date, code", params)
+    return [_row_to_record(row) for row in cursor]
+
+
+def query_latest(
+    conn: sqlite3.Connection,
+    code: str | None = None,
+    category: str | None = None,
+    n: int = 1,
+) -> list[dict[str, Any]]:
+    """
+    The latest `n` rows per 종목코드, optionally limited to one code or one 구분.
+    Ordered by code, newest first.
+    """
+    clauses = []
+    params: list[Any] = []
+    if code is not None:
+        clauses.append("code = ?")
+        params.append(str(code))
+    if category is not None:
+        clauses.append("category = ?")
+        params.append(category)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+    cursor = conn.execute(
+        f"""
+        SELECT * FROM (
+            SELECT *, ROW_NUMBER() OVER (PARTITION BY code ORDER BY date DESC) AS rn
+            FROM etf_daily {where}
+        )
+        WHERE rn <= ?
+        ORDER BY code, date DESC
+        """,
+        [*params, n],
+    )
+    return [_row_to_record(row) for row in cursor]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Query the ETF time-series store.")
+    parser.add_argument("--db", type=Path, default=STORE_FILE, help="SQLite file (default: %(default)s)")
+    parser.add_argument("--code", help="종목코드 filter.")
+    parser.add_argument("--category", help="구분 filter.")
+    parser.add_argument("--since", help="First date (YYYY-MM-DD), inclusive.")
+    parser.add_argument("--until", help="Last date (YYYY-MM-DD), inclusive.")
+    parser.add_argument("--latest", type=int, help="Latest N rows per code instead of a date range.")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    if not args.db.exists():
+        print(f"[timeseries] {args.db} does not exist")
+        return 1
+
+    conn = connect(args.db)
+    try:
+        if args.latest:
+            rows = query_latest(conn, args.code, args.category, args.latest)
+        else:
+            rows = query_range(conn, args.code, args.category, args.since, args.until)
+    finally:
+        conn.close()
+
+    print(json.dumps(rows, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
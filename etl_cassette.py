@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""Record/replay cassettes for fully offline etl_process runs.
+
+A cassette directory holds everything one live run read from the outside world,
+the state the changelog step diffs against, and the outputs of that run:
+
+    cassettes/2026-10-17/
+      cassette.json             manifest: format/version, run dates, files + sha256
+      kofia_response.xml        KOFIA XML response (HTTP fetch) ... or
+      kofia_workbook.xls        ... the workbook Selenium downloaded
+      gas_items.json            managed items from GAS getItems
+      naver_etf_list.json       NAVER etfItemList response
+      state/                    changelog.json + history/changelog-base.json before the run
+      expected/                 data.json (+ changelog outputs after `capture`)
+
+    python etl_process.py --record [DIR]     live run that also writes the cassette
+    python etl_cassette.py capture DIR       add changelog outputs after build_changelog.py
+    python etl_process.py --replay DIR       offline run in a scratch directory, then
+                                             build_changelog.py and a byte-for-byte check
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import shutil
+import subprocess
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+
+CASSETTE_FORMAT = "etfsave-cassette"
+CASSETTE_VERSION = 1
+CASSETTE_ROOT = Path("cassettes")
+MANIFEST_FILE = "cassette.json"
+
+KOFIA_XML_FILE = "kofia_response.xml"
+KOFIA_WORKBOOK_STEM = "kofia_workbook"
+GAS_ITEMS_FILE = "gas_items.json"
+NAVER_LIST_FILE = "naver_etf_list.json"
+
+STATE_DIR = "state"
+EXPECTED_DIR = "expected"
+# Pre-run files build_changelog.py reads (relative to the repo root).
+STATE_FILES = ["changelog.json", "history/changelog-base.json"]
+# Outputs compared byte-for-byte on replay, when the cassette has them.
+DATA_OUTPUTS = ["data.json"]
+CHANGELOG_OUTPUTS = ["changelog.json", "changelog-latest.json"]
+
+
+def sha256_file(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def kst_today() -> str:
+    return datetime.now(timezone(timedelta(hours=9))).strftime("%Y-%m-%d")
+
+
+class Cassette:
+    def __init__(self, path: Path, mode: str) -> None:
+        if mode not in ("record", "replay"):
+            raise ValueError(f"unknown cassette mode: {mode}")
+        self.path = Path(path)
+        self.mode = mode
+        if mode == "replay":
+            self.manifest = self._read_manifest()
+        else:
+            self.path.mkdir(parents=True, exist_ok=True)
+            self.manifest = {
+                "format": CASSETTE_FORMAT,
+                "version": CASSETTE_VERSION,
+                "recordedAt": datetime.now(timezone(timedelta(hours=9))).isoformat(timespec="seconds"),
+                "runDate": kst_today(),
+                # build_changelog.py dates entries with the local date, not KST
+                "changelogDate": datetime.now().strftime("%Y-%m-%d"),
+                "kofia": None,
+                "files": {},
+            }
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == "record"
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    @property
+    def run_date(self) -> str:
+        return self.manifest["runDate"]
+
+    @property
+    def changelog_date(self) -> str:
+        return self.manifest.get("changelogDate") or self.run_date
+
+    def _read_manifest(self) -> dict[str, Any]:
+        manifest_path = self.path / MANIFEST_FILE
+        if not manifest_path.exists():
+            raise FileNotFoundError(f"not a cassette (no {MANIFEST_FILE}): {self.path}")
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        if manifest.get("format") != CASSETTE_FORMAT:
+            raise ValueError(f"not an {CASSETTE_FORMAT} manifest: {manifest_path}")
+        if manifest.get("version") != CASSETTE_VERSION:
+            raise ValueError(f"unsupported cassette version: {manifest.get('version')}")
+        return manifest
+
+    def _add_file(self, name: str) -> None:
+        self.manifest["files"][name] = sha256_file(self.path / name)
+        self.save_manifest()
+
+    def save_manifest(self) -> None:
+        (self.path / MANIFEST_FILE).write_text(json.dumps(self.manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    def file(self, name: str) -> Path:
+        """Path of a recorded file; checks it against the manifest hash."""
+        path = self.path / name
+        expected = self.manifest["files"].get(name)
+        if expected is None or not path.exists():
+            raise FileNotFoundError(f"cassette {self.path} has no {name}")
+        if sha256_file(path) != expected:
+            raise ValueError(f"cassette file {name} does not match its recorded sha256")
+        return path
+
+    # recording
+
+    def record_bytes(self, name: str, content: bytes) -> None:
+        (self.path / name).write_bytes(content)
+        self._add_file(name)
+
+    def record_json(self, name: str, payload: Any) -> None:
+        self.record_bytes(name, json.dumps(payload, ensure_ascii=False, indent=1).encode("utf-8"))
+
+    def record_kofia_xml(self, content: bytes) -> None:
+        self.record_bytes(KOFIA_XML_FILE, content)
+        self.manifest["kofia"] = KOFIA_XML_FILE
+        self.save_manifest()
+
+    def record_kofia_workbook(self, source: str | Path) -> None:
+        name = KOFIA_WORKBOOK_STEM + Path(source).suffix.lower()
+        shutil.copyfile(source, self.path / name)
+        self.manifest["kofia"] = name
+        self._add_file(name)
+
+    def capture_state(self, root: Path) -> list[str]:
+        """
+        Records the pre-run changelog state. Without a changelog base, build_changelog.py
+        diffs against HEAD:data.json (or nothing outside a git checkout), so that is
+        recorded as the base.
+        """
+        captured = self.capture(root, STATE_FILES, STATE_DIR)
+        base = "history/changelog-base.json"
+        if base not in captured:
+            result = subprocess.run(["git", "show", "HEAD:data.json"], cwd=root, capture_output=True)
+            target = self.path / STATE_DIR / base
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_bytes(result.stdout if result.returncode == 0 else b"[]")
+            self.manifest["files"][f"{STATE_DIR}/{base}"] = sha256_file(target)
+            self.save_manifest()
+            captured.append(base)
+        return captured
+
+    def capture(self, root: Path, names: list[str], subdir: str) -> list[str]:
+        """Copies the existing files among `names` (relative to `root`) into `subdir`."""
+        captured = []
+        for name in names:
+            source = root / name
+            if not source.exists():
+                continue
+            target = self.path / subdir / name
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(source, target)
+            self.manifest["files"][f"{subdir}/{name}"] = sha256_file(target)
+            captured.append(name)
+        self.save_manifest()
+        return captured
+
+    # replay
+
+    def load_json(self, name: str) -> Any:
+        return json.loads(self.file(name).read_text(encoding="utf-8"))
+
+    def kofia_file(self) -> Path:
+        if not self.manifest.get("kofia"):
+            raise FileNotFoundError(f"cassette {self.path} has no KOFIA data")
+        return self.file(self.manifest["kofia"])
+
+    def restore(self, workdir: Path, subdir: str = STATE_DIR) -> list[str]:
+        """Copies the recorded files of `subdir` into `workdir` (same relative paths)."""
+        restored = []
+        prefix = f"{subdir}/"
+        for key in self.manifest["files"]:
+            if key.startswith(prefix):
+                name = key[len(prefix):]
+                target = workdir / name
+                target.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copyfile(self.file(key), target)
+                restored.append(name)
+        return restored
+
+    def verify(self, workdir: Path, names: list[str]) -> list[str]:
+        """
+        Compares workdir files with the cassette's expected/ copies.
+        Returns the names that differ or are missing; prints one line per file.
+        """
+        mismatched = []
+        for name in names:
+            key = f"{EXPECTED_DIR}/{name}"
+            if key not in self.manifest["files"]:
+                print(f"[cassette] {name}: no recorded output, not compared")
+                continue
+            produced = workdir / name
+            if produced.exists() and sha256_file(produced) == self.manifest["files"][key]:
+                print(f"[cassette] {name}: identical")
+            else:
+                print(f"[cassette] {name}: MISMATCH")
+                mismatched.append(name)
+        return mismatched
+
+
+def default_cassette_dir() -> Path:
+    return CASSETTE_ROOT / kst_today()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Inspect and complete ETL cassettes.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    capture = sub.add_parser("capture", help="Add the changelog outputs of the recorded run to expected/.")
+    capture.add_argument("cassette", type=Path)
+    capture.add_argument("--root", type=Path, default=Path("."), help="Repo root (default: %(default)s)")
+
+    verify = sub.add_parser("verify", help="Compare a replay directory with the cassette's expected/ outputs.")
+    verify.add_argument("cassette", type=Path)
+    verify.add_argument("workdir", type=Path)
+
+    show = sub.add_parser("show", help="Print the manifest.")
+    show.add_argument("cassette", type=Path)
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    if args.command == "capture":
+        cassette = Cassette(args.cassette, "replay")
+        captured = cassette.capture(args.root, CHANGELOG_OUTPUTS, EXPECTED_DIR)
+        print(f"[cassette] captured {', '.join(captured) or 'nothing'} into {args.cassette / EXPECTED_DIR}")
+        return 0
+    if args.command == "verify":
+        cassette = Cassette(args.cassette, "replay")
+        return 1 if cassette.verify(args.workdir, DATA_OUTPUTS + CHANGELOG_OUTPUTS) else 0
+
+    print(json.dumps(Cassette(args.cassette, "replay").manifest, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""Resident refresh service: etl_process without a cold start per run.
+
+One process keeps the matched fee table, the managed-list cache and the pooled
+HTTP client alive and runs two jobs on separate cadences:
+
+    kofia    KOFIA fetch + managed list + match (snapshot cache hit when unchanged),
+             every --kofia-interval (default 12 h)
+    market   NAVER etfItemList (conditional GET), every --market-interval (default 10 min)
+
+After either job the fee table and the latest market data are merged and written
+with the same writers as the daily run, once both have been fetched (publishing
+fees before the first NAVER refresh would write null AUM/거래량). Nothing is
+written when the merged rows did not change. What is written depends on what changed:
+
+    fees changed        everything: data.json, columnar copy, search index, category
+                        artifacts, cost projection, update-meta.json, GAS delta upload
+    market data only    data.json, columnar copy and search index; the shared
+                        artifacts and the GAS upload follow at most every
+                        --share-interval (default: the KOFIA interval)
+
+The time-series store gets one upsert per KST day, plus one when the fees change.
+A failed job keeps the last good data and is retried after RETRY_SECONDS.
+
+    python etl_daemon.py --market-interval 600 --health-port 8787
+    curl http://127.0.0.1:8787/health
+
+/health answers 200 while both sources refreshed within 2x their interval and 503
+otherwise (or before the first publish), with the last-refresh timestamps.
+run-report.json is rewritten after every job.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import signal
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable
+
+import etl_http
+import etl_metrics
+import etl_process
+
+MARKET_INTERVAL_SECONDS = 10 * 60
+KOFIA_INTERVAL_SECONDS = 12 * 60 * 60
+RETRY_SECONDS = 5 * 60
+HEALTH_PORT = 8787
+STALE_FACTOR = 2
+
+
+def utc_iso(timestamp: float | None) -> str | None:
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat(timespec="seconds")
+
+
+@dataclass
+class JobState:
+    interval: float
+    next_run: float = 0.0
+    last_attempt: float | None = None
+    last_success: float | None = None
+    last_error: str | None = None
+    runs: int = 0
+    failures: int = 0
+
+    def fresh(self, now: float) -> bool:
+        return self.last_success is not None and now - self.last_success <= STALE_FACTOR * self.interval
+
+    def as_dict(self, now: float) -> dict[str, Any]:
+        return {
+            "intervalSeconds": self.interval,
+            "lastAttempt": utc_iso(self.last_attempt),
+            "lastRefresh": utc_iso(self.last_success),
+            "lastError": self.last_error,
+            "nextRun": utc_iso(self.next_run),
+            "runs": self.runs,
+            "failures": self.failures,
+            "fresh": self.fresh(now),
+        }
+
+
+class RefreshDaemon:
+    def __init__(self, market_interval: float, kofia_interval: float, share_interval: float | None = None) -> None:
+        self.jobs: dict[str, JobState] = {
+            "kofia": JobState(kofia_interval),
+            "market": JobState(market_interval),
+        }
+        self.fees: list[dict[str, Any]] | None = None
+        self.naver_map: dict[str, Any] | None = None
+        self.published: list[dict[str, Any]] | None = None
+        self.published_at: float | None = None
+        # Fee table and time of the last full (shared + GAS) publish; date of the last time-series upsert.
+        self.share_interval = kofia_interval if share_interval is None else share_interval
+        self.shared_fees: list[dict[str, Any]] | None = None
+        self.shared_at: float | None = None
+        self.recorded_date: str | None = None
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._server: ThreadingHTTPServer | None = None
+
+    # jobs
+
+    def refresh_kofia(self) -> None:
+        stages = etl_process.build_etl_stages()
+        results, errors = etl_process.run_stage_graph({name: stages[name] for name in ("kofia", "managed", "fees")})
+        kofia_result = results.get("kofia") or (None, None)
+        try:
+            if not results.get("fees"):
+                failed = ", ".join(f"{name}: {e}" for name, e in errors.items())
+                raise RuntimeError(failed or "no managed item matched the KOFIA data")
+            self.fees = results["fees"]
+        finally:
+            if kofia_result[1]:
+                etl_process.remove_download(kofia_result[1])
+
+    def refresh_market(self) -> None:
+        naver_map = etl_process.fetch_naver_etf_list()
+        if naver_map is None:
+            raise RuntimeError("NAVER ETF list unavailable")
+        self.naver_map = naver_map
+
+    def publish(self) -> bool:
+        """
+        Merges fees and market data and writes them when the rows changed: everything
+        when the fees changed or the share interval has passed, otherwise only the
+        local files (see the module docstring).
+        """
+        if not self.fees:
+            print("[daemon] no fee table yet, nothing to publish")
+            return False
+        if self.naver_map is None:
+            print("[daemon] no market data yet, publish deferred until the first NAVER refresh")
+            return False
+        rows = etl_process.merge_market_data([dict(row) for row in self.fees], self.naver_map)
+        if rows == self.published:
+            print("[daemon] merged rows unchanged, artifacts kept")
+            return False
+
+        now = time.time()
+        fees_changed = self.fees != self.shared_fees
+        shared = fees_changed or self.shared_at is None or now - self.shared_at >= self.share_interval
+        today = etl_process.kst_today()
+
+        etl_metrics.run.set_count('output_rows', len(rows))
+        with etl_process.timed_phase("write"):
+            if fees_changed or today != self.recorded_date:
+                etl_process.record_timeseries(rows)
+                self.recorded_date = today
+            saved = etl_process.update_google_sheets(rows, shared=shared)
+            if shared:
+                etl_process.wait_for_gas_uploads()
+        if not saved:
+            raise RuntimeError("failed to save ETL outputs")
+        if not shared:
+            print("[daemon] market-only change: wrote local files, shared artifacts and GAS upload deferred")
+        with self._lock:
+            self.published = rows
+            self.published_at = now
+            if shared:
+                self.shared_fees = self.fees
+                self.shared_at = now
+        return True
+
+    def run_job(self, name: str, job: Callable[[], None]) -> None:
+        state = self.jobs[name]
+        # One report per job, so a resident process does not accumulate spans forever.
+        etl_metrics.run = etl_metrics.RunReport()
+        started = time.time()
+        exit_code = 0
+        try:
+            with etl_process.timed_phase(f"daemon {name}"):
+                job()
+                self.publish()
+            with self._lock:
+                state.last_success = time.time()
+                state.last_error = None
+        except Exception as e:
+            exit_code = 1
+            print(f"[daemon] {name} refresh failed: {e}")
+            with self._lock:
+                state.failures += 1
+                state.last_error = str(e)
+        finally:
+            with self._lock:
+                state.runs += 1
+                state.last_attempt = started
+                state.next_run = time.time() + (state.interval if exit_code == 0 else min(state.interval, RETRY_SECONDS))
+            etl_metrics.run.detail('daemon', self.health())
+            etl_metrics.run.detail('http', etl_http.client.stats())
+            try:
+                etl_metrics.run.write(os.path.join(os.getcwd(), etl_metrics.RUN_REPORT_FILE), exit_code)
+            except Exception as e:
+                print(f"[daemon] error writing run report: {e}")
+
+    # health
+
+    def health(self) -> dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            jobs = {name: state.as_dict(now) for name, state in self.jobs.items()}
+            if self.published is None:
+                status = "starting"
+            elif all(state.fresh(now) for state in self.jobs.values()):
+                status = "ok"
+            else:
+                status = "degraded"
+            return {
+                "status": status,
+                "startedAt": utc_iso(self.started),
+                "uptimeSeconds": round(now - self.started),
+                "publishedAt": utc_iso(self.published_at),
+                "rows": len(self.published or []),
+                "sources": jobs,
+            }
+
+    def serve_health(self, host: str, port: int) -> None:
+        daemon = self
+
+        class HealthHandler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split("?", 1)[0] not in ("/health", "/healthz"):
+                    self.send_error(404)
+                    return
+                report = daemon.health()
+                body = json.dumps(report, ensure_ascii=False, indent=2).encode("utf-8")
+                self.send_response(200 if report["status"] == "ok" else 503)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Cache-Control", "no-store")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass  # health probes would flood the log
+
+        self._server = ThreadingHTTPServer((host, port), HealthHandler)
+        threading.Thread(target=self._server.serve_forever, name="health", daemon=True).start()
+        print(f"[daemon] health on http://{host}:{self._server.server_address[1]}/health")
+
+    # scheduling
+
+    def run_forever(self) -> None:
+        jobs = {"kofia": self.refresh_kofia, "market": self.refresh_market}
+        while not self._stop.is_set():
+            # KOFIA first when both are due, so the first publish already has fees.
+            name = min(self.jobs, key=lambda n: (self.jobs[n].next_run, n != "kofia"))
+            delay = self.jobs[name].next_run - time.time()
+            if delay > 0 and self._stop.wait(delay):
+                break
+            self.run_job(name, jobs[name])
+        if self._server is not None:
+            self._server.shutdown()
+        print("[daemon] stopped")
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Resident ETL: NAVER market data and KOFIA fees on separate cadences.")
+    parser.add_argument("--market-interval", type=float, default=MARKET_INTERVAL_SECONDS, help="Seconds (default: %(default)s)")
+    parser.add_argument("--kofia-interval", type=float, default=KOFIA_INTERVAL_SECONDS, help="Seconds (default: %(default)s)")
+    parser.add_argument(
+        "--share-interval",
+        type=float,
+        help="Seconds between full publishes (category artifacts, GAS upload) for market-only changes "
+        "(default: the KOFIA interval)",
+    )
+    parser.add_argument("--health-host", default="127.0.0.1")
+    parser.add_argument("--health-port", type=int, default=HEALTH_PORT, help="0 picks a free port; -1 disables (default: %(default)s)")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    daemon = RefreshDaemon(args.market_interval, args.kofia_interval, args.share_interval)
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: daemon.stop())
+    if args.health_port >= 0:
+        daemon.serve_health(args.health_host, args.health_port)
+    daemon.run_forever()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,261 @@
+"""Shared HTTP client for the ETL's external sources (KOFIA, GAS, NAVER).
+
+One pooled requests.Session with keep-alive, bounded retries with jittered
+exponential backoff, per-source timeouts, ETag/If-Modified-Since revalidation
+for GETs, and per-source latency/byte counters.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+HTTP_CACHE_DIR = os.path.join(".etl_cache", "http")
+RETRY_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+
+@dataclass(frozen=True)
+class SourceConfig:
+    connect_timeout: float = 5.0
+    read_timeout: float = 30.0
+    max_attempts: int = 3
+    backoff_base: float = 1.0
+    backoff_cap: float = 20.0
+    retry_post: bool = False
+
+
+# Apps Script cold starts routinely take 10-30 s, so GAS gets a long read timeout
+# and more attempts. POSTs are retried although applyResultDelta batches are not
+# idempotent: every batch names the revision it applies to, so a repeat of a batch
+# that did land is answered "conflict", and upload_to_gas then redoes the upload as
+# a full reset (which, like the legacy single POST, replaces the whole sheet).
+SOURCES = {
+    "gas": SourceConfig(connect_timeout=10.0, read_timeout=90.0, max_attempts=4, backoff_base=2.0, retry_post=True),
+    "naver": SourceConfig(read_timeout=15.0),
+    # In auto mode a KOFIA failure falls back to Selenium, so give up within about a minute.
+    "kofia": SourceConfig(read_timeout=20.0, max_attempts=2, retry_post=True),
+}
+DEFAULT_SOURCE = SourceConfig()
+
+
+@dataclass
+class SourceStats:
+    requests: int = 0
+    attempts: int = 0
+    retries: int = 0
+    failures: int = 0
+    not_modified: int = 0
+    bytes_in: int = 0
+    bytes_out: int = 0
+    seconds: float = 0.0
+    latencies: list[float] = field(default_factory=list)
+
+    def as_dict(self) -> dict[str, Any]:
+        latencies = sorted(self.latencies)
+        return {
+            "requests": self.requests,
+            "attempts": self.attempts,
+            "retries": self.retries,
+            "failures": self.failures,
+            "notModified": self.not_modified,
+            "bytesIn": self.bytes_in,
+            "bytesOut": self.bytes_out,
+            "seconds": round(self.seconds, 3),
+            "maxLatency": round(latencies[-1], 3) if latencies else None,
+        }
+
+
+class HttpClient:
+    """Pooled, retrying HTTP client shared by every ETL source."""
+
+    def __init__(
+        self,
+        sources: dict[str, SourceConfig] | None = None,
+        cache_dir: str | None = HTTP_CACHE_DIR,
+        pool_size: int = 8,
+    ) -> None:
+        self.sources = dict(SOURCES if sources is None else sources)
+        self.cache_dir = cache_dir
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._stats: dict[str, SourceStats] = {}
+        self._lock = threading.Lock()
+        # Set for cassette replays: any request is a bug, so fail instead of going online.
+        self.offline = False
+
+    def get(self, source: str, url: str, conditional: bool = False, **kwargs: Any) -> requests.Response:
+        return self.request(source, "GET", url, conditional=conditional, **kwargs)
+
+    def post(self, source: str, url: str, **kwargs: Any) -> requests.Response:
+        return self.request(source, "POST", url, **kwargs)
+
+    def request(
+        self,
+        source: str,
+        method: str,
+        url: str,
+        conditional: bool = False,
+        **kwargs: Any,
+    ) -> requests.Response:
+        """
+        Sends a request with the source's timeout and retry policy. Retries on
+        connection errors, timeouts and 408/425/429/5xx; raises the last error once
+        attempts are exhausted. With `conditional=True` (GET only) the stored
+        ETag/Last-Modified is sent, and a 304 returns the stored body as a 200.
+        """
+        if self.offline:
+            raise RuntimeError(f"offline mode: refusing {method} {url}")
+        config = self.sources.get(source, DEFAULT_SOURCE)
+        kwargs.setdefault("timeout", (config.connect_timeout, config.read_timeout))
+        retryable = method.upper() in ("GET", "HEAD") or config.retry_post
+        max_attempts = config.max_attempts if retryable else 1
+
+        cache_key = None
+        cached = None
+        if conditional and method.upper() == "GET":
+            cache_key = self._cache_key(url, kwargs.get("params"))
+            cached = self._load_cached(cache_key)
+            if cached:
+                headers = dict(kwargs.pop("headers", None) or {})
+                if cached["meta"].get("etag"):
+                    headers["If-None-Match"] = cached["meta"]["etag"]
+                if cached["meta"].get("lastModified"):
+                    headers["If-Modified-Since"] = cached["meta"]["lastModified"]
+                kwargs["headers"] = headers
+
+        stats = self._source_stats(source)
+        with self._lock:
+            stats.requests += 1
+
+        last_error: Exception | None = None
+        for attempt in range(max_attempts):
+            if attempt:
+                delay = random.uniform(0, min(config.backoff_cap, config.backoff_base * 2 ** attempt))
+                print(f"[http] {source}: retry {attempt}/{max_attempts - 1} in {delay:.1f}s ({last_error})")
+                time.sleep(delay)
+
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as exc:
+                self._record(stats, time.perf_counter() - started, None, kwargs, retry=attempt > 0)
+                last_error = exc
+                continue
+
+            self._record(stats, time.perf_counter() - started, response, kwargs, retry=attempt > 0)
+
+            if response.status_code == 304 and cached:
+                with self._lock:
+                    stats.not_modified += 1
+                return self._replay(cached, url)
+            if response.status_code in RETRY_STATUSES and attempt + 1 < max_attempts:
+                last_error = requests.HTTPError(f"HTTP {response.status_code}", response=response)
+                continue
+
+            if cache_key and response.ok:
+                self._store_cached(cache_key, response)
+            return response
+
+        with self._lock:
+            stats.failures += 1
+        assert last_error is not None
+        raise last_error
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        with self._lock:
+            return {name: item.as_dict() for name, item in sorted(self._stats.items())}
+
+    def _source_stats(self, source: str) -> SourceStats:
+        with self._lock:
+            return self._stats.setdefault(source, SourceStats())
+
+    def _record(
+        self,
+        stats: SourceStats,
+        elapsed: float,
+        response: requests.Response | None,
+        kwargs: dict[str, Any],
+        retry: bool,
+    ) -> None:
+        body = kwargs.get("data")
+        sent = len(body) if isinstance(body, (bytes, str)) else 0
+        if kwargs.get("json") is not None:
+            sent = len(json.dumps(kwargs["json"], ensure_ascii=False).encode("utf-8"))
+        with self._lock:
+            stats.attempts += 1
+            stats.retries += int(retry)
+            stats.seconds += elapsed
+            stats.latencies.append(elapsed)
+            stats.bytes_out += sent
+            if response is not None:
+                stats.bytes_in += len(response.content)
+
+    def _cache_key(self, url: str, params: Any) -> str:
+        payload = json.dumps([url, sorted((params or {}).items())], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _load_cached(self, key: str) -> dict[str, Any] | None:
+        if not self.cache_dir:
+            return None
+        meta_path = os.path.join(self.cache_dir, f"{key}.json")
+        body_path = os.path.join(self.cache_dir, f"{key}.body")
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(body_path, "rb") as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+        return {"meta": meta, "body": body}
+
+    def _store_cached(self, key: str, response: requests.Response) -> None:
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if not self.cache_dir or not (etag or last_modified):
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        meta = {
+            "etag": etag,
+            "lastModified": last_modified,
+            "contentType": response.headers.get("Content-Type"),
+            "encoding": response.encoding,
+        }
+        with open(os.path.join(self.cache_dir, f"{key}.body"), "wb") as f:
+            f.write(response.content)
+        with open(os.path.join(self.cache_dir, f"{key}.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+
+    @staticmethod
+    def _replay(cached: dict[str, Any], url: str) -> requests.Response:
+        response = requests.Response()
+        response.status_code = 200
+        response._content = cached["body"]
+        response.url = url
+        response.encoding = cached["meta"].get("encoding")
+        response.headers = CaseInsensitiveDict({"Content-Type": cached["meta"].get("contentType") or ""})
+        response.from_cache = True  # type: ignore[attr-defined]
+        return response
+
+
+client = HttpClient()
+
+
+def print_stats() -> None:
+    for source, item in client.stats().items():
+        print(
+            f"[http] {source}: {item['requests']} requests, {item['retries']} retries, "
+            f"{item['failures']} failures, {item['notModified']} not modified, "
+            f"{item['bytesIn']} B in / {item['bytesOut']} B out, {item['seconds']:.2f}s"
+        )
@@ -0,0 +1,182 @@
+"""Run instrumentation for etl_process: stage spans, counters and an optional profile.
+
+Everything recorded here ends up in one JSON run report (RUN_REPORT_FILE, next to
+update-meta.json):
+
+    {
+      "startedAt": "...", "finishedAt": "...", "seconds": 41.2, "exitCode": 0,
+      "peakRssMiB": 312.5,
+      "spans": [{"name": "page load", "start": 0.8, "seconds": 2.41, "peakRssMiB": 180.2, "ok": true}, ...],
+      "counts": {"kofia_rows": 1032, "matched": 59, ...},
+      "details": {"missing": [...], "http": {...}},
+      "profile": {"cpu": [...], "memory": [...]}
+    }
+
+Peak RSS is the process-wide high-water mark at the end of a span; stages run in
+threads, so a span's value can include memory held by a concurrent stage.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Iterator
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+RUN_REPORT_FILE = "run-report.json"
+PROFILE_FILE = "run-profile.prof"
+PROFILE_TOP = 25
+
+
+def peak_rss_mib() -> float | None:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+class RunReport:
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.started_at = datetime.now(timezone.utc)
+        self.spans: list[dict[str, Any]] = []
+        self.counts: dict[str, int] = {}
+        self.details: dict[str, Any] = {}
+        self._profiler: cProfile.Profile | None = None
+        self._thread_profilers: list[cProfile.Profile] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """Times a block and records it; prints '[timing] name: 2.41s (peak RSS 180.2 MiB)'."""
+        started = time.perf_counter()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            seconds = time.perf_counter() - started
+            peak = peak_rss_mib()
+            with self._lock:
+                self.spans.append({
+                    "name": name,
+                    "start": round(started - self.started, 3),
+                    "seconds": round(seconds, 3),
+                    "peakRssMiB": peak,
+                    "ok": ok,
+                })
+            rss = f" (peak RSS {peak} MiB)" if peak is not None else ""
+            print(f"[timing] {name}: {seconds:.2f}s{rss}")
+
+    def count(self, name: str, value: int = 1) -> None:
+        """Adds `value` to a counter."""
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + int(value)
+
+    def set_count(self, name: str, value: int) -> None:
+        with self._lock:
+            self.counts[name] = int(value)
+
+    def detail(self, name: str, value: Any) -> None:
+        with self._lock:
+            self.details[name] = value
+
+    def start_profile(self) -> None:
+        """
+        cProfile + tracemalloc until write(). cProfile only sees the calling thread;
+        worker threads are added by running their work inside profile_thread().
+        """
+        tracemalloc.start()
+        self._profiler = cProfile.Profile()
+        self._profiler.enable()
+
+    @contextmanager
+    def profile_thread(self) -> Iterator[None]:
+        """Profiles the block on a worker thread when profiling is on; no-op otherwise."""
+        if self._profiler is None or threading.current_thread() is threading.main_thread():
+            yield
+            return
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            with self._lock:
+                self._thread_profilers.append(profiler)
+
+    def _profile_summary(self) -> dict[str, Any]:
+        assert self._profiler is not None
+        self._profiler.disable()
+        stats = pstats.Stats(self._profiler, stream=io.StringIO())
+        for profiler in self._thread_profilers:
+            stats.add(profiler)
+        stats.dump_stats(PROFILE_FILE)
+
+        cpu = []
+        for (filename, line, func), (_, calls, tottime, cumtime, _) in stats.stats.items():  # type: ignore[attr-defined]
+            cpu.append({
+                "function": f"{os.path.basename(filename)}:{line}({func})",
+                "calls": calls,
+                "tottime": round(tottime, 4),
+                "cumtime": round(cumtime, 4),
+            })
+        cpu.sort(key=lambda item: item["cumtime"], reverse=True)
+
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        memory = [
+            {"location": str(stat.traceback[0]), "sizeKiB": round(stat.size / 1024, 1), "count": stat.count}
+            for stat in snapshot.statistics("lineno")[:PROFILE_TOP]
+        ]
+        return {
+            "file": PROFILE_FILE,
+            "tracedPeakMiB": round(peak / (1024 * 1024), 1),
+            "tracedCurrentMiB": round(current / (1024 * 1024), 1),
+            "cpu": cpu[:PROFILE_TOP],
+            "memory": memory,
+        }
+
+    def to_dict(self, exit_code: int | None = None) -> dict[str, Any]:
+        with self._lock:
+            report: dict[str, Any] = {
+                "startedAt": self.started_at.isoformat(timespec="seconds"),
+                "finishedAt": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "seconds": round(time.perf_counter() - self.started, 3),
+                "exitCode": exit_code,
+                "peakRssMiB": peak_rss_mib(),
+                "spans": sorted(self.spans, key=lambda span: span["start"]),
+                "counts": dict(sorted(self.counts.items())),
+                "details": dict(self.details),
+            }
+        if self._profiler is not None:
+            report["profile"] = self._profile_summary()
+            self._profiler = None
+        return report
+
+    def write(self, path: str = RUN_REPORT_FILE, exit_code: int | None = None) -> str:
+        report = self.to_dict(exit_code)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+        return path
+
+
+# Report of the current process; etl_process records into this one.
+run = RunReport()
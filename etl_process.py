@@ -1,11 +1,21 @@
 import pandas as pd
-import requests
 import json
 import os
-import glob
+import argparse
+import base64
+import hashlib
+import gzip
 import time
 import sys
+import shutil
+import subprocess
+import tempfile
+import threading
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from contextlib import contextmanager
 from datetime import datetime, timezone, timedelta
+from pathlib import Path
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
@@ -13,15 +23,63 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from webdriver_manager.chrome import ChromeDriverManager
 
+try:
+    import brotli # Optional: .br variants of the published artifacts are skipped without it
+except ImportError:
+    brotli = None
+
+import etf_columnar
+import etf_cost_projection
+import etf_search_index
+import etl_cassette
+import etl_http
+import etl_metrics
+import etf_timeseries
+import fund_matcher
+import kofia_archive
+
 # Configuration
-# Replace with your actual GAS Web App URL
-GAS_WEB_APP_URL = "https://script.google.com/macros/s/AKfycbwx4Bee14DASyNTMz5CrYsb4C4TtNldAcWU3ccj1UJaV1uQAF3lYEJQGaAavfXwpVcJ/exec" 
-DOWNLOAD_DIR = os.getcwd() # Current directory for downloads
+# Replace with your actual GAS Web App URL (env override points the ETL at a local stub server)
+GAS_WEB_APP_URL = os.environ.get('GAS_WEB_APP_URL', "https://script.google.com/macros/s/AKfycbwx4Bee14DASyNTMz5CrYsb4C4TtNldAcWU3ccj1UJaV1uQAF3lYEJQGaAavfXwpVcJ/exec")
+KOFIA_DOWNLOAD_PREFIX = "kofia_download_" # Each Selenium run downloads into its own temp dir
 UPDATE_META_FILE = "update-meta.json"
 
-def setup_driver():
+KOFIA_PAGE_URL = "https://dis.kofia.or.kr/websquare/index.jsp?w2xPath=/wq/fundann/DISFundFeeCMS.xml&divisionId=MDIS01005001000000&serviceId=SDIS01005001000"
+# XML service the DISFundFeeCMS.xml page posts its search to. Overridable so a local
+# stand-in server with recorded responses can be used instead of KOFIA.
+KOFIA_API_URL = os.environ.get('KOFIA_API_URL', "https://dis.kofia.or.kr/proframeWeb/XMLSERVICES/")
+# 'auto' = HTTP first, Selenium as fallback / 'http' = HTTP only / 'selenium' = browser only
+KOFIA_FETCH_MODE = os.environ.get('KOFIA_FETCH_MODE', 'auto').strip().lower()
+# Content-addressed cache of processed fee records, keyed by KOFIA data + managed list hashes
+SNAPSHOT_CACHE_DIR = os.path.join(".etl_cache", "snapshots")
+SNAPSHOT_CACHE_VERSION = 4 # Bump when matching/fee logic changes so old snapshots are not reused
+SNAPSHOT_CACHE_MAX_ENTRIES = 30
+SNAPSHOT_CACHE_MAX_AGE_DAYS = 90
+# Per-category, pre-sorted artifacts for static hosting (content-hashed + .gz/.br)
+PUBLISH_DIR = "data"
+PUBLISH_INDEX_FILE = "index.json"
+PUBLISH_UNIVERSE_FILE = "universe.json" # Fees of every KOFIA-listed fund, managed or not
+PUBLISH_PROJECTION_FILE = etf_cost_projection.PROJECTION_FILE # Holding-cost grid per published ETF
+UNIVERSE_FIELDS = ['종목코드', '표준코드', '펀드명', '구분', '종목명', '총보수', '기타비용', '매매중개수수료', 'TER', '실부담비용']
+# WebSquare DOM hooks used by the Selenium waits (loading overlay / result grid body rows)
+KOFIA_LOADING_SELECTOR = "[id^='___processbar'], .w2processbar, .w2modal"
+KOFIA_GRID_ROW_SELECTOR = "[id$='_body_tbody'] tr"
+# Active etl_cassette.Cassette when run with --record/--replay (None for normal runs)
+cassette = None
+# Last result set GAS acknowledged (rows keyed by 종목코드 + sheet revision); deltas are computed against it
+GAS_UPLOAD_STATE_FILE = os.path.join(".etl_cache", "gas_upload.json")
+GAS_UPLOAD_BATCH_ROWS = 200 # Upserts + deletes per POST
+GAS_UPLOAD_WAIT_SECONDS = 600
+# Last good managed list from GAS. Within the TTL it is used without any request; after
+# that a cheap version check decides whether the full list is fetched again. When GAS
+# fails, a cached list up to MAX_STALE old is used instead of failing the run.
+MANAGED_CACHE_FILE = os.path.join(".etl_cache", "managed_items.json")
+MANAGED_CACHE_TTL_HOURS = float(os.environ.get('MANAGED_CACHE_TTL_HOURS', '6'))
+MANAGED_CACHE_MAX_STALE_DAYS = float(os.environ.get('MANAGED_CACHE_MAX_STALE_DAYS', '14'))
+
+def setup_driver(download_dir):
     """
-    Sets up the Chrome WebDriver with options for downloading files.
+    Sets up the Chrome WebDriver with options for downloading files into `download_dir`.
     """
     options = webdriver.ChromeOptions()
     
@@ -37,7 +95,7 @@ def setup_driver():
     options.add_argument("--disable-dev-shm-usage")
     
     prefs = {
-        "download.default_directory": DOWNLOAD_DIR,
+        "download.default_directory": download_dir,
         "download.prompt_for_download": False,
         "download.directory_upgrade": True,
         "safebrowsing.enabled": True
@@ -46,24 +104,120 @@ def setup_driver():
     
     service = Service(ChromeDriverManager().install())
     driver = webdriver.Chrome(service=service, options=options)
+
+    # Headless Chrome ignores the download prefs unless downloads are allowed explicitly.
+    try:
+        driver.execute_cdp_cmd("Page.setDownloadBehavior", {"behavior": "allow", "downloadPath": download_dir})
+    except Exception as e:
+        print(f"Could not set download behavior via CDP: {e}")
     return driver
 
+@contextmanager
+def timed_phase(name):
+    """
+    Records one ETL phase (wall time, peak RSS) in the run report and prints it,
+    e.g. '[timing] page load: 2.41s (peak RSS 180.2 MiB)'.
+    """
+    with etl_metrics.run.span(name):
+        yield
+
+def is_kofia_loading(driver):
+    """
+    True while the WebSquare loading overlay (process bar / modal) is visible.
+    """
+    for overlay in driver.find_elements(By.CSS_SELECTOR, KOFIA_LOADING_SELECTOR):
+        try:
+            if overlay.is_displayed():
+                return True
+        except Exception:
+            continue  # overlay removed from DOM while checking
+    return False
+
+def kofia_grid_row_count(driver):
+    return len(driver.find_elements(By.CSS_SELECTOR, KOFIA_GRID_ROW_SELECTOR))
+
+def wait_for_kofia_idle(driver, timeout=30):
+    """
+    Waits until the page has finished loading and no WebSquare overlay is shown.
+    """
+    WebDriverWait(driver, timeout, poll_frequency=0.2).until(
+        lambda d: d.execute_script("return document.readyState") == "complete" and not is_kofia_loading(d)
+    )
+
+def wait_for_kofia_grid(driver, timeout=60, settle=1.0):
+    """
+    Waits until the result grid has rendered: overlay gone and a non-zero row
+    count that stays unchanged for `settle` seconds. Returns the row count.
+    """
+    state = {'count': -1, 'since': time.perf_counter()}
+
+    def grid_ready(d):
+        if is_kofia_loading(d):
+            state['count'] = -1
+            return False
+        count = kofia_grid_row_count(d)
+        now = time.perf_counter()
+        if count != state['count']:
+            state['count'], state['since'] = count, now
+            return False
+        return count > 0 and now - state['since'] >= settle
+
+    WebDriverWait(driver, timeout, poll_frequency=0.25).until(grid_ready)
+    return state['count']
+
+def wait_for_download(download_dir, timeout=60, settle=0.5):
+    """
+    Waits for a finished Excel download in `download_dir`.
+    Complete = no '.crdownload'/'.tmp' partial file left and the file size
+    stayed the same for `settle` seconds. Returns the path or None on timeout.
+    """
+    end_time = time.time() + timeout
+    last_size = {}
+    while time.time() < end_time:
+        names = os.listdir(download_dir)
+        if not any(n.endswith(('.crdownload', '.tmp')) for n in names):
+            files = [os.path.join(download_dir, n) for n in names if n.lower().endswith(('.xls', '.xlsx'))]
+            for path in files:
+                size = os.path.getsize(path)
+                if size > 0 and last_size.get(path) == size:
+                    return path
+                last_size[path] = size
+        time.sleep(settle)
+    return None
+
+def remove_download(file_path):
+    """
+    Deletes a downloaded Excel file and its dedicated temp directory.
+    """
+    if file_path and os.path.exists(file_path):
+        os.remove(file_path)
+        print(f"Deleted utilized Excel file: {file_path}")
+    parent = os.path.dirname(file_path or '')
+    if os.path.basename(parent).startswith(KOFIA_DOWNLOAD_PREFIX):
+        shutil.rmtree(parent, ignore_errors=True)
+
 def download_kofia_excel():
     """
     Automates the KOFIA website to download the fund fee comparison Excel.
     Uses '상장지수' search to ensure all ETFs are retrieved.
+    Waits on page/grid/download conditions instead of fixed sleeps; the file is
+    downloaded into a fresh temp directory so stale files can't be picked up.
     """
-    driver = setup_driver()
+    download_dir = tempfile.mkdtemp(prefix=KOFIA_DOWNLOAD_PREFIX)
+    downloaded = None
+
+    with timed_phase("browser start"):
+        driver = setup_driver(download_dir)
     try:
         print("Opening KOFIA website...")
-        driver.get("https://dis.kofia.or.kr/websquare/index.jsp?w2xPath=/wq/fundann/DISFundFeeCMS.xml&divisionId=MDIS01005001000000&serviceId=SDIS01005001000")
-        
-        wait = WebDriverWait(driver, 30)
-        
-        # 1. Wait for page load
-        print("Waiting for page load...")
-        search_btn = wait.until(EC.element_to_be_clickable((By.ID, "btnSear")))
-        time.sleep(5)
+        with timed_phase("page load"):
+            driver.get(KOFIA_PAGE_URL)
+            wait = WebDriverWait(driver, 30)
+
+            # 1. Wait for page load
+            print("Waiting for page load...")
+            search_btn = wait.until(EC.element_to_be_clickable((By.ID, "btnSear")))
+            wait_for_kofia_idle(driver)
         
         # 2. Enter '상장지수' in Fund Name (펀드명)
         # This bypasses the complex checkbox selectors and filters by name directly.
@@ -72,8 +226,8 @@ def download_kofia_excel():
              fund_nm_input = wait.until(EC.visibility_of_element_located((By.ID, "fundNm")))
              fund_nm_input.clear()
              fund_nm_input.send_keys("상장지수")
+             wait.until(EC.text_to_be_present_in_element_value((By.ID, "fundNm"), "상장지수"))
              print("Entered '상장지수'")
-             time.sleep(1)
         except Exception as e:
              print(f"Error entering fund name: {e}")
              return None
@@ -83,8 +237,10 @@ def download_kofia_excel():
         driver.execute_script("arguments[0].click();", search_btn)
         
         # 4. Wait for Grid/Table (Loading)
-        print("Waiting for data to load (20s)...")
-        time.sleep(20) 
+        print("Waiting for grid to render...")
+        with timed_phase("search"):
+            rows = wait_for_kofia_grid(driver)
+        print(f"Grid rendered with {rows} rows.")
         
         # 5. Looking for Excel Download button
         print("Looking for Excel Download button...")
@@ -102,22 +258,14 @@ def download_kofia_excel():
         
         # 6. Wait for download
         print("Waiting for file download...")
-        timeout = 60
-        end_time = time.time() + timeout
-        while time.time() < end_time:
-            files = glob.glob(os.path.join(DOWNLOAD_DIR, "*.xls")) + glob.glob(os.path.join(DOWNLOAD_DIR, "*.xlsx"))
-            if files:
-                latest_file = max(files, key=os.path.getmtime)
-                # Check modified time < 1 min ago
-                if time.time() - os.path.getmtime(latest_file) < 60:
-                    # Check not incomplete
-                    if os.path.getsize(latest_file) > 0 and not latest_file.endswith('.crdownload'):
-                        print(f"Downloaded: {latest_file}")
-                        return latest_file
-            time.sleep(1)
-            
-        print("Download timed out.")
-        return None
+        with timed_phase("download"):
+            downloaded = wait_for_download(download_dir)
+
+        if downloaded:
+            print(f"Downloaded: {downloaded}")
+        else:
+            print("Download timed out.")
+        return downloaded
 
     except Exception as e:
         print(f"Selenium Error: {e}")
@@ -130,24 +278,194 @@ def download_kofia_excel():
         return None
     finally:
         driver.quit()
+        if not downloaded:
+            shutil.rmtree(download_dir, ignore_errors=True)
+
+# Service/DTO names and field tags of the DISFundFeeCMS.xml search, as recorded from the
+# page's XMLSERVICES traffic. Field tags map to the column names of the Excel export so
+# the result feeds process_data unchanged. Update here if KOFIA renames the grid bindings.
+KOFIA_FEE_APP_NAME = "FS-DIS2"
+KOFIA_FEE_SERVICE = "DISFundFeeCMSSO"
+KOFIA_FEE_FUNCTION = "select"
+KOFIA_FEE_COND_DTO = "DISCondFuncDTO"
+KOFIA_FEE_FIELDS = {
+    'standardCd': '표준코드',
+    'fundNm': '펀드명',
+    'fundFeeSum': '합계(A)',
+    'etcCost': '기타비용(B)',
+    'tradeFeeRt': '매매·중개수수료율(C)',
+}
+
+def build_kofia_fee_request(fund_name="상장지수", base_date=None):
+    """
+    Builds the XML body the KOFIA fund-fee page sends when '조회' is clicked.
+    """
+    base_date = base_date or datetime.now(timezone(timedelta(hours=9))).strftime("%Y%m%d")
+
+    message = ET.Element('message')
+    header = ET.SubElement(message, 'proframeHeader')
+    ET.SubElement(header, 'pfmAppName').text = KOFIA_FEE_APP_NAME
+    ET.SubElement(header, 'pfmSvcName').text = KOFIA_FEE_SERVICE
+    ET.SubElement(header, 'pfmFnName').text = KOFIA_FEE_FUNCTION
+    ET.SubElement(message, 'systemHeader')
+    cond = ET.SubElement(message, KOFIA_FEE_COND_DTO)
+    ET.SubElement(cond, 'standardDt').text = base_date
+    ET.SubElement(cond, 'fundNm').text = fund_name
+
+    return b'<?xml version="1.0" encoding="utf-8"?>' + ET.tostring(message, encoding='utf-8')
+
+def parse_kofia_fee_response(content):
+    """
+    Parses the XMLSERVICES response into the DataFrame shape load_kofia_table returns.
+    Any element carrying the 표준코드 field tag is treated as one grid row.
+    """
+    root = ET.fromstring(content)
+    std_tag = next(tag for tag, col in KOFIA_FEE_FIELDS.items() if col == '표준코드')
+
+    data = {col: [] for col in KOFIA_FEE_FIELDS.values()}
+    for elem in root.iter():
+        if elem.find(std_tag) is None:
+            continue
+        for tag, col in KOFIA_FEE_FIELDS.items():
+            child = elem.find(tag)
+            text = child.text if child is not None else None
+            data[col].append(text.strip() if text else None)
+
+    columns = resolve_kofia_columns(list(data))
+    fee_columns = {columns['total'], columns['other'], columns['sell']}
+    return pd.DataFrame({
+        col: to_fee_series(values) if col in fee_columns else pd.Series([v or '' for v in values], dtype=object)
+        for col, values in data.items()
+    })
+
+def fetch_kofia_fee_table(fund_name="상장지수"):
+    """
+    Browserless KOFIA fetch: replays the WebSquare data request of DISFundFeeCMS.xml
+    over plain HTTP and returns the fee table as a DataFrame (None on failure).
+    """
+    print(f"Requesting KOFIA fee data over HTTP: {KOFIA_API_URL}")
+    try:
+        with timed_phase("kofia http fetch"):
+            resp = etl_http.client.post(
+                'kofia',
+                KOFIA_API_URL,
+                data=build_kofia_fee_request(fund_name),
+                headers={
+                    'Content-Type': 'application/xml; charset=utf-8',
+                    'Referer': KOFIA_PAGE_URL,
+                },
+            )
+            resp.raise_for_status()
+        if cassette is not None and cassette.recording:
+            cassette.record_kofia_xml(resp.content)
+        with timed_phase("parse"):
+            df = parse_kofia_fee_response(resp.content)
+    except Exception as e:
+        print(f"KOFIA HTTP fetch failed: {e}")
+        return None
+
+    if df.empty:
+        print("KOFIA HTTP fetch returned no rows.")
+        return None
+
+    print(f"KOFIA HTTP fetch returned {len(df)} rows.")
+    return df
+
+def load_managed_cache():
+    try:
+        with open(MANAGED_CACHE_FILE, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(cache.get('items'), list) or not cache['items']:
+        return None
+    return cache
+
+def save_managed_cache(items, version, fetched_at=None):
+    os.makedirs(os.path.dirname(MANAGED_CACHE_FILE), exist_ok=True)
+    cache = {
+        'fetchedAt': fetched_at if fetched_at is not None else time.time(),
+        'version': version,
+        'hash': managed_items_digest(pd.DataFrame(items)),
+        'items': items,
+    }
+    tmp_path = f"{MANAGED_CACHE_FILE}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, ensure_ascii=False)
+    os.replace(tmp_path, MANAGED_CACHE_FILE)
+    return cache
+
+def fetch_managed_items_version():
+    """
+    Cheap revalidation: GAS `getItemsVersion` returns a digest of the 종목관리 sheet.
+    Returns None when the deployed script does not support it.
+    """
+    response = etl_http.client.get('gas', GAS_WEB_APP_URL, params={'action': 'getItemsVersion'})
+    response.raise_for_status()
+    try:
+        data = response.json()
+    except ValueError:
+        return None
+    return data.get('version') if isinstance(data, dict) else None
+
+def fetch_managed_items_from_gas():
+    response = etl_http.client.get('gas', GAS_WEB_APP_URL, params={'action': 'getItems'}, conditional=True)
+    response.raise_for_status()
+    data = response.json()
+    if not isinstance(data, list):
+        raise RuntimeError(f"Unexpected GAS getItems response: {str(data)[:200]}")
+    if not data:
+        raise RuntimeError("GAS getItems returned an empty list")
+    return data
 
 def fetch_managed_items():
     """
-    Fetches the list of items to manage from Google Sheets via GAS.
+    Managed items for this run: from the cassette when replaying, otherwise from
+    GAS (recorded into the cassette when recording).
+    """
+    if cassette is not None and cassette.replaying:
+        return pd.DataFrame(cassette.load_json(etl_cassette.GAS_ITEMS_FILE))
+
+    managed_df = fetch_managed_items_live()
+    if cassette is not None and cassette.recording:
+        cassette.record_json(etl_cassette.GAS_ITEMS_FILE, managed_df.to_dict('records'))
+    return managed_df
+
+def fetch_managed_items_live():
+    """
+    Fetches the list of items to manage from Google Sheets via GAS, through the
+    local cache (TTL -> version check -> full fetch). On a GAS error the cached
+    list is used while it is younger than MANAGED_CACHE_MAX_STALE_DAYS; without
+    one the error is raised. Mock items are only used when no GAS URL is configured.
     """
     print(f"Fetching managed items from: {GAS_WEB_APP_URL}")
     if "YOUR_GAS_WEB_APP_URL" in GAS_WEB_APP_URL:
         print("Warning: GAS Checklist - URL not set. Using mock.")
         return get_mock_managed_items()
 
+    cache = load_managed_cache()
+    age_hours = (time.time() - cache['fetchedAt']) / 3600 if cache else None
+    if cache and age_hours < MANAGED_CACHE_TTL_HOURS:
+        print(f"Managed items: cache is fresh ({age_hours:.1f}h old), skipping GAS.")
+        return pd.DataFrame(cache['items'])
+
     try:
-        response = requests.get(GAS_WEB_APP_URL, params={'action': 'getItems'})
-        response.raise_for_status()
-        data = response.json()
-        return pd.DataFrame(data)
+        version = fetch_managed_items_version()
+        if cache and version and version == cache.get('version'):
+            save_managed_cache(cache['items'], version)
+            print(f"Managed items: sheet unchanged (version {version[:12]}), using cache.")
+            return pd.DataFrame(cache['items'])
+
+        items = fetch_managed_items_from_gas()
     except Exception as e:
-        print(f"Error fetching items from GAS: {e}")
-        return get_mock_managed_items()
+        if cache and age_hours < MANAGED_CACHE_MAX_STALE_DAYS * 24:
+            print(f"Warning: error fetching items from GAS ({e}); using cached list from {age_hours:.1f}h ago.")
+            return pd.DataFrame(cache['items'])
+        raise RuntimeError(f"Error fetching items from GAS: {e}") from e
+
+    cache = save_managed_cache(items, version)
+    print(f"Managed items: fetched {len(items)} items from GAS (hash {cache['hash'][:12]}).")
+    return pd.DataFrame(items)
 
 def get_mock_managed_items():
     # Try to load from list.txt if it exists for better testing
@@ -170,137 +488,461 @@ def get_mock_managed_items():
         {'구분': '국내주식형', '종목코드': '133690', '종목명': 'TIGER 미국나스닥100', '표준코드': 'KR7133690008', '펀드명': '미래에셋 TIGER 미국나스닥100증권상장지수투자신탁(주식)'},
     ])
 
-def process_data(managed_df, file_path):
+HEADER_SCAN_ROWS = 10
+
+def clean_header(value):
+    """
+    Normalizes a KOFIA header cell: removes newlines/returns and surrounding spaces.
+    """
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return ''
+    return str(value).replace('\n', '').replace('\r', '').strip()
+
+def find_header_row(rows):
+    """
+    Finds the KOFIA detail header row among the first rows of the sheet.
+    KOFIA Excel usually has '합계(A)' or '총보수' in the detailed header row.
+    Returns -1 when no candidate is found.
+    """
+    rows = [[clean_header(v) for v in row] for row in rows[:HEADER_SCAN_ROWS]]
+
+    # Strategy: Look for the specific marker '(A)' which denotes "Total Fee (A)" in KOFIA standard
+    for i, row in enumerate(rows):
+        if any('(A)' in s for s in row) and any('합계' in s for s in row):
+            print(f"Header candidates found at row {i} due to '합계(A)'")
+            return i
+
+    # Fallback Strategies
+    for i, row in enumerate(rows):
+        if any('매매' in s and '수수료' in s for s in row):
+            return i
+
+    return -1
+
+def _iter_xlsx_rows(file_path):
+    """
+    Streams .xlsx rows as value tuples (openpyxl read-only mode).
+    """
+    from openpyxl import load_workbook
+
+    wb = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        for row in wb.worksheets[0].iter_rows(values_only=True):
+            yield row
+    finally:
+        wb.close()
+
+def _read_kofia_columns_xlsx(file_path):
+    rows = _iter_xlsx_rows(file_path)
+    head = []
+    for row in rows:
+        head.append(row)
+        if len(head) >= HEADER_SCAN_ROWS:
+            break
+
+    header_idx = find_header_row(head)
+    if header_idx == -1:
+        print("Warning: Could not identify header row. Using default 0.")
+        header_idx = 0
+
+    header = [clean_header(v) for v in head[header_idx]]
+    wanted = _wanted_column_positions(header)
+    data = {name: [] for name in wanted}
+
+    def collect(row):
+        for name, pos in wanted.items():
+            data[name].append(row[pos] if pos < len(row) else None)
+
+    for row in head[header_idx + 1:]:
+        collect(row)
+    for row in rows:
+        collect(row)
+    return header_idx, data
+
+def _read_kofia_columns_xls(file_path):
+    import xlrd
+
+    book = xlrd.open_workbook(file_path, on_demand=True)
+    try:
+        sheet = book.sheet_by_index(0)
+        head = [sheet.row_values(i) for i in range(min(HEADER_SCAN_ROWS, sheet.nrows))]
+
+        header_idx = find_header_row(head)
+        if header_idx == -1:
+            print("Warning: Could not identify header row. Using default 0.")
+            header_idx = 0
+
+        header = [clean_header(v) for v in head[header_idx]] if head else []
+        wanted = _wanted_column_positions(header)
+        data = {
+            name: [v if v != '' else None for v in sheet.col_values(pos, start_rowx=header_idx + 1)]
+            for name, pos in wanted.items()
+        }
+        return header_idx, data
+    finally:
+        book.release_resources()
+
+def _wanted_column_positions(header):
+    """
+    Maps the resolved KOFIA column names to their position in the header row.
+    Only these columns are materialized.
+    """
+    columns = resolve_kofia_columns([h for h in header if h])
+    positions = {}
+    for col in columns.values():
+        if col and col not in positions:
+            positions[col] = header.index(col)
+    return positions
+
+def to_fee_series(values):
+    """
+    Coerces a whole fee column to float64 in one pass ('1,234' / '0.5%' handled).
+    Blank and non-numeric cells ('-') become 0.0.
+    """
+    s = pd.Series(values, dtype=object)
+    cleaned = s.astype(str).str.replace(',', '', regex=False).str.replace('%', '', regex=False).str.strip()
+    numeric = pd.to_numeric(cleaned.where(s.notna(), None), errors='coerce')
+    return numeric.fillna(0.0).astype('float64')
+
+def load_kofia_table(file_path):
+    """
+    Single-pass, column-pruned KOFIA Excel loader.
+    Finds the header row while streaming the first rows, then materializes only
+    표준코드, 펀드명, 합계(A)/총보수, 기타비용 and 매매·중개수수료.
+    Fee columns are float64; code/name columns are strings.
+    .xlsx is streamed with openpyxl (read-only), .xls is read with xlrd.
+    """
+    ext = os.path.splitext(file_path)[1].lower()
+    try:
+        if ext == '.xlsx':
+            header_idx, data = _read_kofia_columns_xlsx(file_path)
+        else:
+            header_idx, data = _read_kofia_columns_xls(file_path)
+    except Exception as e:
+        # KOFIA has served mislabeled files before; let pandas sniff the format instead.
+        print(f"Direct Excel read failed ({e}). Falling back to pandas.read_excel")
+        df_raw = pd.read_excel(file_path, header=None, dtype=object)
+        head = [[None if pd.isna(v) else v for v in row] for row in df_raw.head(HEADER_SCAN_ROWS).values.tolist()]
+        header_idx = max(find_header_row(head), 0)
+        header = [clean_header(v) for v in df_raw.iloc[header_idx].tolist()] if len(df_raw) else []
+        wanted = _wanted_column_positions(header)
+        body = df_raw.iloc[header_idx + 1:]
+        data = {name: body.iloc[:, pos].tolist() for name, pos in wanted.items()}
+
+    print(f"Using Header Row Index: {header_idx}")
+
+    columns = resolve_kofia_columns(list(data))
+    fee_columns = {columns['total'], columns['other'], columns['sell']} - {None}
+    frame = {}
+    for name, values in data.items():
+        if name in fee_columns:
+            frame[name] = to_fee_series(values)
+        else:
+            frame[name] = pd.Series(
+                ['' if v is None or (isinstance(v, float) and pd.isna(v)) else str(v).strip() for v in values],
+                dtype=object,
+            )
+    return pd.DataFrame(frame)
+
+def process_data(managed_df, file_path, report=None):
     """
     Loads Excel and calculates fees.
     Matching logic: Prioritize '표준코드' (Standard Code) for exact match.
+    `file_path` may also be an already-loaded KOFIA DataFrame (HTTP fetch or load_kofia_table).
+    If a dict is passed as `report`, it is filled with the match report.
     """
-    if not file_path or not os.path.exists(file_path):
+    if isinstance(file_path, pd.DataFrame):
+        df_source = file_path
+    elif not file_path or not os.path.exists(file_path):
         return []
-    
-    print(f"Processing {file_path}...")
+    else:
+        df_source = None
+
+    print(f"Processing {'loaded KOFIA table' if df_source is not None else file_path}...")
     try:
-        # Load Excel - First read without header to find the correct row
-        df_raw = pd.read_excel(file_path, header=None)
-        
-        # Find header row by looking for specific fee/cost columns
-        # KOFIA Excel usually has '합계(A)' or '총보수' in the detailed header row
-        header_idx = -1
-        
-        # Strategy: Look for the specific marker '(A)' which denotes "Total Fee (A)" in KOFIA standard
-        for i, row in df_raw.head(10).iterrows(): # Check first 10 rows
-            row_str = row.astype(str).values
-            if any('(A)' in s for s in row_str) and any('합계' in s for s in row_str):
-                header_idx = i
-                print(f"Header candidates found at row {i} due to '합계(A)'")
-                break
-        
-        # Fallback Strategies
-        if header_idx == -1:
-             for i, row in df_raw.head(10).iterrows():
-                row_str = row.astype(str).values
-                if any('매매' in s and '수수료' in s for s in row_str):
-                    header_idx = i
-                    break
+        df = df_source if df_source is not None else load_kofia_table(file_path)
 
-        if header_idx == -1:
-             print("Warning: Could not identify header row. Using default 0.")
-             header_idx = 0
-             
-        print(f"Using Header Row Index: {header_idx}")
-        df = pd.read_excel(file_path, header=header_idx)
-    
-        # Clean naming: remove newlines, spaces, returns
-        df.columns = df.columns.astype(str).str.replace('\n', '').str.replace('\r', '').str.strip()
-        print(f"Columns found: {df.columns.tolist()}")
-        print(f"Excel Data Row Count: {len(df)}")
-        print("First 3 rows of Excel Data:")
-        print(df.head(3))
-
-        # Debug: Check for specific columns
-        c_code_std = next((c for c in df.columns if '표준코드' in c), None)
-        c_total = next((c for c in df.columns if '합계' in c and '(A)' in c), 'MISSING')
-        c_other = next((c for c in df.columns if '기타' in c and '비용' in c), 'MISSING')
-        c_sell = next((c for c in df.columns if '매매' in c and '수수료' in c), 'MISSING')
-        print(f"Mapped Columns -> StdCode: '{c_code_std}', Total: '{c_total}', Other: '{c_other}', Sell: '{c_sell}'")
-
-        results = []
-        
-        print("\nMatching items...")
-        print(f"Managed Items Count: {len(managed_df)}")
-        if not managed_df.empty:
-            print("First managed field:", managed_df.iloc[0].to_dict())
-        
-        for _, item in managed_df.iterrows():
-            target_code = str(item.get('종목코드', '')).strip()
-            target_name = item.get('종목명', '').strip()
-            target_std_code = str(item.get('표준코드', '')).strip() # New: Standard Code from Sheet
-            
-            match = pd.DataFrame()
-            matched_by = "None"
-            
-            # --- Matching Logic ---
-            # 1. Standard Code Exact Matching (Strict)
-            if target_std_code and c_code_std:
-                 match = df[df[c_code_std].astype(str).str.strip() == target_std_code]
-                 if not match.empty:
-                     matched_by = "Standard Code (Exact)"
-
-            if match.empty:
-                print(f"[MISSING] {target_name} (Std: {target_std_code}) - Not found in KOFIA data")
-                continue
-            
-            # Since we match by unique standard code, we expect exactly 1 match (or 0).
-            # If KOFIA has duplicates for the same standard code (unlikely), take the first one.
-            row = match.iloc[0]
-            print(f"[MATCHED] {target_name} -> {row['펀드명']} (by {matched_by})")
-            
-            # --- Robust Fee Calculation ---
-            def p_float(v):
-                try: 
-                    return float(str(v).replace(',', '').replace('%',''))
-                except: 
-                    return 0.0
-
-            # Dynamic Column Findings
-            col_total = next((c for c in df.columns if '합계' in c and '(A)' in c), None) # 합계(A)
-            if not col_total: col_total = next((c for c in df.columns if '총보수' in c), None) # Fallback
-            
-            col_other = next((c for c in df.columns if '기타' in c and '비용' in c), None) # 기타비용(B)
-            
-            col_sell = next((c for c in df.columns if '매매' in c and '수수료' in c), None) # 매매·중개수수료율(D)
-            
-            # Extract Values
-            total = p_float(row.get(col_total, 0)) if col_total else 0
-            other = p_float(row.get(col_other, 0)) if col_other else 0
-            sell = p_float(row.get(col_sell, 0)) if col_sell else 0
-            
-            # TER = 총보수 + 기타비용
-            ter = total + other
-            
-            # Final Real Cost
-            real_cost = ter + sell
-            
-            # Debug: Print values for verification
-            print(f"   Values -> Total: {total} (from {col_total}), Other: {other}, Sell: {sell}, Real: {real_cost}")
-
-            results.append({
-                '구분': item['구분'],
-                '종목코드': target_code,
-                '종목명': target_name,
-                '총보수': total,
-                '기타비용': other,
-                '매매중개수수료': sell,
-                '실부담비용': round(real_cost, 4)
-            })
-            
-        print(f"Processed {len(results)} items.")
+        columns = resolve_kofia_columns(df.columns)
+        print(f"Mapped Columns -> StdCode: '{columns['std_code']}', Total: '{columns['total']}', Other: '{columns['other']}', Sell: '{columns['sell']}'")
+
+        with timed_phase("match"):
+            results, match_report = match_managed_items(managed_df, df, columns)
+        if report is not None:
+            report.update(match_report)
         return results
         
     except Exception as e:
         print(f"Error processing Excel: {e}")
         return []
 
+def resolve_kofia_columns(columns):
+    """
+    Resolves the KOFIA column names used for matching and fee calculation.
+    Called once per sheet instead of once per managed item.
+    """
+    col_total = next((c for c in columns if '합계' in c and '(A)' in c), None) # 합계(A)
+    if not col_total: col_total = next((c for c in columns if '총보수' in c), None) # Fallback
+
+    return {
+        'std_code': next((c for c in columns if '표준코드' in c), None),
+        'fund_name': next((c for c in columns if '펀드명' in c), None),
+        'total': col_total,
+        'other': next((c for c in columns if '기타' in c and '비용' in c), None), # 기타비용(B)
+        'sell': next((c for c in columns if '매매' in c and '수수료' in c), None), # 매매·중개수수료율(D)
+    }
+
+def kofia_fee_frame(df, columns=None):
+    """
+    Normalizes a loaded KOFIA table to 표준코드, 펀드명, 총보수, 기타비용, 매매중개수수료
+    (the data.json fee names), fee columns as float64.
+    """
+    columns = columns or resolve_kofia_columns(df.columns)
+
+    def text(col):
+        return df[col].fillna('').astype(str).str.strip() if col else pd.Series('', index=df.index, dtype=object)
+
+    def fee(col):
+        if not col:
+            return pd.Series(0.0, index=df.index)
+        if pd.api.types.is_float_dtype(df[col]): # load_kofia_table / the HTTP fetch already coerced it
+            return df[col].fillna(0.0)
+        return to_fee_series(df[col].tolist()).set_axis(df.index)
+
+    return pd.DataFrame({
+        '표준코드': text(columns['std_code']),
+        '펀드명': text(columns['fund_name']),
+        '총보수': fee(columns['total']),
+        '기타비용': fee(columns['other']),
+        '매매중개수수료': fee(columns['sell']),
+    })
+
+def kst_today():
+    if cassette is not None and cassette.replaying:
+        return cassette.run_date
+    return datetime.now(timezone(timedelta(hours=9))).strftime("%Y-%m-%d")
+
+def archive_kofia_table(df, source_digest):
+    """
+    Archives the run's parsed KOFIA table as today's Parquet partition.
+    Archiving is best-effort: failures are reported but never stop the ETL.
+    """
+    run_date = kst_today()
+    try:
+        if df is None:
+            if kofia_archive.reuse_latest_snapshot(run_date, source_digest):
+                print(f"Archived KOFIA table for {run_date} (unchanged, reused latest partition)")
+            return
+        path = kofia_archive.write_snapshot(kofia_fee_frame(df), run_date, source_digest)
+        print(f"Archived KOFIA table for {run_date}: {path} ({len(df)} rows)")
+    except Exception as e:
+        print(f"Skipping KOFIA archive: {e}")
+
+def compute_universe_fees(df, columns=None):
+    """
+    Fees for every row of a loaded KOFIA table in one vectorized pass:
+    표준코드, 종목코드 (the short code inside a KR7 표준코드, '' otherwise), 펀드명,
+    총보수, 기타비용, 매매중개수수료, TER = 총보수 + 기타비용 and 실부담비용 = TER + 매매중개수수료.
+    Rows are in sheet order; blank and duplicate 표준코드 are kept.
+    """
+    universe = kofia_fee_frame(df, columns)
+    short_codes = [code[3:9] if len(code) == 12 and code.startswith('KR7') else '' for code in universe['표준코드'].tolist()]
+    universe.insert(1, '종목코드', short_codes)
+    universe['TER'] = universe['총보수'] + universe['기타비용']
+    # Python round() on each value, as the per-item loop did: Series.round rounds some
+    # half-way doubles the other way and would show up as 실부담비용 changes.
+    real_cost = (universe['TER'] + universe['매매중개수수료']).tolist()
+    universe['실부담비용'] = pd.Series([round(value, 4) for value in real_cost], index=universe.index, dtype='float64')
+    return universe
+
+def unique_std_codes(universe):
+    """
+    Drops blank 표준코드 and keeps the first row of each code.
+    Returns (frame indexed by 표준코드, duplicate_count).
+    """
+    coded = universe[(universe['표준코드'] != '') & (universe['표준코드'] != 'nan')]
+    duplicated = coded['표준코드'].duplicated()
+    return coded[~duplicated].set_index('표준코드'), int(duplicated.sum())
+
+def item_text(item, key):
+    value = item.get(key)
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return ''
+    return str(value).strip()
+
+def resolve_unmatched_items(items, positions, universe):
+    """
+    Second-tier matching for managed items whose 표준코드 is not in the KOFIA data:
+    the KR7 code derived from 종목코드 first, then the most similar 펀드명 (or 종목명)
+    through a trigram index that is built only when some item needs it.
+    Returns {item position: {'표준코드', '펀드명', 'tier', 'confidence'}}; an item
+    whose best name candidate is too weak or ambiguous has tier None.
+    """
+    resolved = {}
+    name_index = None
+    for i in positions:
+        item = items[i]
+        kr7_code = fund_matcher.kr7_std_code(item_text(item, '종목코드'))
+        if kr7_code and kr7_code in universe.index:
+            resolved[i] = {'표준코드': kr7_code, '펀드명': universe.at[kr7_code, '펀드명'], 'tier': 'kr7_code', 'confidence': 1.0}
+            continue
+
+        query = item_text(item, '펀드명') or item_text(item, '종목명')
+        if not query:
+            continue
+        if name_index is None:
+            name_index = fund_matcher.FundNameIndex(universe['펀드명'].tolist())
+        pos, confidence, candidate = name_index.best_match(query)
+        if candidate is not None:
+            resolved[i] = {
+                '표준코드': universe.index[candidate[0]],
+                '펀드명': universe['펀드명'].iat[candidate[0]],
+                'tier': 'name' if pos is not None else None,
+                'confidence': confidence,
+            }
+    return resolved
+
+def match_managed_items(managed_df, df, columns):
+    """
+    Labels KOFIA rows with the managed list: fees come from the full-universe
+    computation, and each managed item is looked up by exact 표준코드 in one join.
+    Items with a blank or unknown 표준코드 fall back to resolve_unmatched_items.
+    Returns (results, report).
+    """
+    universe, duplicates = unique_std_codes(compute_universe_fees(df, columns))
+
+    items = managed_df.to_dict('records')
+    std_codes = [item_text(item, '표준코드') for item in items]
+    # If KOFIA has duplicates for the same standard code (unlikely), the first row is used.
+    tiers = ['std_code' if code and code in universe.index else None for code in std_codes]
+    fallback = resolve_unmatched_items(items, [i for i, tier in enumerate(tiers) if tier is None], universe)
+    lookup_codes = list(std_codes)
+    for i, match in fallback.items():
+        if match['tier']:
+            tiers[i] = match['tier']
+            lookup_codes[i] = match['표준코드']
+    fees = universe.reindex(lookup_codes)[['총보수', '기타비용', '매매중개수수료', '실부담비용']]
+
+    results = []
+    missing = []
+    fallback_matches = []
+    for i, (item, tier, (total, other, sell, real_cost)) in enumerate(zip(items, tiers, fees.itertuples(index=False))):
+        target_code = item_text(item, '종목코드')
+        target_name = item_text(item, '종목명')
+        entry = {'종목코드': target_code, '종목명': target_name, '표준코드': std_codes[i]}
+        if tier is None:
+            if i in fallback:
+                entry['candidate'] = {key: fallback[i][key] for key in ('표준코드', '펀드명', 'confidence')}
+            missing.append(entry)
+            continue
+        if tier != 'std_code':
+            fallback_matches.append(dict(entry, matched=fallback[i]['표준코드'], 펀드명=fallback[i]['펀드명'],
+                                         tier=tier, confidence=fallback[i]['confidence']))
+        results.append({
+            '구분': item['구분'],
+            '종목코드': target_code,
+            '종목명': target_name,
+            '총보수': total,
+            '기타비용': other,
+            '매매중개수수료': sell,
+            '실부담비용': real_cost
+        })
+
+    report = {
+        'kofia_rows': len(df),
+        'managed': len(managed_df),
+        'matched': len(results),
+        'missing': missing,
+        'duplicate_std_codes': duplicates,
+        'tiers': {tier: tiers.count(tier) for tier in ('std_code', 'kr7_code', 'name')},
+        'fallback': fallback_matches,
+    }
+    print(f"Match report -> KOFIA rows: {report['kofia_rows']}, managed: {report['managed']}, "
+          f"matched: {report['matched']}, missing: {len(missing)}, duplicate std codes in KOFIA: {duplicates}")
+    if fallback_matches:
+        print(f"Fallback matches -> KR7 code from 종목코드: {report['tiers']['kr7_code']}, name: {report['tiers']['name']}")
+        for m in fallback_matches:
+            print(f"  [{m['tier']} {m['confidence']:.3f}] {m['종목명']} ({m['표준코드'] or 'no 표준코드'}) -> {m['matched']} {m['펀드명']}")
+    if missing:
+        print("Missing in KOFIA data: " + ", ".join(f"{m['종목명']} ({m['표준코드']})" for m in missing))
+
+    for key in ('kofia_rows', 'managed', 'matched', 'duplicate_std_codes'):
+        etl_metrics.run.set_count(key, report[key])
+    etl_metrics.run.set_count('missing', len(missing))
+    for tier in ('kr7_code', 'name'):
+        etl_metrics.run.set_count(f'matched_{tier}', report['tiers'][tier])
+    etl_metrics.run.detail('missing', missing)
+    etl_metrics.run.detail('fallback', fallback_matches)
+    return results, report
+
+NAVER_ETF_URL = os.environ.get('NAVER_ETF_URL', "https://finance.naver.com/api/sise/etfItemList.nhn")
+NAVER_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/120.0.0.0 Safari/537.36"
+    ),
+    "Referer": "https://finance.naver.com/",
+}
+
+def fetch_naver_etf_list():
+    """
+    NAVER Finance ETF 리스트 API를 한 번 호출해 itemcode → item 맵으로 반환.
+    KOFIA 엑셀과 무관하므로 다른 단계와 동시에 실행 가능. 실패 시 None.
+    """
+    try:
+        if cassette is not None and cassette.replaying:
+            data = cassette.load_json(etl_cassette.NAVER_LIST_FILE)
+        else:
+            with timed_phase("market fetch"):
+                resp = etl_http.client.get('naver', NAVER_ETF_URL, headers=NAVER_HEADERS, conditional=True)
+                resp.raise_for_status()
+                data = resp.json()
+            if cassette is not None and cassette.recording:
+                cassette.record_json(etl_cassette.NAVER_LIST_FILE, data)
+        etf_list = data.get("result", {}).get("etfItemList", [])
+
+        # itemcode → {marketSum, quant} 맵 구성
+        return {
+            item["itemcode"]: item
+            for item in etf_list
+            if item.get("itemcode")
+        }
+    except Exception as e:
+        print(f"  NAVER ETF API 오류: {e} → 전체 AUM/거래량 None 처리")
+        return None
+
+def market_data_from_naver(codes, naver_map):
+    """
+    종목코드별 AUM(억원)/거래량을 NAVER ETF 맵에서 추출.
+    비표준 코드, 목록에 없는 코드, 맵이 None(조회 실패)인 경우 None.
+    """
+    result = {}
+    skipped, not_found = [], []
+    for code in codes:
+        code_str = str(code).zfill(6) if str(code).isdigit() else None
+        if code_str is None:
+            skipped.append(code)
+            result[code] = {"AUM": None, "거래량": None}
+            continue
+        if naver_map is None:
+            result[code] = {"AUM": None, "거래량": None}
+            continue
+
+        item = naver_map.get(code_str)
+        if item:
+            aum_eok = item.get("marketSum")  # 이미 억원 단위
+            volume = item.get("quant")
+            result[code] = {"AUM": aum_eok, "거래량": volume}
+        else:
+            not_found.append(code)
+            result[code] = {"AUM": None, "거래량": None}
+
+    if skipped:
+        print(f"  비표준 코드 {len(skipped)}개 → 건너뜀: {', '.join(map(str, skipped))}")
+    if not_found:
+        print(f"  NAVER ETF 목록에 없는 코드 {len(not_found)}개 → AUM=None: {', '.join(map(str, not_found))}")
+    return result
+
 def fetch_market_data_batch(codes):
     """
     NAVER Finance ETF 리스트 API를 이용해 AUM(억원)과 거래량을 일괄 조회.
@@ -311,67 +953,294 @@ def fetch_market_data_batch(codes):
     quant(거래량)를 반환하며, GitHub Actions 환경에서도 정상 동작.
     조회 실패 시 None 반환 (데이터 없이도 ETL 계속 진행).
     """
-    NAVER_ETF_URL = "https://finance.naver.com/api/sise/etfItemList.nhn"
-    headers = {
-        "User-Agent": (
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-            "AppleWebKit/537.36 (KHTML, like Gecko) "
-            "Chrome/120.0.0.0 Safari/537.36"
-        ),
-        "Referer": "https://finance.naver.com/",
-    }
+    if not any(str(c).isdigit() for c in codes):
+        return market_data_from_naver(codes, None)
+    return market_data_from_naver(codes, fetch_naver_etf_list())
+
+def merge_market_data(final_data, naver_map):
+    """
+    Adds AUM/거래량 from the NAVER ETF map to each record (None when unavailable).
+    """
+    codes = [item["종목코드"] for item in final_data]
+    market_data = market_data_from_naver(codes, naver_map)
+    for item in final_data:
+        md = market_data.get(item["종목코드"], {})
+        item["AUM"] = md.get("AUM")
+        item["거래량"] = md.get("거래량")
+    etl_metrics.run.set_count('naver_items', len(naver_map or {}))
+    etl_metrics.run.set_count('market_matched', sum(1 for item in final_data if item["AUM"] is not None))
+    return final_data
 
-    # 초기화: 비표준 코드는 미리 None으로 세팅
-    result = {}
-    for code in codes:
-        if not str(code).isdigit():
-            print(f"  {code}: 비표준 코드 → 건너뜀")
-            result[code] = {"AUM": None, "거래량": None}
 
-    # 표준 코드 집합
-    standard_codes = {str(c).zfill(6) for c in codes if str(c).isdigit()}
-    if not standard_codes:
-        return result
+def write_text_if_changed(path, text):
+    """
+    Writes `text` to `path` only when the content differs. Returns True if written.
+    """
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            if f.read() == text:
+                return False
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    return True
 
+def sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def kofia_source_digest(source):
+    """
+    Content hash of the KOFIA data: workbook bytes for a downloaded file,
+    hashed cell values for a DataFrame from the HTTP fetch.
+    """
+    if isinstance(source, pd.DataFrame):
+        digest = hashlib.sha256(json.dumps(source.columns.tolist(), ensure_ascii=False).encode('utf-8'))
+        digest.update(pd.util.hash_pandas_object(source, index=False).values.tobytes())
+        return digest.hexdigest()
+    return sha256_file(source)
+
+def managed_items_digest(managed_df):
+    records = managed_df.astype(str).to_dict('records')
+    payload = json.dumps(records, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def snapshot_key(kofia_digest, managed_digest):
+    payload = f"v{SNAPSHOT_CACHE_VERSION}:{kofia_digest}:{managed_digest}"
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def load_snapshot(key):
+    """
+    Returns the cached snapshot for `key` ({records, universe}), or None on a cache miss.
+    """
+    path = os.path.join(SNAPSHOT_CACHE_DIR, f"{key}.json")
     try:
-        resp = requests.get(NAVER_ETF_URL, headers=headers, timeout=15)
-        resp.raise_for_status()
-        data = resp.json()
-        etf_list = data.get("result", {}).get("etfItemList", [])
+        with open(path, 'r', encoding='utf-8') as f:
+            snapshot = json.load(f)
+        os.utime(path) # Keep recently used snapshots from being evicted first
+        return snapshot if snapshot.get('records') is not None else None
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"Ignoring unreadable snapshot {path}: {e}")
+        return None
 
-        # itemcode → {marketSum, quant} 맵 구성
-        naver_map = {
-            item["itemcode"]: item
-            for item in etf_list
-            if item.get("itemcode")
+def save_snapshot(key, records, universe=None):
+    try:
+        os.makedirs(SNAPSHOT_CACHE_DIR, exist_ok=True)
+        payload = {
+            'createdAt': datetime.now(timezone(timedelta(hours=9))).isoformat(timespec="seconds"),
+            'version': SNAPSHOT_CACHE_VERSION,
+            'records': records,
+            'universe': universe,
+        }
+        with open(os.path.join(SNAPSHOT_CACHE_DIR, f"{key}.json"), 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False)
+        evict_snapshots()
+    except Exception as e:
+        print(f"Error saving snapshot cache: {e}")
+
+def evict_snapshots():
+    """
+    Drops snapshots older than SNAPSHOT_CACHE_MAX_AGE_DAYS, then the least recently
+    used ones beyond SNAPSHOT_CACHE_MAX_ENTRIES.
+    """
+    entries = []
+    for name in os.listdir(SNAPSHOT_CACHE_DIR):
+        if name.endswith('.json'):
+            path = os.path.join(SNAPSHOT_CACHE_DIR, name)
+            entries.append((os.path.getmtime(path), path))
+    entries.sort(reverse=True)
+
+    cutoff = time.time() - SNAPSHOT_CACHE_MAX_AGE_DAYS * 86400
+    for i, (mtime, path) in enumerate(entries):
+        if i >= SNAPSHOT_CACHE_MAX_ENTRIES or mtime < cutoff:
+            os.remove(path)
+
+def record_timeseries(data):
+    """
+    Upserts today's fees, AUM and 거래량 into the time-series store (best-effort).
+    """
+    run_date = kst_today()
+    try:
+        conn = etf_timeseries.connect()
+        try:
+            count = etf_timeseries.upsert_day(conn, run_date, data)
+        finally:
+            conn.close()
+        print(f"Recorded {count} rows for {run_date} in {etf_timeseries.STORE_FILE}")
+    except Exception as e:
+        print(f"Skipping time-series store: {e}")
+
+def write_precompressed(path, payload):
+    """
+    Writes `payload` (bytes) plus .gz and, when brotli is installed, .br variants.
+    Content-hashed files never change, so existing ones are left untouched.
+    """
+    variants = [(path, lambda b: b), (path + '.gz', lambda b: gzip.compress(b, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append((path + '.br', lambda b: brotli.compress(b, quality=11)))
+    for target, encode in variants:
+        if not os.path.exists(target):
+            with open(target, 'wb') as f:
+                f.write(encode(payload))
+
+def write_compressed_copies(path, payload):
+    """
+    Rewrites the .gz and (with brotli) .br copies of a fixed-name artifact.
+    """
+    for suffix, encode in (('.gz', lambda b: gzip.compress(b, compresslevel=9, mtime=0)),
+                           ('.br', brotli.compress if brotli is not None else None)):
+        if encode:
+            with open(path + suffix, 'wb') as f:
+                f.write(encode(payload))
+
+def remove_artifact(path):
+    """
+    Removes a published artifact and its .gz/.br copies, so a skipped publish does
+    not leave the previous run's file being served as current.
+    """
+    removed = False
+    for target in (path, path + '.gz', path + '.br'):
+        try:
+            os.remove(target)
+            removed = True
+        except FileNotFoundError:
+            pass
+    return removed
+
+def build_universe(kofia_table, managed_df):
+    """
+    The fees of every KOFIA row with a 표준코드 as one compact table
+    ({fields, rows}, cheapest 실부담비용 first). Funds on the managed list carry
+    their 구분 and 종목명; the others have null labels.
+    Stored in the snapshot cache so a cache hit can publish it without re-parsing.
+    Returns None when the table cannot be built.
+    """
+    try:
+        table, _ = unique_std_codes(compute_universe_fees(kofia_table))
+        table = table.reset_index().sort_values(['실부담비용', '표준코드'], kind='stable')
+        table['TER'] = table['TER'].round(4)
+        labels = {str(item.get('표준코드', '')).strip(): item for item in managed_df.to_dict('records')}
+        table['구분'] = [labels[code]['구분'] if code in labels else None for code in table['표준코드']]
+        table['종목명'] = [labels[code]['종목명'] if code in labels else None for code in table['표준코드']]
+        return {
+            'version': 1,
+            'total': len(table),
+            'managed': int(table['구분'].notna().sum()),
+            'fields': UNIVERSE_FIELDS,
+            'rows': table[UNIVERSE_FIELDS].values.tolist(),
         }
+    except Exception as e:
+        print(f"Skipping universe artifact: {e}")
+        return None
 
-        for code in codes:
-            code_str = str(code).zfill(6) if str(code).isdigit() else None
-            if code_str is None:
-                continue  # 이미 위에서 처리됨
-            item = naver_map.get(code_str)
-            if item:
-                aum_eok = item.get("marketSum")  # 이미 억원 단위
-                volume = item.get("quant")
-                result[code] = {"AUM": aum_eok, "거래량": volume}
-                print(f"  {code}: AUM={aum_eok}억, 거래량={volume}")
-            else:
-                print(f"  {code}: NAVER ETF 목록에서 찾을 수 없음 → AUM=None")
-                result[code] = {"AUM": None, "거래량": None}
+def publish_universe(universe, out_dir=PUBLISH_DIR):
+    """
+    Writes a build_universe() table to data/universe.json (+ .gz/.br).
+    Publishing is best-effort: failures are reported but never stop the ETL.
+    """
+    if not universe:
+        return
+    try:
+        payload = json.dumps(universe, ensure_ascii=False, separators=(',', ':'))
+        os.makedirs(out_dir, exist_ok=True)
+        path = os.path.join(out_dir, PUBLISH_UNIVERSE_FILE)
+        if write_text_if_changed(path, payload):
+            write_compressed_copies(path, payload.encode('utf-8'))
+        print(f"Published fees of {universe['total']} KOFIA-listed funds to {path}")
+    except Exception as e:
+        print(f"Skipping universe artifact: {e}")
 
+def publish_cost_projection(data, out_dir=PUBLISH_DIR):
+    """
+    Publishes the projected holding cost of every published ETF (principal x monthly
+    contribution x 1-30 years, plus the cheapest fund of each 구분) so pages look the
+    numbers up instead of computing them.
+    Publishing is best-effort: failures are reported but never stop the ETL. A
+    skipped projection removes the previous run's file instead of leaving numbers
+    for an older list published.
+    """
+    path = os.path.join(out_dir, PUBLISH_PROJECTION_FILE)
+    try:
+        with timed_phase("cost projection"):
+            payload = etf_cost_projection.dumps(data)
+        os.makedirs(out_dir, exist_ok=True)
+        if write_text_if_changed(path, payload):
+            write_compressed_copies(path, payload.encode('utf-8'))
+            print(f"Published cost projection of {len(data)} ETFs to {path}")
     except Exception as e:
-        print(f"  NAVER ETF API 오류: {e} → 전체 AUM/거래량 None 처리")
-        for code in codes:
-            if code not in result:
-                result[code] = {"AUM": None, "거래량": None}
+        print(f"Skipping cost projection: {e}")
+        if remove_artifact(path):
+            print(f"Removed stale cost projection {path}")
 
-    return result
+def publish_category_artifacts(data, out_dir=PUBLISH_DIR):
+    """
+    Publishes one minified file per 구분, sorted by 실부담비용 with '순위' (1 = cheapest),
+    named <category hash>.<content hash>.json, plus an index.json manifest that lists
+    them in data.json category order. Files of the previous index are kept one more run
+    so pages holding the old index can still load them.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    index_path = os.path.join(out_dir, PUBLISH_INDEX_FILE)
+
+    previous_files = set()
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            previous_files = {c['file'] for c in json.load(f).get('categories', [])}
+    except Exception:
+        pass
+
+    groups = {}
+    for item in data:
+        groups.setdefault(str(item.get('구분', '')).strip(), []).append(item)
+
+    def real_cost(item):
+        try:
+            return float(item.get('실부담비용'))
+        except (TypeError, ValueError):
+            return float('inf')
+
+    categories = []
+    for name, rows in groups.items():
+        ranked = [dict(row, 순위=rank) for rank, row in enumerate(sorted(rows, key=real_cost), start=1)]
+        payload = json.dumps(ranked, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        category_id = hashlib.sha256(name.encode('utf-8')).hexdigest()[:8]
+        content_hash = hashlib.sha256(payload).hexdigest()[:12]
+        file_name = f"{category_id}.{content_hash}.json"
+        write_precompressed(os.path.join(out_dir, file_name), payload)
+        categories.append({
+            'name': name,
+            'count': len(ranked),
+            'file': file_name,
+            'bytes': len(payload),
+            'minRealCost': ranked[0].get('실부담비용'),
+        })
+
+    index = {
+        'version': 1,
+        'total': len(data),
+        'categories': categories,
+    }
+    index_payload = json.dumps(index, ensure_ascii=False, separators=(',', ':'))
+    if write_text_if_changed(index_path, index_payload):
+        write_compressed_copies(index_path, index_payload.encode('utf-8'))
+
+    keep = {c['file'] for c in categories} | previous_files
+    for name in os.listdir(out_dir):
+        base = name[:-3] if name.endswith(('.gz', '.br')) else name
+        if base not in (PUBLISH_INDEX_FILE, PUBLISH_UNIVERSE_FILE, PUBLISH_PROJECTION_FILE) and base.endswith('.json') and base not in keep:
+            os.remove(os.path.join(out_dir, name))
 
+    print(f"Published {len(categories)} category files to {out_dir}/ ({'gz+br' if brotli else 'gz only'})")
+    return index
 
-def write_update_meta():
+def write_update_meta(data_changed=True):
     """
     Writes ETL success metadata for frontend "last updated" rendering.
+    When the data did not change, the file is only rewritten on a new KST date.
     """
     now_kst = datetime.now(timezone(timedelta(hours=9)))
     payload = {
@@ -383,6 +1252,13 @@ def write_update_meta():
 
     meta_path = os.path.join(os.getcwd(), UPDATE_META_FILE)
     try:
+        if not data_changed and os.path.exists(meta_path):
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                current = json.load(f)
+            if current.get("updatedAt") == payload["updatedAt"] and current.get("status") == "success":
+                print(f"Update metadata already current: {meta_path}")
+                return True
+
         with open(meta_path, 'w', encoding='utf-8') as f:
             json.dump(payload, f, ensure_ascii=False, indent=2)
         print(f"Saved update metadata to {meta_path}")
@@ -391,7 +1267,172 @@ def write_update_meta():
         print(f"Error saving update metadata: {e}")
         return False
 
-def update_google_sheets(data):
+def load_gas_upload_state():
+    try:
+        with open(GAS_UPLOAD_STATE_FILE, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return state if isinstance(state.get('rows'), dict) else None
+
+def save_gas_upload_state(headers, rows, revision):
+    os.makedirs(os.path.dirname(GAS_UPLOAD_STATE_FILE), exist_ok=True)
+    state = {'headers': headers, 'revision': revision, 'rows': rows}
+    with open(GAS_UPLOAD_STATE_FILE, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, separators=(',', ':'))
+
+def clear_gas_upload_state():
+    try:
+        os.remove(GAS_UPLOAD_STATE_FILE)
+    except FileNotFoundError:
+        pass
+
+def rows_by_code(data):
+    return {str(row.get('종목코드', '')).strip(): row for row in data if str(row.get('종목코드', '')).strip()}
+
+def compute_gas_delta(previous_rows, rows):
+    """
+    Row-level delta between the last acknowledged upload and this run, keyed by 종목코드.
+    Returns {'inserted': [...rows], 'updated': [...rows], 'deleted': [...codes]}.
+    """
+    inserted = [row for code, row in rows.items() if code not in previous_rows]
+    updated = [row for code, row in rows.items() if code in previous_rows and previous_rows[code] != row]
+    deleted = [code for code in previous_rows if code not in rows]
+    return {'inserted': inserted, 'updated': updated, 'deleted': deleted}
+
+def gas_delta_batches(upserts, deletes, batch_rows=None):
+    """
+    Splits deletes + upserts into batches of at most `batch_rows` operations.
+    """
+    batch_rows = batch_rows or GAS_UPLOAD_BATCH_ROWS
+    ops = [('delete', code) for code in deletes] + [('upsert', row) for row in upserts]
+    batches = []
+    for start in range(0, len(ops), batch_rows):
+        chunk = ops[start:start + batch_rows]
+        batches.append({
+            'delete': [value for kind, value in chunk if kind == 'delete'],
+            'upsert': [value for kind, value in chunk if kind == 'upsert'],
+        })
+    return batches or [{'delete': [], 'upsert': []}]
+
+def encode_gas_batch(body):
+    raw = json.dumps(body, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return base64.b64encode(gzip.compress(raw, mtime=0)).decode('ascii')
+
+def send_gas_batches(headers, batches, revision, reset=False):
+    """
+    POSTs the batches as `applyResultDelta` requests. Each batch names the sheet
+    revision it applies to and the handler answers with the new revision; any
+    missing, malformed or conflicting acknowledgement stops the upload.
+    Returns the final revision, or None when an acknowledgement was lost.
+    """
+    for i, batch in enumerate(batches):
+        payload = {
+            'action': 'applyResultDelta',
+            'reset': reset and i == 0,
+            'baseRevision': revision,
+            'batch': i + 1,
+            'batches': len(batches),
+            'encoding': 'gzip+base64',
+            'payload': encode_gas_batch({'headers': headers, **batch}),
+        }
+        try:
+            resp = etl_http.client.post('gas', GAS_WEB_APP_URL, json=payload)
+            resp.raise_for_status()
+            ack = resp.json()
+        except Exception as e:
+            print(f"GAS batch {i + 1}/{len(batches)}: no acknowledgement ({e})")
+            return None
+
+        if not isinstance(ack, dict) or ack.get('status') != 'ok':
+            print(f"GAS batch {i + 1}/{len(batches)}: rejected ({str(ack)[:200]})")
+            return None
+        revision = ack.get('revision')
+    return revision
+
+def upload_to_gas(data):
+    """
+    Sends only the rows that changed since the last acknowledged upload.
+    Falls back to a full (reset) upload when there is no usable state, the
+    columns changed, or an acknowledgement was lost; and to the legacy
+    single-POST upload when the deployed handler does not know the delta protocol.
+    """
+    headers = list(data[0].keys())
+    rows = rows_by_code(data)
+    state = load_gas_upload_state()
+
+    revision = None
+    if state and state.get('headers') == headers:
+        delta = compute_gas_delta(state['rows'], rows)
+        upserts = delta['inserted'] + delta['updated']
+        if not upserts and not delta['deleted']:
+            print("Skipping GAS upload (no changes since last acknowledged upload).")
+            return True
+        print(
+            f"GAS delta upload: {len(delta['inserted'])} inserted, {len(delta['updated'])} updated, "
+            f"{len(delta['deleted'])} deleted."
+        )
+        for key in ('inserted', 'updated', 'deleted'):
+            etl_metrics.run.set_count(f'gas_{key}', len(delta[key]))
+        revision = send_gas_batches(headers, gas_delta_batches(upserts, delta['deleted']), state.get('revision'))
+        if revision is None:
+            print("GAS delta upload was not acknowledged; falling back to a full upload.")
+
+    if revision is None:
+        print(f"GAS full upload: {len(rows)} rows.")
+        revision = send_gas_batches(headers, gas_delta_batches(list(rows.values()), []), None, reset=True)
+
+    if revision is None:
+        clear_gas_upload_state()
+        print("Full delta-protocol upload failed; sending the legacy single-POST upload.")
+        try:
+            resp = etl_http.client.post('gas', GAS_WEB_APP_URL, json=data, headers={'Content-Type': 'application/json'})
+            print("Update Status:", resp.status_code, resp.text)
+        except Exception as e:
+            print(f"Update Error: {e}")
+        return False
+
+    save_gas_upload_state(headers, rows, revision)
+    print(f"GAS upload acknowledged (revision {revision}).")
+    return True
+
+_gas_upload_threads = []
+
+def start_gas_upload(data):
+    """
+    Runs upload_to_gas in a background thread so cleanup does not wait on Apps Script.
+    Call wait_for_gas_uploads() before the process exits.
+    """
+    if cassette is not None and cassette.replaying:
+        print("Skipping GAS upload (cassette replay).")
+        return
+
+    def run():
+        try:
+            with timed_phase("upload"), etl_metrics.run.profile_thread():
+                ok = upload_to_gas(data)
+            etl_metrics.run.detail('gas_upload', 'acknowledged' if ok else 'failed')
+        except Exception as e:
+            print(f"Update Error: {e}")
+
+    thread = threading.Thread(target=run, name="gas-upload")
+    thread.start()
+    _gas_upload_threads.append(thread)
+
+def wait_for_gas_uploads(timeout=GAS_UPLOAD_WAIT_SECONDS):
+    while _gas_upload_threads:
+        thread = _gas_upload_threads.pop()
+        thread.join(timeout)
+        if thread.is_alive():
+            print("GAS upload still running after timeout; exiting without its acknowledgement.")
+
+def update_google_sheets(data, shared=True):
+    """
+    Writes data.json, its columnar copy and the search index. With `shared` (the
+    default) it also publishes the category artifacts, the cost projection and
+    update-meta.json, and starts the GAS upload; etl_daemon.py turns that off for
+    market-only refreshes between its throttled full publishes.
+    """
     if not data:
         print("No data provided for update.")
         return False
@@ -399,70 +1440,299 @@ def update_google_sheets(data):
     # 1. Save as local JSON (Static Hosting Support)
     try:
         json_path = os.path.join(os.getcwd(), 'data.json')
-        with open(json_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=4)
-        print(f"Saved data to {json_path}")
+        changed = write_text_if_changed(json_path, json.dumps(data, ensure_ascii=False, indent=4))
+        print(f"Saved data to {json_path}" if changed else f"Data unchanged, kept {json_path}")
+
+        # Compact columnar copy of the same records (schema header + column arrays)
+        columnar_path = os.path.join(os.getcwd(), str(etf_columnar.COLUMNAR_FILE))
+        if write_text_if_changed(columnar_path, etf_columnar.dumps(data)):
+            print(f"Saved columnar data to {columnar_path}")
     except Exception as e:
         print(f"Error saving JSON: {e}")
         return False
 
-    if not write_update_meta():
-        return False
+    # Name/code search postings for the same records; over the size budget it is skipped, not fatal
+    try:
+        search_path = os.path.join(os.getcwd(), str(etf_search_index.SEARCH_INDEX_FILE))
+        if write_text_if_changed(search_path, etf_search_index.dumps(etf_search_index.build_index(data))):
+            print(f"Saved search index to {search_path}")
+    except Exception as e:
+        print(f"Skipping search index: {e}")
+        if remove_artifact(search_path):
+            print(f"Removed stale search index {search_path}")
+
+    if not shared:
+        return True
 
-    # 2. Upload to GAS (Optional / Backup)
     try:
-        resp = requests.post(GAS_WEB_APP_URL, json=data, headers={'Content-Type': 'application/json'})
-        print("Update Status:", resp.status_code, resp.text)
+        publish_category_artifacts(data)
     except Exception as e:
-        print(f"Update Error: {e}")
+        print(f"Error publishing category artifacts: {e}")
+        return False
+    publish_cost_projection(data)
+
+    if not write_update_meta(data_changed=changed):
+        return False
 
+    # 2. Upload to GAS (Optional / Backup) in the background; only the delta is sent
+    start_gas_upload(data)
     return True
 
+def fetch_kofia_source():
+    """
+    Fetches KOFIA fee data according to KOFIA_FETCH_MODE.
+    Returns (DataFrame or None, downloaded Excel path or None).
+    """
+    if cassette is not None and cassette.replaying:
+        return kofia_source_from_cassette()
+
+    if KOFIA_FETCH_MODE in ('auto', 'http'):
+        kofia_df = fetch_kofia_fee_table()
+        if kofia_df is not None:
+            return kofia_df, None
+        if KOFIA_FETCH_MODE == 'http':
+            return None, None
+        print("Falling back to Selenium download...")
+
+    excel_file = download_kofia_excel()
+    if excel_file and cassette is not None and cassette.recording:
+        cassette.record_kofia_workbook(excel_file)
+    return None, excel_file
+
+def kofia_source_from_cassette():
+    """
+    The recorded KOFIA data: the parsed XML response, or a copy of the recorded
+    workbook in a download temp dir (the run deletes it like a real download).
+    """
+    path = cassette.kofia_file()
+    if path.suffix == '.xml':
+        return parse_kofia_fee_response(path.read_bytes()), None
+
+    download_dir = tempfile.mkdtemp(prefix=KOFIA_DOWNLOAD_PREFIX)
+    excel_file = os.path.join(download_dir, path.name)
+    shutil.copyfile(path, excel_file)
+    return None, excel_file
+
+def compute_fee_records(kofia_result, targets):
+    """
+    Matches the managed list against the KOFIA data and computes fees.
+    Skips parsing/matching when the KOFIA data and managed list are unchanged.
+    """
+    kofia_df, excel_file = kofia_result
+    kofia_source = kofia_df if kofia_df is not None else excel_file
+    kofia_digest = kofia_source_digest(kofia_source)
+    cache_key = snapshot_key(kofia_digest, managed_items_digest(targets))
+    snapshot = load_snapshot(cache_key)
+    if snapshot is not None:
+        print(f"Snapshot cache hit ({cache_key[:12]}): KOFIA data and managed list unchanged, skipping parse/match.")
+        archive_kofia_table(None, kofia_digest)
+        publish_universe(snapshot.get('universe'))
+        return snapshot['records']
+
+    try:
+        if kofia_df is not None:
+            kofia_table = kofia_df
+        else:
+            with timed_phase("parse"):
+                kofia_table = load_kofia_table(excel_file)
+    except Exception as e:
+        print(f"Error loading KOFIA Excel: {e}")
+        kofia_table = None
+
+    final_data = process_data(targets, kofia_table) if kofia_table is not None else []
+    if final_data:
+        universe = build_universe(kofia_table, targets)
+        save_snapshot(cache_key, final_data, universe)
+        publish_universe(universe)
+    if kofia_table is not None:
+        archive_kofia_table(kofia_table, kofia_digest)
+    return final_data
+
+def has_kofia_data(kofia_result):
+    kofia_df, excel_file = kofia_result or (None, None)
+    return kofia_df is not None or bool(excel_file and os.path.exists(excel_file))
+
+def run_stage_graph(stages, max_workers=4):
+    """
+    Runs ETL stages as soon as their dependencies have finished.
+    `stages` maps name -> (dependency names, fn); fn receives the dict of finished
+    results. Independent stages (KOFIA fetch, GAS items, NAVER list) run concurrently
+    in threads. A stage whose dependency raised is skipped.
+    Returns (results, errors).
+    """
+    results, errors = {}, {}
+    pending = dict(stages)
+    running = {}
+
+    def run(name, fn):
+        with timed_phase(f"stage {name}"), etl_metrics.run.profile_thread():
+            return fn(results)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while pending or running:
+            for name, (deps, fn) in list(pending.items()):
+                if any(dep in errors for dep in deps):
+                    errors[name] = RuntimeError(f"skipped: dependency failed ({', '.join(d for d in deps if d in errors)})")
+                    del pending[name]
+                elif all(dep in results for dep in deps):
+                    running[pool.submit(run, name, fn)] = name
+                    del pending[name]
+
+            if not running:
+                if pending:
+                    raise ValueError(f"unresolvable stage dependencies: {sorted(pending)}")
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    print(f"Stage '{name}' failed: {e}")
+                    errors[name] = e
+
+    return results, errors
+
+def build_etl_stages():
+    """
+    Declared dependency graph of the ETL. kofia/managed/naver only do network I/O
+    and do not depend on each other.
+    """
+    def fees(r):
+        if not has_kofia_data(r['kofia']):
+            return []
+        return compute_fee_records(r['kofia'], r['managed'])
+
+    def market(r):
+        # 4. Merge AUM and volume from NAVER
+        if r['fees']:
+            merge_market_data(r['fees'], r['naver'])
+            record_timeseries(r['fees'])
+        return r['fees']
+
+    return {
+        'kofia': ((), lambda r: fetch_kofia_source()),       # 1. HTTP replay, Selenium as fallback
+        'managed': ((), lambda r: fetch_managed_items()),    # 2. Targets (GAS; cached list on error, else raise)
+        'naver': ((), lambda r: fetch_naver_etf_list()),     #    AUM/volume list (None on failure)
+        'fees': (('kofia', 'managed'), fees),                # 3. Process
+        'market': (('fees', 'naver'), market),
+    }
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="KOFIA/GAS/NAVER ETL: writes data.json and the published artifacts.")
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help=f"Attach cProfile + tracemalloc; summary goes into {etl_metrics.RUN_REPORT_FILE}, "
+             f"full stats into {etl_metrics.PROFILE_FILE}",
+    )
+    parser.add_argument(
+        "--record",
+        nargs="?",
+        const=str(etl_cassette.default_cassette_dir()),
+        metavar="DIR",
+        help="Also record KOFIA/GAS/NAVER inputs and outputs into a cassette (default: cassettes/<KST date>)",
+    )
+    parser.add_argument("--replay", metavar="DIR", help="Run offline from a recorded cassette.")
+    parser.add_argument(
+        "--replay-out",
+        metavar="DIR",
+        help="Working directory for --replay outputs (default: a new temp directory)",
+    )
+    args = parser.parse_args()
+    if args.record and args.replay:
+        parser.error("--record and --replay are mutually exclusive")
+    return args
+
+def start_cassette(args):
+    """
+    --record: snapshot the pre-run changelog state into the cassette.
+    --replay: no network from here on; restore that state into a scratch
+    directory and run there, so the repo's files and stores are not touched.
+    """
+    global cassette
+    if args.record:
+        cassette = etl_cassette.Cassette(args.record, "record")
+        cassette.capture_state(Path.cwd())
+        print(f"Recording cassette: {cassette.path}")
+    elif args.replay:
+        cassette = etl_cassette.Cassette(os.path.abspath(args.replay), "replay")
+        etl_http.client.offline = True
+        workdir = os.path.abspath(args.replay_out or tempfile.mkdtemp(prefix="etl_replay_"))
+        os.makedirs(workdir, exist_ok=True)
+        cassette.restore(Path(workdir))
+        os.chdir(workdir)
+        print(f"Replaying cassette {cassette.path} (run date {cassette.run_date}) in {workdir}")
+
+def finish_cassette(exit_code):
+    """
+    --record: keep this run's data.json as the expected output.
+    --replay: build the changelog as the workflow does, then compare outputs byte-for-byte.
+    Returns the exit code.
+    """
+    if cassette is None:
+        return exit_code
+    cwd = Path.cwd()
+    if cassette.recording:
+        cassette.capture(cwd, etl_cassette.DATA_OUTPUTS, etl_cassette.EXPECTED_DIR)
+        print(f"Cassette recorded: {cassette.path} (after build_changelog.py, run "
+              f"'python etl_cassette.py capture {cassette.path}' to add the changelog outputs)")
+        return exit_code
+
+    build_changelog = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scripts', 'build_changelog.py')
+    subprocess.run([sys.executable, build_changelog, '--date', cassette.changelog_date], check=False)
+    mismatched = cassette.verify(cwd, etl_cassette.DATA_OUTPUTS + etl_cassette.CHANGELOG_OUTPUTS)
+    return 1 if mismatched else exit_code
+
 if __name__ == "__main__":
+    args = parse_args()
+    if args.profile:
+        etl_metrics.run.start_profile()
+    start_cassette(args)
     exit_code = 0
 
-    # 1. Download via Selenium
-    excel_file = download_kofia_excel()
+    results, errors = run_stage_graph(build_etl_stages())
+    kofia_df, excel_file = results.get('kofia') or (None, None)
     # excel_file = os.path.join(os.getcwd(), '펀드별 보수비용비교_20260211 (1).xls')
-    
-    if excel_file and os.path.exists(excel_file):
-        # 2. Get Targets
-        targets = fetch_managed_items()
-        
-        # 3. Process
-        final_data = process_data(targets, excel_file)
-        
 
-        # 4. Fetch AUM and volume from KRX
-        if final_data:
-            print("Fetching market data (AUM, volume) via pykrx...")
-            codes = [item["종목코드"] for item in final_data]
-            market_data = fetch_market_data_batch(codes)
-            for item in final_data:
-                md = market_data.get(item["종목코드"], {})
-                item["AUM"] = md.get("AUM")
-                item["거래량"] = md.get("거래량")
+    if has_kofia_data((kofia_df, excel_file)):
+        final_data = results.get('market')
 
         # 5. Upload
         if final_data:
-            if not update_google_sheets(final_data):
+            etl_metrics.run.set_count('output_rows', len(final_data))
+            with timed_phase("write"):
+                saved = update_google_sheets(final_data)
+            if not saved:
                 print("Failed to save ETL outputs.")
                 exit_code = 1
         else:
             print("No matching data.")
             exit_code = 1
             
-        # 5. Cleanup
+        # 6. Cleanup
         try:
-            if os.path.exists(excel_file):
-                os.remove(excel_file)
-                print(f"Deleted utilized Excel file: {excel_file}")
+            if excel_file:
+                remove_download(excel_file)
         except Exception as e:
             print(f"Error deleting Excel file: {e}")
             
     else:
-        print("Failed to download Excel.")
+        print("Failed to fetch KOFIA data.")
         exit_code = 1
 
+    wait_for_gas_uploads()
+    etl_http.print_stats()
+    exit_code = finish_cassette(exit_code)
+
+    etl_metrics.run.detail('failed_stages', {name: str(e) for name, e in errors.items()})
+    etl_metrics.run.detail('http', etl_http.client.stats())
+    try:
+        report_path = etl_metrics.run.write(os.path.join(os.getcwd(), etl_metrics.RUN_REPORT_FILE), exit_code)
+        print(f"Run report: {report_path}")
+    except Exception as e:
+        print(f"Error writing run report: {e}")
+
     if exit_code != 0:
         sys.exit(exit_code)
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""Fallback matching of managed items to KOFIA rows without a usable 표준코드.
+
+etl_process matches on the exact 표준코드 first. Items whose code is blank, mistyped
+or stale then go through two more tiers:
+
+    kr7_code   the KR7 표준코드 derived from the 6-digit 종목코드 (KR7 + code + 00 + check digit)
+    name       best trigram similarity of 펀드명 (or 종목명) against every KOFIA 펀드명
+
+Names are normalized (NFKC, lower case, no '증권상장지수투자신탁(주식)' suffix, no
+spaces or punctuation) and indexed once per run as trigram postings. A lookup only
+scores rows that share one of the query's rarer trigrams, so it does not compare
+the query with every row. Confidence is the Dice coefficient of the trigram sets;
+a name match needs NAME_MIN_SCORE and a NAME_MIN_MARGIN lead over the runner-up.
+
+    python fund_matcher.py kofia.xlsx "TIGER 미국S&P500"
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import unicodedata
+from collections import defaultdict
+from typing import Sequence
+
+NAME_MIN_SCORE = 0.75
+NAME_MIN_MARGIN = 0.05
+# Trigrams in more than this share of the rows (brand names, '미국', ...) are not
+# used to find candidates, only to score them.
+COMMON_GRAM_SHARE = 0.02
+COMMON_GRAM_MIN_ROWS = 50
+
+FUND_TYPE_SUFFIX = re.compile(r"(증권)?(자)?상장지수투자신탁(\([^)]*\)|\[[^\]]*\])?")
+NON_WORD = re.compile(r"[^0-9a-z&가-힣]+")
+NON_WORD_OR_NEWLINE = re.compile(r"[^0-9a-z&가-힣\n]+")
+
+
+def kr7_std_code(code: str) -> str | None:
+    """'360750' -> 'KR7360750004': the 표준코드 KRX assigns to a listed ETF's short code."""
+    code = str(code or "").strip().upper()
+    if len(code) != 6 or not code.isalnum():
+        return None
+    body = f"KR7{code}00"
+    digits = "".join(str(int(ch, 36)) for ch in body)
+    total = 0
+    for i, ch in enumerate(reversed(digits)):
+        n = int(ch) * (2 if i % 2 == 0 else 1)
+        total += n // 10 + n % 10
+    return body + str((10 - total % 10) % 10)
+
+
+def normalize_name(name: str) -> str:
+    """'미래에셋 TIGER 미국S&P500증권상장지수투자신탁(주식)' -> '미래에셋tiger미국s&p500'."""
+    text = unicodedata.normalize("NFKC", str(name or "")).lower()
+    return NON_WORD.sub("", FUND_TYPE_SUFFIX.sub("", text))
+
+
+def normalize_names(names: Sequence[str]) -> list[str]:
+    """normalize_name over a whole column, with one pass of each regex over the joined text."""
+    joined = "\n".join(str(name or "").replace("\n", " ") for name in names)
+    text = unicodedata.normalize("NFKC", joined).lower()
+    return NON_WORD_OR_NEWLINE.sub("", FUND_TYPE_SUFFIX.sub("", text)).split("\n")
+
+
+def trigrams(text: str) -> frozenset[str]:
+    if len(text) < 3:
+        return frozenset([text]) if text else frozenset()
+    return frozenset(text[i:i + 3] for i in range(len(text) - 2))
+
+
+def dice(a: frozenset[str], b: frozenset[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return 2 * len(a & b) / (len(a) + len(b))
+
+
+class FundNameIndex:
+    """Trigram inverted index over KOFIA 펀드명; positions refer to the `names` sequence."""
+
+    def __init__(self, names: Sequence[str]) -> None:
+        self.grams = [trigrams(name) for name in normalize_names(names)]
+        postings: defaultdict[str, list[int]] = defaultdict(list)
+        for pos, grams in enumerate(self.grams):
+            for gram in grams:
+                postings[gram].append(pos)
+        self.postings = dict(postings)
+        self.common_rows = max(COMMON_GRAM_MIN_ROWS, int(len(names) * COMMON_GRAM_SHARE))
+
+    def search(self, name: str, limit: int = 2) -> list[tuple[int, float]]:
+        """The best `limit` (position, score) pairs, highest score first."""
+        query = trigrams(normalize_name(name))
+        known = [gram for gram in query if gram in self.postings]
+        if not known:
+            return []
+        seeds = [gram for gram in known if len(self.postings[gram]) <= self.common_rows]
+        if not seeds:
+            # Only common trigrams (a very short name): fall back to the two rarest ones.
+            seeds = sorted(known, key=lambda gram: len(self.postings[gram]))[:2]
+
+        candidates: set[int] = set()
+        for gram in seeds:
+            candidates.update(self.postings[gram])
+        scored = sorted(((pos, dice(query, self.grams[pos])) for pos in candidates), key=lambda item: (-item[1], item[0]))
+        return scored[:limit]
+
+    def best_match(self, name: str) -> tuple[int | None, float, tuple[int, float] | None]:
+        """
+        Returns (position or None, confidence, best candidate). The position is None
+        when the best score is below NAME_MIN_SCORE or within NAME_MIN_MARGIN of the
+        runner-up; the candidate is still returned for the report.
+        """
+        hits = self.search(name, limit=2)
+        if not hits:
+            return None, 0.0, None
+        best_pos, best_score = hits[0]
+        runner_up = hits[1][1] if len(hits) > 1 else 0.0
+        if best_score < NAME_MIN_SCORE or best_score - runner_up < NAME_MIN_MARGIN:
+            return None, round(best_score, 3), hits[0]
+        return best_pos, round(best_score, 3), hits[0]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Look up KOFIA funds by name in a KOFIA workbook.")
+    parser.add_argument("workbook", help="KOFIA '펀드별 보수비용비교' .xls/.xlsx")
+    parser.add_argument("names", nargs="+", help="종목명 or 펀드명 to look up")
+    parser.add_argument("--limit", type=int, default=5)
+    return parser.parse_args()
+
+
+def main() -> int:
+    import etl_process
+
+    args = parse_args()
+    table = etl_process.kofia_fee_frame(etl_process.load_kofia_table(args.workbook))
+    index = FundNameIndex(table["펀드명"].tolist())
+    for name in args.names:
+        print(f"{name} -> {normalize_name(name)}")
+        for pos, score in index.search(name, args.limit):
+            print(f"  {score:.3f}  {table['표준코드'].iat[pos]}  {table['펀드명'].iat[pos]}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
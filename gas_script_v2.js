@@ -2,6 +2,9 @@
 // 시트 이름 설정
 var RESULT_SHEET_NAME = "수수료결과";
 var MANAGE_SHEET_NAME = "종목관리";
+// 수수료결과 시트 리비전 (델타 업로드가 어떤 상태를 기준으로 계산됐는지 확인용)
+var RESULT_REVISION_KEY = "RESULT_REVISION";
+var RESULT_KEY_HEADER = "종목코드";
 
 // 1. 웹사이트에서 데이터 요청할 때 (GET)
 function doGet(e) {
@@ -10,6 +13,9 @@ function doGet(e) {
     if (action == "getItems") {
         // 종목관리 탭의 데이터를 파이썬에게 줄 때
         return getSheetDataJSON(MANAGE_SHEET_NAME);
+    } else if (action == "getItemsVersion") {
+        // 종목관리 탭 내용의 해시만 반환 (파이썬 캐시 재검증용, 본문 전송 없음)
+        return getSheetVersionJSON(MANAGE_SHEET_NAME);
     } else {
         // 수수료결과 탭의 데이터를 웹사이트에 줄 때 (기본)
         return getSheetDataJSON(RESULT_SHEET_NAME);
@@ -22,6 +28,11 @@ function doPost(e) {
         // 파이썬이 보낸 JSON 데이터 받기
         var payload = JSON.parse(e.postData.contents);
 
+        // 파이썬 델타 업로드 (종목코드 기준 upsert/delete, gzip+base64 배치)
+        if (payload.action === "applyResultDelta") {
+            return applyResultDelta(payload);
+        }
+
         // [NEW] 만약 종목관리 업데이트 요청이라면
         if (payload.action === "updateManage" && payload.data) {
             return updateManageSheet(payload.data);
@@ -58,9 +69,116 @@ function updateResultSheet(rawData) {
 
         sheet.getRange(2, 1, rows.length, headers.length).setValues(rows);
     }
+    // 전체 교체로 기준 상태가 바뀌었으므로 리비전 초기화 (다음 델타 업로드는 전체 업로드로 대체됨)
+    PropertiesService.getScriptProperties().deleteProperty(RESULT_REVISION_KEY);
     return ContentService.createTextOutput("Success Result Update");
 }
 
+// 수수료 결과 시트 델타 적용
+// payload: { action, reset, baseRevision, batch, batches, encoding: "gzip+base64", payload }
+// 압축 해제한 본문: { headers: [...], upsert: [행...], delete: [종목코드...] }
+// 응답(JSON): { status: "ok", revision } / { status: "conflict", revision } / { status: "error", message }
+function applyResultDelta(request) {
+    var lock = LockService.getScriptLock();
+    lock.waitLock(30000);
+    try {
+        var props = PropertiesService.getScriptProperties();
+        var revision = Number(props.getProperty(RESULT_REVISION_KEY) || 0);
+        var body = JSON.parse(decodeDeltaPayload(request));
+
+        var sheet = SpreadsheetApp.getActiveSpreadsheet().getSheetByName(RESULT_SHEET_NAME);
+        if (!sheet) return jsonOutput({ status: "error", message: "Sheet not found" });
+
+        if (request.reset) {
+            sheet.clear();
+            sheet.getRange(1, 1, 1, body.headers.length).setValues([body.headers]);
+            // 종목코드가 숫자로 바뀌지 않도록 텍스트 서식 지정 (예: 069500)
+            var keyColumn = body.headers.indexOf(RESULT_KEY_HEADER) + 1;
+            if (keyColumn > 0) sheet.getRange(1, keyColumn, sheet.getMaxRows(), 1).setNumberFormat("@");
+        } else if (request.baseRevision !== revision) {
+            return jsonOutput({ status: "conflict", revision: revision });
+        }
+
+        var values = sheet.getDataRange().getValues();
+        var headers = values[0].map(String);
+        if (headers.join("\u0001") !== body.headers.join("\u0001")) {
+            return jsonOutput({ status: "conflict", revision: revision, message: "headers differ" });
+        }
+        var keyIndex = headers.indexOf(RESULT_KEY_HEADER);
+
+        // 종목코드 → 시트 행 번호(1-based)
+        var rowByCode = {};
+        for (var i = 1; i < values.length; i++) {
+            rowByCode[normalizeCode(values[i][keyIndex])] = i + 1;
+        }
+
+        // 1) 변경된 행은 메모리의 values에서 교체, 신규 행은 뒤에 추가
+        var rows = values.slice(1);
+        (body.upsert || []).forEach(function (item) {
+            var row = headers.map(function (header) { return item[header] === null || item[header] === undefined ? "" : item[header]; });
+            var rowNumber = rowByCode[normalizeCode(item[RESULT_KEY_HEADER])];
+            if (rowNumber) {
+                rows[rowNumber - 2] = row;
+            } else {
+                rows.push(row);
+            }
+        });
+
+        // 2) 삭제 대상은 메모리에서 제외
+        var deleted = {};
+        (body["delete"] || []).forEach(function (code) {
+            var rowNumber = rowByCode[normalizeCode(code)];
+            if (rowNumber) deleted[rowNumber - 2] = true;
+        });
+        var kept = rows.filter(function (row, index) { return !deleted[index]; });
+        var deletedCount = rows.length - kept.length;
+
+        // 3) 결과 범위를 한 번에 쓰고, 줄어든 만큼 끝의 행을 한 번에 삭제
+        if (kept.length > 0) {
+            sheet.getRange(2, 1, kept.length, headers.length).setValues(kept);
+        }
+        var staleRows = values.length - 1 - kept.length;
+        if (staleRows > 0 && kept.length === 0) {
+            // 고정된 머리글 아래 행을 모두 삭제할 수는 없으므로 내용만 비움
+            sheet.getRange(2, 1, staleRows, headers.length).clearContent();
+        } else if (staleRows > 0) {
+            sheet.deleteRows(kept.length + 2, staleRows);
+        }
+
+        revision += 1;
+        props.setProperty(RESULT_REVISION_KEY, String(revision));
+        return jsonOutput({
+            status: "ok",
+            revision: revision,
+            batch: request.batch,
+            upserted: (body.upsert || []).length,
+            deleted: deletedCount
+        });
+    } catch (error) {
+        return jsonOutput({ status: "error", message: error.toString() });
+    } finally {
+        lock.releaseLock();
+    }
+}
+
+function decodeDeltaPayload(request) {
+    if (request.encoding !== "gzip+base64") return JSON.stringify(request.payload);
+    var blob = Utilities.newBlob(Utilities.base64Decode(request.payload), "application/x-gzip");
+    return Utilities.ungzip(blob).getDataAsString("UTF-8");
+}
+
+// 시트가 숫자로 저장한 종목코드(69500)와 문자열("069500")을 같은 키로 취급
+function normalizeCode(value) {
+    var code = String(value).trim();
+    while (/^\d+$/.test(code) && code.length < 6) code = "0" + code;
+    return code;
+}
+
+function jsonOutput(obj) {
+    return ContentService.createTextOutput(JSON.stringify(obj))
+        .setMimeType(ContentService.MimeType.JSON);
+}
+
 // [NEW] 종목관리 시트 업데이트 (표준코드, 펀드명)
 function updateManageSheet(updates) {
     var sheet = SpreadsheetApp.getActiveSpreadsheet().getSheetByName(MANAGE_SHEET_NAME);
@@ -106,6 +224,15 @@ function updateManageSheet(updates) {
     return ContentService.createTextOutput("Success Manage Update: " + updates.length + " items processed.");
 }
 
+// 헬퍼 함수: 시트 값의 SHA-256 해시 (내용이 같으면 같은 버전)
+function getSheetVersionJSON(sheetName) {
+    var sheet = SpreadsheetApp.getActiveSpreadsheet().getSheetByName(sheetName);
+    var values = sheet.getDataRange().getValues();
+    var digest = Utilities.computeDigest(Utilities.DigestAlgorithm.SHA_256, JSON.stringify(values), Utilities.Charset.UTF_8);
+    var version = digest.map(function (b) { return ("0" + (b & 0xff).toString(16)).slice(-2); }).join("");
+    return jsonOutput({ version: version, rows: Math.max(values.length - 1, 0) });
+}
+
 // 헬퍼 함수: 시트 데이터를 JSON으로 변환
 function getSheetDataJSON(sheetName) {
     var sheet = SpreadsheetApp.getActiveSpreadsheet().getSheetByName(sheetName);
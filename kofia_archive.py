@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""Columnar archive of every parsed KOFIA export (Parquet, partitioned by date)."""
+
+from __future__ import annotations
+
+import argparse
+import shutil
+from pathlib import Path
+from typing import Any, Iterable
+
+import pandas as pd
+
+ARCHIVE_DIR = Path("history/kofia")
+PART_FILE = "part-0.parquet"
+DIGEST_KEY = b"kofia_source_digest"
+
+CODE_COLUMN = "표준코드"
+NAME_COLUMN = "펀드명"
+FEE_COLUMNS = [
+    "총보수",
+    "기타비용",
+    "매매중개수수료",
+]
+
+# Small row groups so min/max statistics on the (sorted) 표준코드 column let
+# readers skip most of a partition when only a few codes are requested.
+ROW_GROUP_SIZE = 256
+
+
+def _require_pyarrow() -> Any:
+    try:
+        import pyarrow  # noqa: F401
+        import pyarrow.dataset  # noqa: F401
+        import pyarrow.fs  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError as exc:
+        raise RuntimeError("pyarrow is required for the KOFIA archive (pip install pyarrow)") from exc
+    return pyarrow
+
+
+def _schema() -> Any:
+    pa = _require_pyarrow()
+    return pa.schema(
+        [(CODE_COLUMN, pa.string()), (NAME_COLUMN, pa.string())]
+        + [(field, pa.float64()) for field in FEE_COLUMNS]
+    )
+
+
+def partition_path(run_date: str, root: Path = ARCHIVE_DIR) -> Path:
+    return root / f"date={run_date}" / PART_FILE
+
+
+def list_dates(root: Path = ARCHIVE_DIR) -> list[str]:
+    if not root.exists():
+        return []
+    return sorted(
+        path.name.split("=", 1)[1]
+        for path in root.iterdir()
+        if path.is_dir() and path.name.startswith("date=") and (path / PART_FILE).exists()
+    )
+
+
+def read_digest(run_date: str, root: Path = ARCHIVE_DIR) -> str | None:
+    """Returns the source digest stored in a partition's Parquet metadata."""
+    pa = _require_pyarrow()
+    metadata = pa.parquet.read_schema(partition_path(run_date, root)).metadata or {}
+    value = metadata.get(DIGEST_KEY)
+    return value.decode("utf-8") if value else None
+
+
+def write_snapshot(
+    df: pd.DataFrame,
+    run_date: str,
+    source_digest: str | None = None,
+    root: Path = ARCHIVE_DIR,
+) -> Path:
+    """
+    Writes one run's KOFIA fee table (표준코드, 펀드명 and float fee columns)
+    as the partition for `run_date`, replacing an existing one for that date.
+    """
+    pa = _require_pyarrow()
+    schema = _schema()
+    if source_digest:
+        schema = schema.with_metadata({DIGEST_KEY: source_digest.encode("utf-8")})
+
+    frame = df.reindex(columns=[field.name for field in schema]).copy()
+    frame[CODE_COLUMN] = frame[CODE_COLUMN].fillna("").astype(str)
+    frame[NAME_COLUMN] = frame[NAME_COLUMN].fillna("").astype(str)
+    for field in FEE_COLUMNS:
+        frame[field] = pd.to_numeric(frame[field], errors="coerce").astype("float64")
+    frame = frame.sort_values(CODE_COLUMN, kind="stable")
+
+    table = pa.Table.from_pandas(frame, schema=schema, preserve_index=False)
+    path = partition_path(run_date, root)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    pa.parquet.write_table(table, tmp_path, row_group_size=ROW_GROUP_SIZE, compression="zstd")
+    tmp_path.replace(path)
+    return path
+
+
+def reuse_latest_snapshot(run_date: str, source_digest: str, root: Path = ARCHIVE_DIR) -> bool:
+    """
+    Archives `run_date` without re-parsing when the latest archived partition
+    came from the same KOFIA data. Returns False if there is nothing to reuse.
+    """
+    dates = [d for d in list_dates(root) if d < run_date]
+    if run_date in list_dates(root):
+        return read_digest(run_date, root) == source_digest
+    if not dates or read_digest(dates[-1], root) != source_digest:
+        return False
+
+    target = partition_path(run_date, root)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    shutil.copyfile(partition_path(dates[-1], root), target)
+    return True
+
+
+def read_archive(
+    start: str | None = None,
+    end: str | None = None,
+    codes: Iterable[str] | None = None,
+    columns: list[str] | None = None,
+    root: Path = ARCHIVE_DIR,
+) -> pd.DataFrame:
+    """
+    Reads archived rows for dates in [start, end] (inclusive, 'YYYY-MM-DD') and,
+    optionally, a set of 표준코드. Date and code filters are pushed down to the
+    partition and row-group level; files are memory-mapped.
+    """
+    pa = _require_pyarrow()
+    output_columns = ["date"] + (columns or [CODE_COLUMN, NAME_COLUMN] + FEE_COLUMNS)
+    if not list_dates(root):
+        return pd.DataFrame(columns=output_columns)
+
+    ds = pa.dataset
+    partitioning = ds.partitioning(pa.schema([("date", pa.string())]), flavor="hive")
+    dataset = ds.dataset(
+        str(root),
+        format="parquet",
+        partitioning=partitioning,
+        filesystem=pa.fs.LocalFileSystem(use_mmap=True),
+    )
+
+    expr = None
+    conditions = []
+    if start:
+        conditions.append(ds.field("date") >= start)
+    if end:
+        conditions.append(ds.field("date") <= end)
+    if codes is not None:
+        conditions.append(ds.field(CODE_COLUMN).isin(sorted({str(c).strip() for c in codes})))
+    for condition in conditions:
+        expr = condition if expr is None else expr & condition
+
+    table = dataset.to_table(columns=output_columns, filter=expr)
+    sort_keys = ["date", CODE_COLUMN] if CODE_COLUMN in output_columns else ["date"]
+    return table.to_pandas().sort_values(sort_keys, kind="stable").reset_index(drop=True)
+
+
+def fee_changes(
+    field: str = "총보수",
+    start: str | None = None,
+    end: str | None = None,
+    codes: Iterable[str] | None = None,
+    name_contains: str | None = None,
+    root: Path = ARCHIVE_DIR,
+) -> pd.DataFrame:
+    """
+    Lists every change of `field` between consecutive archived dates per 표준코드,
+    e.g. fee_changes("총보수", start="2025-01-01", name_contains="TIGER").
+    """
+    if field not in FEE_COLUMNS:
+        raise ValueError(f"unknown fee field: {field}")
+
+    df = read_archive(start, end, codes, columns=[CODE_COLUMN, NAME_COLUMN, field], root=root)
+    if name_contains:
+        df = df[df[NAME_COLUMN].str.contains(name_contains, regex=False)]
+    if df.empty:
+        return pd.DataFrame(columns=["date", CODE_COLUMN, NAME_COLUMN, "before", "after"])
+
+    df = df.sort_values([CODE_COLUMN, "date"], kind="stable")
+    before = df.groupby(CODE_COLUMN, sort=False)[field].shift()
+    changed = before.notna() & (before != df[field])
+    out = df.loc[changed, ["date", CODE_COLUMN, NAME_COLUMN]].copy()
+    out["before"] = before[changed]
+    out["after"] = df.loc[changed, field]
+    return out.sort_values(["date", CODE_COLUMN]).reset_index(drop=True)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Query the KOFIA fee archive.")
+    parser.add_argument("--root", type=Path, default=ARCHIVE_DIR, help="Archive root (default: %(default)s)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("dates", help="List archived dates.")
+
+    changes = sub.add_parser("changes", help="List fee changes between archived dates.")
+    changes.add_argument("--field", default="총보수", choices=FEE_COLUMNS)
+    changes.add_argument("--since", help="First date (YYYY-MM-DD), inclusive.")
+    changes.add_argument("--until", help="Last date (YYYY-MM-DD), inclusive.")
+    changes.add_argument("--code", action="append", help="표준코드 filter. May be repeated.")
+    changes.add_argument("--name", help="Substring of 펀드명, e.g. TIGER.")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+
+    if args.command == "dates":
+        for run_date in list_dates(args.root):
+            print(run_date)
+        return 0
+
+    result = fee_changes(args.field, args.since, args.until, args.code, args.name, root=args.root)
+    if result.empty:
+        print("[archive] no changes")
+    else:
+        print(result.to_string(index=False))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
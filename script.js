@@ -1,5 +1,9 @@
 ﻿const GAS_API_URL = "/data.json";
+const DATA_DIR = "/data";
+const DATA_INDEX_URL = `${DATA_DIR}/index.json`;
 const CHANGELOG_URL = "/changelog.json";
+const CHANGELOG_LATEST_URL = "/changelog-latest.json";
+const CHANGELOG_SHARD_DIR = "/changelog/shards";
 const UPDATE_META_URL = "/update-meta.json";
 const I18N_DIR = "/i18n";
 
@@ -41,12 +45,16 @@ const HREFLANG_TO_LANG = {
 const i18nCache = new Map();
 
 let allData = [];
+let dataIndex = null;
+const categoryRowsCache = new Map();
+const categoryRowsPending = new Map();
 let currentCategory = "";
 let currentLanguage = DEFAULT_LANG;
 let currentTranslations = {};
 let lastFocusedBeforeModal = null;
 let latestDataUpdatedAt = "";
 let changelogLatestByCode = {};
+let changelogShardObserver = null;
 
 let dataKeys = {
     category: "구분",
@@ -619,52 +627,64 @@ async function fetchData() {
     updateLastUpdated(true);
 
     try {
-        const [response, changelogResponse] = await Promise.all([
-            fetch(GAS_API_URL, { cache: "no-store" }),
-            fetch(CHANGELOG_URL, { cache: "no-store" }).catch(() => null),
+        const [indexResponse, changelogResponse] = await Promise.all([
+            fetch(DATA_INDEX_URL, { cache: "no-store" }).catch(() => null),
+            fetch(CHANGELOG_LATEST_URL, { cache: "no-store" }).catch(() => null),
             loadUpdateMeta(),
         ]);
-        if (!response.ok) {
-            throw new Error(`HTTP ${response.status}`);
-        }
 
-        // changelog 파싱: 가장 최신 월의 실부담비용 변동을 종목코드별로 매핑
+        // changelog-latest: 가장 최신 월의 실부담비용 변동이 종목코드별로 미리 계산되어 있음
         changelogLatestByCode = {};
         if (changelogResponse && changelogResponse.ok) {
             try {
-                const changelogData = await changelogResponse.json();
-                if (Array.isArray(changelogData) && changelogData.length > 0) {
-                    const latest = [...changelogData].sort((a, b) => b.month.localeCompare(a.month))[0];
-                    if (latest && Array.isArray(latest.changes)) {
-                        latest.changes.forEach((change) => {
-                            if (change.field === "실부담비용") {
-                                changelogLatestByCode[change.code] = {
-                                    before: change.before,
-                                    after: change.after,
-                                    diff: Number((change.after - change.before).toFixed(4)),
-                                };
-                            }
-                        });
-                    }
-                }
+                const latest = await changelogResponse.json();
+                Object.entries((latest && latest.byCode) || {}).forEach(([code, [before, after, diff]]) => {
+                    changelogLatestByCode[code] = { before, after, diff };
+                });
             } catch (e) {
                 console.warn("Changelog parse error:", e);
             }
         }
 
-        const data = await response.json();
-        if (!Array.isArray(data)) {
-            throw new Error("Invalid data format");
+        dataIndex = null;
+        categoryRowsCache.clear();
+        categoryRowsPending.clear();
+        allData = [];
+        if (indexResponse && indexResponse.ok) {
+            try {
+                const index = await indexResponse.json();
+                if (index && Array.isArray(index.categories) && index.categories.length > 0) {
+                    dataIndex = index;
+                }
+            } catch (e) {
+                console.warn("Data index parse error:", e);
+            }
         }
 
-        allData = data;
-        if (allData[0]) {
-            resolveDataKeys(allData[0]);
+        if (dataIndex) {
+            // Per-category files: only the visible category is downloaded up front.
+            renderTabs(allData);
+            await loadCategoryRows(currentCategory);
+        } else {
+            const response = await fetch(GAS_API_URL, { cache: "no-store" });
+            if (!response.ok) {
+                throw new Error(`HTTP ${response.status}`);
+            }
+
+            const data = await response.json();
+            if (!Array.isArray(data)) {
+                throw new Error("Invalid data format");
+            }
+
+            allData = data;
+            if (allData[0]) {
+                resolveDataKeys(allData[0]);
+            }
+            renderTabs(allData);
         }
 
         updateHomeCoverageMetric();
 
-        renderTabs(allData);
         filterAndRenderTable();
         updateLastUpdated(false);
     } catch (error) {
@@ -674,6 +694,55 @@ async function fetchData() {
     }
 }
 
+// Loads one category file listed in data/index.json. The files are content-hashed and
+// already sorted by 실부담비용, so they can be served with long cache lifetimes.
+// "" (전체) loads every category; an unknown category resolves to no rows.
+async function loadCategoryRows(category) {
+    const name = String(category || "").trim();
+    if (categoryRowsCache.has(name)) {
+        return categoryRowsCache.get(name);
+    }
+    if (!categoryRowsPending.has(name)) {
+        const pending = fetchCategoryRows(name)
+            .then((rows) => {
+                categoryRowsCache.set(name, rows);
+                return rows;
+            })
+            .finally(() => categoryRowsPending.delete(name));
+        categoryRowsPending.set(name, pending);
+    }
+    return categoryRowsPending.get(name);
+}
+
+async function fetchCategoryRows(name) {
+    const categories = dataIndex ? dataIndex.categories : [];
+    if (name === "") {
+        const parts = await Promise.all(categories.map((item) => loadCategoryRows(item.name)));
+        return [].concat(...parts);
+    }
+
+    const entry = categories.find((item) => item.name === name);
+    if (!entry) {
+        return [];
+    }
+
+    const response = await fetch(`${DATA_DIR}/${encodeURIComponent(entry.file)}`);
+    if (!response.ok) {
+        throw new Error(`HTTP ${response.status}`);
+    }
+
+    const rows = await response.json();
+    if (!Array.isArray(rows)) {
+        throw new Error("Invalid data format");
+    }
+
+    if (allData.length === 0 && rows[0]) {
+        resolveDataKeys(rows[0]);
+    }
+    allData = allData.concat(rows);
+    return rows;
+}
+
 async function loadUpdateMeta() {
     try {
         const response = await fetch(UPDATE_META_URL, { cache: "no-store" });
@@ -722,11 +791,12 @@ function updateHomeCoverageMetric() {
     if (getPageType() !== "home") return;
 
     const metric = document.getElementById("homeCoverageMetric");
-    if (!metric || allData.length === 0) return;
+    const total = dataIndex ? Number(dataIndex.total) || 0 : allData.length;
+    if (!metric || total === 0) return;
 
     const template = getTranslation("home_kpi_coverage_dynamic");
     const year = String(new Date().getFullYear());
-    const count = String(allData.length);
+    const count = String(total);
 
     if (template && template !== "home_kpi_coverage_dynamic") {
         metric.textContent = template
@@ -742,7 +812,9 @@ function renderTabs(data) {
     const tabsContainer = document.getElementById("categoryTabs");
     if (!tabsContainer) return;
 
-    const categories = getDistinctCategories(data);
+    const categories = dataIndex
+        ? dataIndex.categories.map((item) => String(item.name || "").trim()).filter(Boolean)
+        : getDistinctCategories(data);
     const presetCategory = getCategoryPreset();
 
     if (presetCategory) {
@@ -802,6 +874,31 @@ function filterAndRenderTable() {
     }
 
     const normalizedCurrent = String(currentCategory || "").trim();
+
+    if (dataIndex) {
+        if (!categoryRowsCache.has(normalizedCurrent)) {
+            const tbody = document.getElementById("tableBody");
+            if (tbody) {
+                tbody.innerHTML = `<tr><td colspan="8" class="loading-text">${getTranslation("table_loading")}</td></tr>`;
+            }
+            loadCategoryRows(normalizedCurrent)
+                .then((rows) => {
+                    if (String(currentCategory || "").trim() === normalizedCurrent) {
+                        renderTable(rows);
+                    }
+                })
+                .catch((error) => {
+                    console.error("Error fetching category data:", error);
+                    if (tbody) {
+                        tbody.innerHTML = `<tr><td colspan="8" class="loading-text error-text">${getTranslation("table_error")}</td></tr>`;
+                    }
+                });
+            return;
+        }
+        renderTable(categoryRowsCache.get(normalizedCurrent));
+        return;
+    }
+
     const filtered = (normalizedCurrent === "")
         ? allData
         : allData.filter((item) => String(item[dataKeys.category] || "").trim() === normalizedCurrent);
@@ -1037,6 +1134,146 @@ function normalizeUpdatedDate(value) {
     return `${parsed.getFullYear()}/${String(parsed.getMonth() + 1).padStart(2, "0")}/${String(parsed.getDate()).padStart(2, "0")}`;
 }
 
+function sortChangelogEntries(entries) {
+    return [...entries].sort((a, b) => {
+        const aMonth = String(a.month || "");
+        const bMonth = String(b.month || "");
+        if (bMonth !== aMonth) return bMonth.localeCompare(aMonth);
+        return String(b.updatedAt || "").localeCompare(String(a.updatedAt || ""));
+    });
+}
+
+function createChangelogCard(entry) {
+    const card = document.createElement("article");
+    card.className = "changelog-card";
+
+    const month = escapeHtml(String(entry.month || ""));
+    const updatedAt = escapeHtml(String(entry.updatedAt || ""));
+    const changes = Array.isArray(entry.changes) ? entry.changes : [];
+    const listOf = (key) => (Array.isArray(entry[key]) ? entry[key] : []);
+    const eventRow = (code, name, label, beforeValue, afterValue) => `
+                <tr>
+                    <td>${escapeHtml(String(code || "-"))}</td>
+                    <td>${escapeHtml(String(name || "-"))}</td>
+                    <td>${escapeHtml(String(label || "-"))}</td>
+                    <td class="text-right">${beforeValue}</td>
+                    <td class="text-right">${afterValue}</td>
+                </tr>
+            `;
+
+    const rows = [
+        ...listOf("added").map((item) => eventRow(item.code, item.name, getTranslation("changelog_added"), "-", "-")),
+        ...listOf("removed").map((item) => eventRow(item.code, item.name, getTranslation("changelog_removed"), "-", "-")),
+        ...listOf("renamed").map((item) => eventRow(
+            item.code,
+            item.after,
+            getTranslation("changelog_renamed"),
+            escapeHtml(String(item.before || "-")),
+            escapeHtml(String(item.after || "-"))
+        )),
+        ...changes.map((change) => eventRow(
+            change.code,
+            change.name,
+            change.field,
+            formatChangeValue(change.before),
+            formatChangeValue(change.after)
+        ))
+    ];
+
+    const rowsHtml = rows.length === 0
+        ? `<tr><td colspan="5">${escapeHtml(getTranslation("changelog_no_changes"))}</td></tr>`
+        : rows.join("");
+
+    card.innerHTML = `
+        <header class="changelog-head">
+            <h3>${month}</h3>
+            <p>${getTranslation("changelog_updated_at")} ${updatedAt}</p>
+        </header>
+        <div class="table-container">
+            <table class="data-table changelog-table">
+                <thead>
+                    <tr>
+                        <th>${getTranslation("table_code")}</th>
+                        <th>${getTranslation("table_name")}</th>
+                        <th>${getTranslation("changelog_field")}</th>
+                        <th>${getTranslation("changelog_before")}</th>
+                        <th>${getTranslation("changelog_after")}</th>
+                    </tr>
+                </thead>
+                <tbody>${rowsHtml}</tbody>
+            </table>
+        </div>
+    `;
+
+    return card;
+}
+
+async function fetchChangelogShard(file) {
+    const response = await fetch(`${CHANGELOG_SHARD_DIR}/${encodeURIComponent(file)}`, { cache: "no-store" });
+    if (!response.ok) {
+        throw new Error(`HTTP ${response.status}`);
+    }
+    const entries = await response.json();
+    return Array.isArray(entries) ? entries : [];
+}
+
+// Renders the newest month right away and pulls older month shards only when the
+// reader scrolls near the end of the list.
+async function renderChangelogShards(container, months) {
+    if (changelogShardObserver) {
+        changelogShardObserver.disconnect();
+        changelogShardObserver = null;
+    }
+
+    let nextIndex = 0;
+    const sentinel = document.createElement("div");
+    sentinel.className = "changelog-sentinel";
+    sentinel.setAttribute("aria-hidden", "true");
+
+    const appendNextShard = async () => {
+        const item = months[nextIndex++];
+        const entries = await fetchChangelogShard(item.file);
+        sortChangelogEntries(entries).forEach((entry) => {
+            container.insertBefore(createChangelogCard(entry), sentinel);
+        });
+    };
+
+    container.innerHTML = "";
+    container.appendChild(sentinel);
+    await appendNextShard();
+
+    if (nextIndex >= months.length) {
+        sentinel.remove();
+        return;
+    }
+
+    if (!("IntersectionObserver" in window)) {
+        while (nextIndex < months.length) {
+            await appendNextShard();
+        }
+        sentinel.remove();
+        return;
+    }
+
+    let loading = false;
+    const observer = new IntersectionObserver(async (observed) => {
+        if (loading || !observed.some((item) => item.isIntersecting)) return;
+        loading = true;
+        try {
+            await appendNextShard();
+        } catch (error) {
+            console.error("Failed to load changelog shard:", error);
+        }
+        loading = false;
+        if (nextIndex >= months.length || !sentinel.isConnected) {
+            observer.disconnect();
+            sentinel.remove();
+        }
+    }, { rootMargin: "400px 0px" });
+    observer.observe(sentinel);
+    changelogShardObserver = observer;
+}
+
 async function renderChangelog() {
     const container = document.getElementById("changelogList");
     if (!container) return;
@@ -1044,6 +1281,19 @@ async function renderChangelog() {
     container.innerHTML = `<p class="loading-text">${getTranslation("changelog_loading")}</p>`;
 
     try {
+        const manifestResponse = await fetch(`${CHANGELOG_SHARD_DIR}/manifest.json`, { cache: "no-store" }).catch(() => null);
+        if (manifestResponse && manifestResponse.ok) {
+            const manifest = await manifestResponse.json();
+            const months = Array.isArray(manifest && manifest.months) ? manifest.months : [];
+            if (months.length === 0) {
+                container.innerHTML = `<p class="loading-text">${getTranslation("changelog_empty")}</p>`;
+                return;
+            }
+            await renderChangelogShards(container, months);
+            return;
+        }
+
+        // Fallback: the full changelog.json (e.g. shards not published yet).
         const response = await fetch(CHANGELOG_URL, { cache: "no-store" });
         if (!response.ok) {
             throw new Error(`HTTP ${response.status}`);
@@ -1055,62 +1305,9 @@ async function renderChangelog() {
             return;
         }
 
-        const sorted = [...data].sort((a, b) => {
-            const aMonth = String(a.month || "");
-            const bMonth = String(b.month || "");
-            if (bMonth !== aMonth) return bMonth.localeCompare(aMonth);
-            return String(b.updatedAt || "").localeCompare(String(a.updatedAt || ""));
-        });
-
         container.innerHTML = "";
-
-        sorted.forEach((entry) => {
-            const card = document.createElement("article");
-            card.className = "changelog-card";
-
-            const month = escapeHtml(String(entry.month || ""));
-            const updatedAt = escapeHtml(String(entry.updatedAt || ""));
-            const changes = Array.isArray(entry.changes) ? entry.changes : [];
-
-            const rowsHtml = changes.length === 0
-                ? `<tr><td colspan="5">${escapeHtml(getTranslation("changelog_no_changes"))}</td></tr>`
-                : changes.map((change) => {
-                    const beforeValue = formatChangeValue(change.before);
-                    const afterValue = formatChangeValue(change.after);
-
-                    return `
-                        <tr>
-                            <td>${escapeHtml(String(change.code || "-"))}</td>
-                            <td>${escapeHtml(String(change.name || "-"))}</td>
-                            <td>${escapeHtml(String(change.field || "-"))}</td>
-                            <td class="text-right">${beforeValue}</td>
-                            <td class="text-right">${afterValue}</td>
-                        </tr>
-                    `;
-                }).join("");
-
-            card.innerHTML = `
-                <header class="changelog-head">
-                    <h3>${month}</h3>
-                    <p>${getTranslation("changelog_updated_at")} ${updatedAt}</p>
-                </header>
-                <div class="table-container">
-                    <table class="data-table changelog-table">
-                        <thead>
-                            <tr>
-                                <th>${getTranslation("table_code")}</th>
-                                <th>${getTranslation("table_name")}</th>
-                                <th>${getTranslation("changelog_field")}</th>
-                                <th>${getTranslation("changelog_before")}</th>
-                                <th>${getTranslation("changelog_after")}</th>
-                            </tr>
-                        </thead>
-                        <tbody>${rowsHtml}</tbody>
-                    </table>
-                </div>
-            `;
-
-            container.appendChild(card);
+        sortChangelogEntries(data).forEach((entry) => {
+            container.appendChild(createChangelogCard(entry));
         });
     } catch (error) {
         console.error("Failed to render changelog:", error);
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""Backfill the historical stores from a stack of old KOFIA workbooks.
+
+Each '펀드별 보수비용비교_YYYYMMDD.xls' (or .xlsx) is dated by the YYYYMMDD in its
+name, then loaded, normalized and matched against the managed list in a process
+pool. Per date this writes:
+
+    history/kofia/date=YYYY-MM-DD/        normalized KOFIA fee table (kofia_archive)
+    history/etf_timeseries.sqlite         the matched rows (etf_timeseries.upsert_day)
+
+and finally rebuilds the changelog entries of the affected date range from the
+time-series store (build_changelog backfill) plus its shards and latest file.
+
+    python scripts/backfill_kofia.py ~/kofia_exports
+    python scripts/backfill_kofia.py "exports/펀드별 보수비용비교_2025*.xls" --managed managed.tsv
+
+Workbooks with the same date keep the most recently modified one. Backfilled rows
+carry no market data; AUM/거래량 already stored for a date are kept.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import glob
+import io
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import build_changelog  # noqa: E402
+import etf_timeseries  # noqa: E402
+import etl_process  # noqa: E402
+import kofia_archive  # noqa: E402
+
+WORKBOOK_SUFFIXES = (".xls", ".xlsx")
+DATE_IN_NAME = re.compile(r"(?<!\d)(\d{8})(?!\d)")
+MANAGED_COLUMNS = ["구분", "종목코드", "종목명", "표준코드", "펀드명"]
+
+# Set once per worker process by init_worker, so the managed list is pickled per
+# worker instead of per workbook.
+_managed_df: pd.DataFrame | None = None
+
+
+def date_from_name(path: Path) -> str | None:
+    """'펀드별 보수비용비교_20260211 (1).xls' -> '2026-02-11'; None without a valid date."""
+    for match in reversed(DATE_IN_NAME.findall(path.stem)):
+        try:
+            return datetime.strptime(match, "%Y%m%d").strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    return None
+
+
+def find_workbooks(sources: list[str]) -> dict[str, Path]:
+    """Maps each date to its workbook, given directories and/or glob patterns."""
+    paths: list[Path] = []
+    for source in sources:
+        if os.path.isdir(source):
+            paths += [p for p in Path(source).iterdir() if p.suffix.lower() in WORKBOOK_SUFFIXES]
+        else:
+            paths += [Path(p) for p in glob.glob(source) if Path(p).suffix.lower() in WORKBOOK_SUFFIXES]
+
+    by_date: dict[str, Path] = {}
+    for path in sorted(set(paths)):
+        run_date = date_from_name(path)
+        if run_date is None:
+            print(f"[backfill] skip {path}: no YYYYMMDD date in the file name")
+            continue
+        kept = by_date.get(run_date)
+        if kept is not None:
+            newer, older = (path, kept) if path.stat().st_mtime >= kept.stat().st_mtime else (kept, path)
+            print(f"[backfill] {run_date}: using {newer.name}, ignoring {older.name}")
+            path = newer
+        by_date[run_date] = path
+    return dict(sorted(by_date.items()))
+
+
+def load_managed_list(path: Path | None) -> pd.DataFrame:
+    """The managed list from a .tsv/.csv/.json export, or the ETL's (cached) GAS list."""
+    if path is None:
+        return etl_process.fetch_managed_items()
+    if path.suffix.lower() == ".json":
+        df = pd.read_json(path, dtype=False)
+    else:
+        df = pd.read_csv(path, sep="\t" if path.suffix.lower() == ".tsv" else ",", dtype=str, keep_default_na=False)
+    missing = [col for col in ("구분", "종목코드", "종목명", "표준코드") if col not in df.columns]
+    if missing:
+        raise ValueError(f"{path} has no {', '.join(missing)} column")
+    return df.reindex(columns=MANAGED_COLUMNS).fillna("").astype(str)
+
+
+def init_worker(managed_records: list[dict[str, Any]]) -> None:
+    global _managed_df
+    _managed_df = pd.DataFrame(managed_records, columns=MANAGED_COLUMNS)
+
+
+def process_workbook(run_date: str, path: str, archive_root: str) -> dict[str, Any]:
+    """
+    Worker: loads and matches one workbook and writes its archive partition.
+    Returns the matched records and the match summary.
+    """
+    started = time.perf_counter()
+    report: dict[str, Any] = {}
+    # The ETL functions print per-file progress; keep the pool's output to one line per date.
+    with contextlib.redirect_stdout(io.StringIO()):
+        table = etl_process.load_kofia_table(path)
+        records = etl_process.process_data(_managed_df, table, report)
+    kofia_archive.write_snapshot(
+        etl_process.kofia_fee_frame(table),
+        run_date,
+        etl_process.sha256_file(path),
+        root=Path(archive_root),
+    )
+    return {
+        "date": run_date,
+        "records": records,
+        "kofiaRows": len(table),
+        "matched": len(records),
+        "missing": len(report.get("missing", [])),
+        "seconds": time.perf_counter() - started,
+    }
+
+
+def rebuild_changelog(dates: list[str]) -> int:
+    """
+    Rebuilds the changelog entries touched by `dates`: from the stored date before
+    the first one through the stored date after the last one.
+    """
+    conn = etf_timeseries.connect()
+    try:
+        stored = etf_timeseries.list_dates(conn)
+    finally:
+        conn.close()
+    start = max((d for d in stored if d < dates[0]), default=dates[0])
+    end = min((d for d in stored if d > dates[-1]), default=dates[-1])
+
+    entries = build_changelog.backfill_entries(build_changelog.read_store_history(start, end))
+    existing = build_changelog.read_json_file(build_changelog.CHANGELOG_FILE, [])
+    if not isinstance(existing, list):
+        existing = []
+    # Entries in (start, end] are replaced wholesale: a date whose diff is now empty must drop its old entry.
+    kept = [e for e in existing if isinstance(e, dict) and not (start < str(e.get("updatedAt")) <= end)]
+    merged = build_changelog.merge_entries(kept, entries)
+    build_changelog.write_changelog(merged)
+    build_changelog.write_artifacts(merged)
+    print(f"[backfill] changelog: {len(entries)} entries for {start}..{end}")
+    return len(entries)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Backfill the KOFIA archive, time-series store and changelog.")
+    parser.add_argument("sources", nargs="+", help="Directories and/or glob patterns of dated KOFIA workbooks.")
+    parser.add_argument("--managed", type=Path, help="Managed list (.tsv/.csv/.json; default: cached GAS list).")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes (default: %(default)s)")
+    parser.add_argument("--since", help="Skip workbooks dated before this (YYYY-MM-DD).")
+    parser.add_argument("--until", help="Skip workbooks dated after this (YYYY-MM-DD).")
+    parser.add_argument("--archive-root", type=Path, default=kofia_archive.ARCHIVE_DIR, help="(default: %(default)s)")
+    parser.add_argument("--no-changelog", action="store_true", help="Only fill the archive and the time-series store.")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    workbooks = {
+        run_date: path
+        for run_date, path in find_workbooks(args.sources).items()
+        if (not args.since or run_date >= args.since) and (not args.until or run_date <= args.until)
+    }
+    if not workbooks:
+        print("[backfill] no dated KOFIA workbooks found")
+        return 1
+
+    managed_df = load_managed_list(args.managed)
+    managed_records = managed_df.reindex(columns=MANAGED_COLUMNS).fillna("").to_dict("records")
+    workers = max(1, min(args.workers or 1, len(workbooks)))
+    print(f"[backfill] {len(workbooks)} workbooks ({min(workbooks)}..{max(workbooks)}), "
+          f"{len(managed_records)} managed items, {workers} workers")
+
+    started = time.perf_counter()
+    results: dict[str, dict[str, Any]] = {}
+    failed: list[str] = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(managed_records,)) as pool:
+        futures = {
+            pool.submit(process_workbook, run_date, str(path), str(args.archive_root)): run_date
+            for run_date, path in workbooks.items()
+        }
+        for future in as_completed(futures):
+            run_date = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"[backfill] {run_date}: FAILED ({workbooks[run_date].name}: {e})")
+                failed.append(run_date)
+                continue
+            if not result["matched"]:
+                print(f"[backfill] {run_date}: FAILED (no managed item matched in {workbooks[run_date].name})")
+                failed.append(run_date)
+                continue
+            results[run_date] = result
+            print(f"[backfill] {run_date}: {result['kofiaRows']} KOFIA rows, {result['matched']} matched, "
+                  f"{result['missing']} missing ({result['seconds']:.2f}s)")
+
+    # SQLite has a single writer, so the store is filled here, in date order.
+    dates = sorted(results)
+    if dates:
+        conn = etf_timeseries.connect()
+        try:
+            for run_date in dates:
+                etf_timeseries.upsert_day(conn, run_date, results[run_date]["records"], keep_missing=True)
+        finally:
+            conn.close()
+        print(f"[backfill] stored {len(dates)} dates in {etf_timeseries.STORE_FILE}")
+        if not args.no_changelog:
+            rebuild_changelog(dates)
+
+    print(f"[backfill] done in {time.perf_counter() - started:.2f}s: {len(dates)} dates, {len(failed)} failed")
+    if failed:
+        print(f"[backfill] failed dates: {', '.join(sorted(failed))}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""Offline benchmarks of the ETL hot paths against stored baselines.
+
+Cases (fixtures from synth_kofia.py, cached under --fixtures):
+
+    process_data/<rows>.<fmt>   workbook load + match of a 500-item managed list
+    match/<rows>x<managed>      process_data on a loaded 10k table, managed list of 50-5000
+    market_merge/<managed>      merge_market_data on a parsed NAVER map
+    build_changes/<rows>        scripts/build_changelog.build_changes on two snapshots
+
+Each case is timed `--repeat` times; the fastest run (least affected by other load
+on the machine) is compared with the baseline file. A case slower than
+baseline * (1 + --tolerance) by more than --min-delta-ms is a regression and the
+script exits with 1, as it does when the baseline file has no timings.
+--save-baseline records the current timings instead.
+
+Baselines are tracked in scripts/bench_baselines.json. They are machine-specific:
+re-record them on the same kind of machine after an intended speed change. The
+workflow's bench job runs on GitHub-hosted runners, which are not that machine,
+so there it only reports (the step may fail without failing the job); run the
+gate locally before merging a change to a hot path.
+
+    python scripts/bench_etl.py --max-rows 10000
+    python scripts/bench_etl.py --max-rows 10000 --save-baseline
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import build_changelog  # noqa: E402
+import synth_kofia  # noqa: E402
+from etl_process import load_kofia_table, merge_market_data, process_data  # noqa: E402
+
+FIXTURE_DIR = Path(".bench/fixtures")
+BASELINE_FILE = Path(__file__).resolve().parent / "bench_baselines.json"
+WORKBOOK_ROWS = [1000, 10000, 100000]
+MANAGED_SIZES = [50, 500, 5000]
+CHANGELOG_ROWS = [500, 5000, 50000]
+MATCH_TABLE_ROWS = 10000
+MIN_SAMPLE_SECONDS = 0.05
+
+
+def quiet(fn: Callable[[], Any]) -> Callable[[], Any]:
+    """Runs fn with stdout discarded (the ETL functions print progress)."""
+
+    def run() -> Any:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return fn()
+
+    return run
+
+
+def time_case(fn: Callable[[], Any], repeat: int) -> dict[str, float]:
+    started = time.perf_counter()
+    fn()  # warm-up: imports, page cache
+    # Sub-millisecond cases are looped so one sample is not mostly timer and scheduler noise.
+    loops = max(1, int(MIN_SAMPLE_SECONDS / max(time.perf_counter() - started, 1e-6)))
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        samples.append((time.perf_counter() - started) / loops)
+    return {
+        "median_ms": round(statistics.median(samples) * 1000, 3),
+        "min_ms": round(min(samples) * 1000, 3),
+    }
+
+
+def workbook_fixture(fixtures: Path, rows: int, fmt: str, seed: int) -> Path | None:
+    path = fixtures / f"kofia_{rows}_s{seed}.{fmt}"
+    if not path.exists():
+        if fmt == "xls" and rows > synth_kofia.XLS_MAX_DATA_ROWS:
+            return None
+        synth_kofia.write_kofia_workbook(path, synth_kofia.make_funds(rows, seed), seed)
+    return path
+
+
+def changelog_snapshots(rows: int, seed: int) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    """Two data.json-shaped snapshots: ~5% fee changes, ~1% added, ~1% removed, a few renames."""
+    rng = random.Random(seed)
+    funds = synth_kofia.make_funds(rows, seed)
+
+    def record(fund: dict[str, Any]) -> dict[str, Any]:
+        total = round(fund["합계(A)"], 4)
+        other = round(fund["기타비용(B)"], 4)
+        sell = round(fund["매매·중개수수료율(C)"], 4)
+        return {
+            "구분": fund["구분"],
+            "종목코드": fund["종목코드"],
+            "종목명": fund["종목명"],
+            "총보수": total,
+            "기타비용": other,
+            "매매중개수수료": sell,
+            "실부담비용": round(total + other + sell, 4),
+        }
+
+    prev = [record(fund) for fund in funds]
+    curr = []
+    for row in prev:
+        roll = rng.random()
+        if roll < 0.01:
+            continue  # removed
+        row = dict(row)
+        if roll < 0.06:
+            row["총보수"] = round(row["총보수"] * 0.9, 4)
+            row["실부담비용"] = round(row["총보수"] + row["기타비용"] + row["매매중개수수료"], 4)
+        elif roll < 0.065:
+            row["종목명"] += " (H)"
+        curr.append(row)
+    curr += [record(fund) for fund in synth_kofia.make_funds(max(rows // 100, 1), seed + 1)]
+    return prev, curr
+
+
+def build_cases(args: argparse.Namespace) -> dict[str, Callable[[], Any]]:
+    fixtures = args.fixtures
+    seed = args.seed
+    cases: dict[str, Callable[[], Any]] = {}
+
+    for rows in [r for r in WORKBOOK_ROWS if r <= args.max_rows]:
+        funds = synth_kofia.make_funds(rows, seed)
+        managed = synth_kofia.make_managed_items(funds, 500, seed)
+        for fmt in ("xls", "xlsx"):
+            path = workbook_fixture(fixtures, rows, fmt, seed)
+            if path is None:
+                print(f"[bench] skip process_data/{rows}.{fmt}: .xls holds at most {synth_kofia.XLS_MAX_DATA_ROWS} rows")
+                continue
+            cases[f"process_data/{rows}.{fmt}"] = quiet(lambda m=managed, p=str(path): process_data(m, p))
+
+    table_rows = min(MATCH_TABLE_ROWS, args.max_rows)
+    funds = synth_kofia.make_funds(table_rows, seed)
+    table = quiet(lambda: load_kofia_table(str(workbook_fixture(fixtures, table_rows, "xlsx", seed))))()
+    for count in MANAGED_SIZES:
+        managed = synth_kofia.make_managed_items(funds, count, seed)
+        cases[f"match/{table_rows}x{count}"] = quiet(lambda m=managed: process_data(m, table))
+
+    # The NAVER payload is parsed once: json.loads of the full list would otherwise
+    # dominate every size and hide the merge itself.
+    items = synth_kofia.make_naver_payload(funds, seed)["result"]["etfItemList"]
+    naver_map = {item["itemcode"]: item for item in items if item.get("itemcode")}
+    for count in MANAGED_SIZES:
+        records = quiet(lambda: process_data(synth_kofia.make_managed_items(funds, count, seed), table))()
+
+        def market_merge(records: list[dict[str, Any]] = records) -> None:
+            merge_market_data([dict(r) for r in records], naver_map)
+
+        cases[f"market_merge/{count}"] = quiet(market_merge)
+
+    for rows in [r for r in CHANGELOG_ROWS if r <= args.max_rows]:
+        prev, curr = changelog_snapshots(rows, seed)
+        cases[f"build_changes/{rows}"] = lambda p=prev, c=curr: build_changelog.build_changes(p, c)
+
+    if args.case:
+        cases = {name: fn for name, fn in cases.items() if any(pattern in name for pattern in args.case)}
+    return cases
+
+
+def compare(
+    results: dict[str, dict[str, float]],
+    baselines: dict[str, dict[str, float]],
+    tolerance: float,
+    min_delta_ms: float,
+) -> list[str]:
+    regressions = []
+    print(f"{'case':32} {'min ms':>11} {'baseline':>11} {'ratio':>7}")
+    for name, result in results.items():
+        base = baselines.get(name)
+        if not base:
+            print(f"{name:32} {result['min_ms']:11.2f} {'-':>11} {'new':>7}")
+            continue
+        ratio = result["min_ms"] / base["min_ms"] if base["min_ms"] else float("inf")
+        regressed = (
+            result["min_ms"] > base["min_ms"] * (1 + tolerance)
+            and result["min_ms"] - base["min_ms"] > min_delta_ms
+        )
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{name:32} {result['min_ms']:11.2f} {base['min_ms']:11.2f} {ratio:6.2f}x{flag}")
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark process_data, the market merge and build_changes.")
+    parser.add_argument("--fixtures", type=Path, default=FIXTURE_DIR, help="Fixture cache (default: %(default)s)")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE, help="Baseline file (default: %(default)s)")
+    parser.add_argument("--save-baseline", action="store_true", help="Record the timings as the new baseline.")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per case (default: %(default)s)")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown ratio (default: %(default)s)")
+    parser.add_argument(
+        "--min-delta-ms",
+        type=float,
+        default=5.0,
+        help="Slowdowns smaller than this are noise (default: %(default)s)",
+    )
+    parser.add_argument("--max-rows", type=int, default=100000, help="Skip workbook/changelog sizes above this.")
+    parser.add_argument("--case", action="append", help="Only run cases whose name contains this. May be repeated.")
+    parser.add_argument("--seed", type=int, default=1)
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    cases = build_cases(args)
+
+    results = {}
+    for name, fn in cases.items():
+        results[name] = time_case(fn, args.repeat)
+        print(f"[bench] {name}: min {results[name]['min_ms']:.2f} ms, median {results[name]['median_ms']:.2f} ms")
+
+    stored = build_changelog.read_json_file(args.baseline, {})
+    if args.save_baseline:
+        stored.update({
+            "machine": f"{platform.node()} / {platform.python_version()} / {platform.machine()}",
+            "cases": {**stored.get("cases", {}), **results},
+        })
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(stored, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"[bench] saved {len(results)} baselines to {args.baseline}")
+        return 0
+
+    if not stored.get("cases"):
+        print(f"[bench] no baselines in {args.baseline}; record them with --save-baseline")
+        return 1
+    regressions = compare(results, stored.get("cases", {}), args.tolerance, args.min_delta_ms)
+    if regressions:
+        print(f"[bench] {len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Compare the single-pass KOFIA loader against the legacy double pd.read_excel."""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from etl_process import load_kofia_table  # noqa: E402
+
+
+def legacy_double_read(file_path: str) -> pd.DataFrame:
+    """The loader process_data used before: header scan read + full object read."""
+    df_raw = pd.read_excel(file_path, header=None)
+
+    header_idx = 0
+    for i, row in df_raw.head(10).iterrows():
+        row_str = row.astype(str).values
+        if any("(A)" in s for s in row_str) and any("합계" in s for s in row_str):
+            header_idx = i
+            break
+
+    df = pd.read_excel(file_path, header=header_idx)
+    df.columns = df.columns.astype(str).str.replace("\n", "").str.replace("\r", "").str.strip()
+    return df
+
+
+def measure(fn: Callable[[str], Any], file_path: str, repeat: int) -> tuple[float, float]:
+    """Returns (best wall seconds, peak traced MiB) over `repeat` runs."""
+    best = float("inf")
+    peak = 0
+    for _ in range(repeat):
+        tracemalloc.start()
+        started = time.perf_counter()
+        fn(file_path)
+        best = min(best, time.perf_counter() - started)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return best, peak / (1024 * 1024)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("workbook", nargs="+", help="KOFIA .xls/.xlsx export(s) to load.")
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="Runs per loader; the best time is reported (default: %(default)s)",
+    )
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+
+    for workbook in args.workbook:
+        legacy_time, legacy_mem = measure(legacy_double_read, workbook, args.repeat)
+        new_time, new_mem = measure(load_kofia_table, workbook, args.repeat)
+        print(f"[bench] {workbook}")
+        print(f"  legacy double read : {legacy_time:8.3f}s  peak {legacy_mem:8.1f} MiB")
+        print(f"  single-pass loader : {new_time:8.3f}s  peak {new_mem:8.1f} MiB")
+        print(
+            f"  ratio              : {new_time / legacy_time:8.2f}x time"
+            f"  {new_mem / legacy_mem if legacy_mem else 0:8.2f}x memory"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
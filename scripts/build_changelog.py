@@ -1,16 +1,33 @@
 ﻿#!/usr/bin/env python3
-"""Generate changelog.json by diffing current data.json against HEAD:data.json."""
+"""Generate changelog.json by diffing data.json against the previous snapshot.
+
+The previous snapshot is history/changelog-base.json, which is refreshed on every
+run (HEAD:data.json is only consulted once, when that file does not exist yet).
+Two dates of the time-series store can be compared instead, and a changelog can
+be backfilled across every stored date in one pass.
+"""
 
 from __future__ import annotations
 
+import argparse
 import json
 import subprocess
+import sys
 from datetime import datetime
 from pathlib import Path
 from typing import Any
 
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
 DATA_FILE = Path("data.json")
 CHANGELOG_FILE = Path("changelog.json")
+BASE_FILE = Path("history/changelog-base.json")
+SHARD_DIR = Path("changelog/shards")
+MANIFEST_FILE = SHARD_DIR / "manifest.json"
+LATEST_FILE = Path("changelog-latest.json")
 
 FIELDS = [
     "총보수",
@@ -45,6 +62,19 @@ def read_previous_data_from_git() -> list[dict[str, Any]]:
         return []
 
 
+def read_previous_data() -> list[dict[str, Any]]:
+    previous = read_json_file(BASE_FILE, None)
+    if isinstance(previous, list):
+        return previous
+    # First run after the switch to a persisted base: bootstrap from git once.
+    return read_previous_data_from_git()
+
+
+def write_base(rows: list[dict[str, Any]]) -> None:
+    BASE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    BASE_FILE.write_text(json.dumps(rows, ensure_ascii=False) + "\n", encoding="utf-8")
+
+
 def to_float(value: Any) -> float | None:
     if value is None:
         return None
@@ -58,58 +88,260 @@ def to_float(value: Any) -> float | None:
         return None
 
 
-def row_key(row: dict[str, Any]) -> tuple[str, str]:
-    code = str(row.get("종목코드", "")).strip()
-    name = str(row.get("종목명", "")).strip()
-    return code, name
-
-
-def make_index(rows: list[dict[str, Any]]) -> dict[tuple[str, str], dict[str, Any]]:
-    index: dict[tuple[str, str], dict[str, Any]] = {}
+def to_frame(rows: list[dict[str, Any]], key: Any = 0) -> pd.DataFrame:
+    """
+    Snapshot rows -> DataFrame of 종목코드, 종목명 and FIELDS (float64), tagged with
+    a snapshot `key` column (a row's own "key" wins). Rows without a code are
+    dropped; the last row wins when a code repeats within one snapshot.
+    """
+    codes = [row.get("종목코드") for row in rows]
+    names = [row.get("종목명") for row in rows]
+    columns: dict[str, Any] = {
+        "key": [row.get("key", key) for row in rows],
+        "종목코드": ["" if value is None else str(value).strip() for value in codes],
+        "종목명": ["" if value is None else str(value).strip() for value in names],
+    }
+    for field in FIELDS:
+        raw = [row.get(field) for row in rows]
+        try:
+            # data.json fees are numbers or null: one C-level conversion, None -> NaN.
+            columns[field] = np.array(raw, dtype="float64")
+        except (TypeError, ValueError):
+            # Only text values ("1,234", "0.05%") need cleaning.
+            values = pd.Series(raw, dtype=object)
+            cleaned = values.astype(str).str.replace(",", "", regex=False).str.replace("%", "", regex=False).str.strip()
+            columns[field] = pd.to_numeric(cleaned.where(values.notna()), errors="coerce").astype("float64")
+
+    frame = pd.DataFrame(columns)
+    return frame[frame["종목코드"] != ""].drop_duplicates(["key", "종목코드"], keep="last")
+
+
+def _none_if_nan(value: Any) -> float | None:
+    return None if pd.isna(value) else float(value)
+
+
+def _empty_diff() -> dict[str, list[dict[str, Any]]]:
+    return {"changes": [], "added": [], "removed": [], "renamed": []}
+
+
+def diff_frames(prev: pd.DataFrame, curr: pd.DataFrame) -> dict[Any, dict[str, list[dict[str, Any]]]]:
+    """
+    Compares snapshots keyed by (key, 종목코드) in one vectorized pass: a `prev` row
+    with key K is compared with the `curr` row with the same key and 종목코드.
+    Returns {key: {"changes", "added", "removed", "renamed"}}.
+    """
+    prev_index = pd.MultiIndex.from_arrays([prev["key"], prev["종목코드"]])
+    curr_index = pd.MultiIndex.from_arrays([curr["key"], curr["종목코드"]])
+    # Outer join on (key, 종목코드) through positional indexers, in (key, code) order.
+    joined = prev_index.union(curr_index, sort=None).sort_values()
+    prev_pos = prev_index.get_indexer(joined)
+    curr_pos = curr_index.get_indexer(joined)
+    in_prev = prev_pos >= 0
+    in_curr = curr_pos >= 0
+    both = in_prev & in_curr
+    only_prev = in_prev & ~in_curr
+    only_curr = in_curr & ~in_prev
+
+    keys = joined.get_level_values(0).to_numpy(dtype=object)
+    codes = joined.get_level_values(1).to_numpy(dtype=object)
+
+    def take(frame: pd.DataFrame, pos: np.ndarray, columns: list[str], fill: Any, dtype: Any) -> np.ndarray:
+        values = frame[columns].to_numpy(dtype=dtype)
+        out = np.full((len(pos), len(columns)), fill, dtype=dtype)
+        out[pos >= 0] = values[pos[pos >= 0]]
+        return out
+
+    name_prev = take(prev, prev_pos, ["종목명"], None, object)[:, 0]
+    name_curr = take(curr, curr_pos, ["종목명"], None, object)[:, 0]
+    before = take(prev, prev_pos, FIELDS, np.nan, float)
+    after = take(curr, curr_pos, FIELDS, np.nan, float)
+    # Changed when not both missing and not equal (a value appearing/disappearing counts).
+    changed = both[:, None] & ~(np.isnan(before) & np.isnan(after)) & ~(before == after)
+
+    result: dict[Any, dict[str, list[dict[str, Any]]]] = {}
+
+    def bucket(i: int) -> dict[str, list[dict[str, Any]]]:
+        return result.setdefault(keys[i], _empty_diff())
+
+    # Row-major nonzero keeps (key, code) order, then FIELDS order within a code.
+    for r, c in zip(*np.nonzero(changed)):
+        bucket(r)["changes"].append(
+            {
+                "code": codes[r],
+                "name": name_curr[r],
+                "field": FIELDS[c],
+                "before": _none_if_nan(before[r, c]),
+                "after": _none_if_nan(after[r, c]),
+            }
+        )
+    for i in np.flatnonzero(only_curr):
+        bucket(i)["added"].append({"code": codes[i], "name": name_curr[i]})
+    for i in np.flatnonzero(only_prev):
+        bucket(i)["removed"].append({"code": codes[i], "name": name_prev[i]})
+    for i in np.flatnonzero(both & (name_prev != name_curr)):
+        bucket(i)["renamed"].append({"code": codes[i], "before": name_prev[i], "after": name_curr[i]})
+    return result
 
-    for row in rows:
-        key = row_key(row)
-        if not key[0] and not key[1]:
-            continue
-        index[key] = row
 
-    return index
+def build_diff(
+    prev_rows: list[dict[str, Any]],
+    curr_rows: list[dict[str, Any]],
+) -> dict[str, list[dict[str, Any]]]:
+    if not prev_rows:
+        # Nothing to compare against: don't report the whole list as added.
+        return _empty_diff()
+    return diff_frames(to_frame(prev_rows), to_frame(curr_rows)).get(0, _empty_diff())
 
 
 def build_changes(
     prev_rows: list[dict[str, Any]],
     curr_rows: list[dict[str, Any]],
 ) -> list[dict[str, Any]]:
-    prev_index = make_index(prev_rows)
-    curr_index = make_index(curr_rows)
+    return build_diff(prev_rows, curr_rows)["changes"]
+
+
+def make_entry(updated_at: str, diff: dict[str, list[dict[str, Any]]]) -> dict[str, Any]:
+    entry: dict[str, Any] = {
+        "month": updated_at[:7],
+        "updatedAt": updated_at,
+        "changes": diff["changes"],
+    }
+    # Membership events are only written when present, so existing entries keep their shape.
+    for key in ("added", "removed", "renamed"):
+        if diff.get(key):
+            entry[key] = diff[key]
+    return entry
+
+
+def has_events(diff: dict[str, list[dict[str, Any]]]) -> bool:
+    return any(diff.get(key) for key in ("changes", "added", "removed", "renamed"))
+
+
+def backfill_entries(history: pd.DataFrame) -> list[dict[str, Any]]:
+    """
+    Builds one changelog entry per date from a long table of daily snapshots
+    (date, 종목코드, 종목명, FIELDS...). Every snapshot is shifted onto the next
+    stored date and all consecutive-date pairs are diffed in a single pass.
+    """
+    dates = sorted(history["date"].unique())
+    if len(dates) < 2:
+        return []
+
+    ordinal = {value: i for i, value in enumerate(dates)}
+    frame = to_frame(history.assign(key=history["date"].map(ordinal)).to_dict("records"))
+    prev = frame[frame["key"] < len(dates) - 1].assign(key=lambda f: f["key"] + 1)
+    curr = frame[frame["key"] > 0]
+
+    diffs = diff_frames(prev, curr)
+    return [make_entry(dates[key], diffs[key]) for key in sorted(diffs) if has_events(diffs[key])]
+
+
+def read_store_day(run_date: str) -> list[dict[str, Any]]:
+    import etf_timeseries
+
+    conn = etf_timeseries.connect()
+    try:
+        return etf_timeseries.query_range(conn, start=run_date, end=run_date)
+    finally:
+        conn.close()
+
+
+def read_store_history(start: str | None, end: str | None) -> pd.DataFrame:
+    import etf_timeseries
+
+    conn = etf_timeseries.connect()
+    try:
+        return pd.DataFrame(etf_timeseries.query_range(conn, start=start, end=end))
+    finally:
+        conn.close()
 
-    changes: list[dict[str, Any]] = []
 
-    for key, curr_row in curr_index.items():
-        prev_row = prev_index.get(key)
-        if not prev_row:
-            continue
+def merge_entries(existing: list[dict[str, Any]], new_entries: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Replaces entries with the same updatedAt and keeps the list in date order."""
+    by_date = {entry.get("updatedAt"): entry for entry in existing if isinstance(entry, dict)}
+    for entry in new_entries:
+        by_date[entry["updatedAt"]] = entry
+    return [by_date[key] for key in sorted(by_date, key=lambda value: str(value))]
 
-        for field in FIELDS:
-            before = to_float(prev_row.get(field))
-            after = to_float(curr_row.get(field))
 
-            if before is None and after is None:
+def dumps_compact(payload: Any) -> str:
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+def write_if_changed(path: Path, serialized: str) -> bool:
+    if path.exists() and path.read_text(encoding="utf-8") == serialized:
+        return False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(serialized, encoding="utf-8")
+    return True
+
+
+def build_latest(entries: list[dict[str, Any]]) -> dict[str, Any]:
+    """
+    The home page's 실부담비용 badges: for the latest month, the most recent
+    실부담비용 change per code as [before, after, after - before].
+    """
+    dated = [entry for entry in entries if isinstance(entry, dict) and entry.get("month")]
+    if not dated:
+        return {"month": None, "updatedAt": None, "fields": ["before", "after", "diff"], "byCode": {}}
+
+    month = max(str(entry["month"]) for entry in dated)
+    in_month = sorted(
+        (entry for entry in dated if entry["month"] == month),
+        key=lambda entry: str(entry.get("updatedAt", "")),
+    )
+
+    by_code: dict[str, list[float]] = {}
+    for entry in in_month:
+        for change in entry.get("changes") or []:
+            if change.get("field") != "실부담비용":
+                continue
+            before = to_float(change.get("before"))
+            after = to_float(change.get("after"))
+            if before is None or after is None:
                 continue
+            by_code[str(change.get("code"))] = [before, after, round(after - before, 4)]
 
-            if before != after:
-                changes.append(
-                    {
-                        "code": key[0],
-                        "name": key[1],
-                        "field": field,
-                        "before": before,
-                        "after": after,
-                    }
-                )
+    return {
+        "month": month,
+        "updatedAt": in_month[-1].get("updatedAt"),
+        "fields": ["before", "after", "diff"],
+        "byCode": by_code,
+    }
+
+
+def write_artifacts(entries: list[dict[str, Any]]) -> None:
+    """
+    Writes per-month shards, their manifest and changelog-latest.json from the
+    full changelog. Files are only rewritten when their content changes.
+    """
+    months: dict[str, list[dict[str, Any]]] = {}
+    for entry in entries:
+        if isinstance(entry, dict) and entry.get("month"):
+            months.setdefault(str(entry["month"]), []).append(entry)
+
+    manifest_months = []
+    for month in sorted(months, reverse=True):
+        shard = sorted(months[month], key=lambda entry: str(entry.get("updatedAt", "")), reverse=True)
+        file_name = f"{month}.json"
+        write_if_changed(SHARD_DIR / file_name, dumps_compact(shard))
+        manifest_months.append(
+            {
+                "month": month,
+                "file": file_name,
+                "entries": len(shard),
+                "changes": sum(len(entry.get("changes") or []) for entry in shard),
+            }
+        )
+
+    expected = {item["file"] for item in manifest_months} | {MANIFEST_FILE.name}
+    if SHARD_DIR.exists():
+        for stale in SHARD_DIR.glob("*.json"):
+            if stale.name not in expected:
+                stale.unlink()
 
-    changes.sort(key=lambda item: (item["code"], FIELDS.index(item["field"])))
-    return changes
+    write_if_changed(MANIFEST_FILE, dumps_compact({"version": 1, "months": manifest_months}))
+    write_if_changed(LATEST_FILE, dumps_compact(build_latest(entries)))
 
 
 def write_changelog(entries: list[dict[str, Any]]) -> None:
@@ -119,19 +351,60 @@ def write_changelog(entries: list[dict[str, Any]]) -> None:
     )
 
 
-def main() -> int:
-    current_data = read_json_file(DATA_FILE, [])
-    if not isinstance(current_data, list):
-        current_data = []
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build changelog.json.")
+    parser.add_argument("--from-date", help="Compare this stored date (YYYY-MM-DD) ...")
+    parser.add_argument("--to-date", help="... against this stored date instead of data.json.")
+    parser.add_argument("--date", help="Entry date (YYYY-MM-DD) when diffing data.json (default: today).")
+    parser.add_argument(
+        "--artifacts-only",
+        action="store_true",
+        help="Only regenerate shards, manifest and changelog-latest.json from changelog.json.",
+    )
+    parser.add_argument(
+        "--backfill",
+        action="store_true",
+        help="Rebuild entries for every consecutive pair of stored dates (optionally within --from-date/--to-date).",
+    )
+    return parser.parse_args()
+
+
+def run_backfill(args: argparse.Namespace, changelog_entries: list[dict[str, Any]]) -> int:
+    history = read_store_history(args.from_date, args.to_date)
+    if history.empty:
+        print("[changelog] time-series store has no rows to backfill")
+        return 1
+
+    entries = backfill_entries(history)
+    write_changelog(merge_entries(changelog_entries, entries))
+    print(f"[changelog] backfilled {len(entries)} entries from {history['date'].nunique()} stored dates")
+    return 0
+
 
+def update_changelog(args: argparse.Namespace) -> int:
     changelog_entries = read_json_file(CHANGELOG_FILE, [])
     if not isinstance(changelog_entries, list):
         changelog_entries = []
 
-    previous_data = read_previous_data_from_git()
-    changes = build_changes(previous_data, current_data)
-
-    if not changes:
+    if args.backfill:
+        return run_backfill(args, changelog_entries)
+
+    if args.from_date and args.to_date:
+        previous_data = read_store_day(args.from_date)
+        current_data = read_store_day(args.to_date)
+        today = args.to_date
+    else:
+        current_data = read_json_file(DATA_FILE, [])
+        if not isinstance(current_data, list):
+            current_data = []
+        previous_data = read_previous_data()
+        today = args.date or datetime.now().strftime("%Y-%m-%d")
+        if current_data:
+            write_base(current_data)
+
+    diff = build_diff(previous_data, current_data)
+
+    if not has_events(diff):
         if not CHANGELOG_FILE.exists():
             write_changelog([])
             print("[changelog] created empty changelog.json")
@@ -139,22 +412,12 @@ def main() -> int:
             print("[changelog] no changes detected; kept existing changelog.json")
         return 0
 
-    today = datetime.now().strftime("%Y-%m-%d")
-    month = today[:7]
-
-    new_entry = {
-        "month": month,
-        "updatedAt": today,
-        "changes": changes,
-    }
+    new_entry = make_entry(today, diff)
+    changes = diff["changes"]
 
     if changelog_entries:
         last_entry = changelog_entries[-1]
-        if (
-            isinstance(last_entry, dict)
-            and last_entry.get("updatedAt") == today
-            and last_entry.get("changes") == changes
-        ):
+        if isinstance(last_entry, dict) and last_entry == new_entry:
             print("[changelog] latest entry already matches today's changes")
             return 0
 
@@ -166,9 +429,21 @@ def main() -> int:
 
     changelog_entries.append(new_entry)
     write_changelog(changelog_entries)
-    print(f"[changelog] appended {len(changes)} changes for {today}")
+    print(
+        f"[changelog] appended {len(changes)} changes, {len(diff['added'])} added, "
+        f"{len(diff['removed'])} removed, {len(diff['renamed'])} renamed for {today}"
+    )
     return 0
 
 
+def main() -> int:
+    args = parse_args()
+    code = 0 if args.artifacts_only else update_changelog(args)
+
+    entries = read_json_file(CHANGELOG_FILE, [])
+    write_artifacts(entries if isinstance(entries, list) else [])
+    return code
+
+
 if __name__ == "__main__":
     raise SystemExit(main())
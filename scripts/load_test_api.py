@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""Closed-loop load test of etf_read_api.py.
+
+--concurrency workers each keep one HTTP/1.1 connection open and send requests
+back to back for --duration seconds. Paths are drawn from a mix of the read
+API's endpoints, built from /categories and /etfs of the running server:
+
+    /data.json, /categories, /etfs/<code>,
+    /etfs?구분=...&sort=...&limit=..., /etfs?q=...
+
+With --revalidate (default) a worker sends If-None-Match with the ETag it got
+for a path last time, as a browser would, so most answers are 304s. The report
+gives requests/s, latency percentiles per status and the bytes received.
+
+    python etf_read_api.py --quiet &
+    python scripts/load_test_api.py http://127.0.0.1:8788 --concurrency 16 --duration 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import random
+import statistics
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Any
+from urllib.parse import quote, urlsplit
+
+SORTS = ["실부담비용", "-AUM", "-거래량", "총보수", "종목명"]
+NAME_QUERIES = ["tiger", "kodex", "ace", "미국", "s&p", "나스닥"]
+
+
+def connect(base: str) -> http.client.HTTPConnection:
+    url = urlsplit(base)
+    return http.client.HTTPConnection(url.hostname, url.port or 80, timeout=10)
+
+
+def fetch_json(base: str, path: str) -> Any:
+    conn = connect(base)
+    try:
+        conn.request("GET", path)
+        response = conn.getresponse()
+        if response.status != 200:
+            raise RuntimeError(f"GET {path}: HTTP {response.status}")
+        return json.loads(response.read())
+    finally:
+        conn.close()
+
+
+def build_paths(base: str, seed: int) -> list[str]:
+    """A weighted request mix over the data currently served."""
+    rng = random.Random(seed)
+    categories = [entry["구분"] for entry in fetch_json(base, "/categories")]
+    codes = [row["종목코드"] for row in fetch_json(base, "/etfs?limit=500")["items"]]
+    paths = ["/data.json"] * 5 + ["/categories"] * 5
+    paths += [f"/etfs/{code}" for code in rng.sample(codes, min(len(codes), 30))]
+    for category in categories:
+        for sort in SORTS:
+            paths.append(f"/etfs?{quote('구분')}={quote(category)}&sort={quote(sort)}&limit=20")
+    paths += [f"/etfs?q={quote(q)}&limit=20" for q in NAME_QUERIES]
+    paths += [f"/etfs?sort={quote(sort)}&offset={offset}&limit=20" for sort in SORTS for offset in (0, 20, 40)]
+    return paths
+
+
+class Stats:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.latencies: defaultdict[int, list[float]] = defaultdict(list)
+        self.errors: Counter[str] = Counter()
+        self.bytes = 0
+
+    def add(self, status: int, seconds: float, size: int) -> None:
+        with self.lock:
+            self.latencies[status].append(seconds)
+            self.bytes += size
+
+    def error(self, e: Exception) -> None:
+        with self.lock:
+            self.errors[type(e).__name__] += 1
+
+
+def worker(base: str, paths: list[str], deadline: float, args: argparse.Namespace, stats: Stats, seed: int) -> None:
+    rng = random.Random(seed)
+    etags: dict[str, str] = {}
+    conn = connect(base)
+    while time.perf_counter() < deadline:
+        path = rng.choice(paths)
+        headers = {"Accept-Encoding": "gzip"} if args.gzip else {}
+        if args.revalidate and path in etags:
+            headers["If-None-Match"] = etags[path]
+        started = time.perf_counter()
+        try:
+            conn.request("GET", path, headers=headers)
+            response = conn.getresponse()
+            body = response.read()
+        except (OSError, http.client.HTTPException) as e:
+            stats.error(e)
+            conn.close()
+            conn = connect(base)
+            continue
+        stats.add(response.status, time.perf_counter() - started, len(body))
+        etag = response.getheader("ETag")
+        if etag:
+            etags[path] = etag
+    conn.close()
+
+
+def percentile(sorted_values: list[float], share: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * share))]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Load-test the local ETF read API.")
+    parser.add_argument("base", nargs="?", default="http://127.0.0.1:8788", help="(default: %(default)s)")
+    parser.add_argument("--concurrency", type=int, default=8, help="(default: %(default)s)")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds (default: %(default)s)")
+    parser.add_argument("--no-revalidate", dest="revalidate", action="store_false", help="Never send If-None-Match.")
+    parser.add_argument("--no-gzip", dest="gzip", action="store_false", help="Do not send Accept-Encoding: gzip.")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    paths = build_paths(args.base, args.seed)
+    print(f"[load] {len(paths)} paths, {args.concurrency} connections, {args.duration:.0f}s "
+          f"(revalidate={args.revalidate}, gzip={args.gzip})")
+
+    stats = Stats()
+    deadline = time.perf_counter() + args.duration
+    started = time.perf_counter()
+    threads = [
+        threading.Thread(target=worker, args=(args.base, paths, deadline, args, stats, args.seed + i))
+        for i in range(args.concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    total = sum(len(values) for values in stats.latencies.values())
+    print(f"[load] {total} requests in {elapsed:.2f}s: {total / elapsed:.0f} req/s, "
+          f"{stats.bytes / elapsed / 1024:.0f} KiB/s received")
+    for status, values in sorted(stats.latencies.items()):
+        values.sort()
+        print(f"[load]   {status}: {len(values)} requests, median {statistics.median(values) * 1000:.2f} ms, "
+              f"p95 {percentile(values, 0.95) * 1000:.2f} ms, p99 {percentile(values, 0.99) * 1000:.2f} ms")
+    if stats.errors:
+        print(f"[load]   errors: {dict(stats.errors)}")
+    failed = sum(len(values) for status, values in stats.latencies.items() if status >= 400)
+    return 1 if stats.errors or failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""Local stand-in for the ETL's external services.
+
+One http.server answers the three endpoints etl_process talks to, so the HTTP
+paths can be exercised without KOFIA, Apps Script or NAVER:
+
+    POST /kofia          XMLSERVICES response built from a KOFIA workbook (KOFIA_API_URL)
+    GET  /gas?action=... getItems / getItemsVersion / result rows (GAS_WEB_APP_URL)
+    POST /gas            applyResultDelta batches (revisioned, conflict on a stale base)
+    GET  /naver          etfItemList payload (NAVER_ETF_URL)
+
+Tests start it in-process with `start(StubState(...))`; fail_next() makes the next
+requests of a route answer 503, and `requests` records (route, method, client port)
+so connection reuse is visible.
+
+    python scripts/stub_server.py kofia.xlsx managed.tsv --port 8770
+    export KOFIA_API_URL=http://127.0.0.1:8770/kofia KOFIA_FETCH_MODE=http \\
+           GAS_WEB_APP_URL=http://127.0.0.1:8770/gas NAVER_ETF_URL=http://127.0.0.1:8770/naver
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import gzip
+import hashlib
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qs, urlsplit
+from xml.sax.saxutils import escape
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import etl_process  # noqa: E402
+
+KOFIA_ROW_ELEMENT = "DISFundFeeCMSDTO"
+
+
+def kofia_response_xml(table: pd.DataFrame) -> bytes:
+    """The XMLSERVICES answer for a loaded KOFIA table: one element per fund, KOFIA field tags."""
+    columns = etl_process.resolve_kofia_columns(table.columns)
+    sources = {
+        "standardCd": columns["std_code"],
+        "fundNm": columns["fund_name"],
+        "fundFeeSum": columns["total"],
+        "etcCost": columns["other"],
+        "tradeFeeRt": columns["sell"],
+    }
+    parts = ['<?xml version="1.0" encoding="utf-8"?><message><proframeHeader/><systemHeader/>']
+    for record in table.to_dict("records"):
+        fields = "".join(
+            f"<{tag}>{escape(str(record[col]))}</{tag}>" for tag, col in sources.items() if col is not None
+        )
+        parts.append(f"<{KOFIA_ROW_ELEMENT}>{fields}</{KOFIA_ROW_ELEMENT}>")
+    parts.append("</message>")
+    return "".join(parts).encode("utf-8")
+
+
+class StubState:
+    def __init__(
+        self,
+        kofia_xml: bytes = b"",
+        managed: list[dict[str, Any]] | None = None,
+        naver: dict[str, Any] | None = None,
+    ) -> None:
+        self.kofia_xml = kofia_xml
+        self.managed = managed or []
+        self.naver = naver or {"result": {"etfItemList": []}}
+        self.gas_rows: dict[str, dict[str, Any]] = {}
+        self.gas_revision = 0
+        self.requests: list[tuple[str, str, int]] = []
+        self._failures: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def fail_next(self, route: str, count: int = 1) -> None:
+        """The next `count` requests to `route` ('kofia', 'gas', 'naver') answer 503."""
+        with self._lock:
+            self._failures[route] = self._failures.get(route, 0) + count
+
+    def take_failure(self, route: str) -> bool:
+        with self._lock:
+            if self._failures.get(route, 0) > 0:
+                self._failures[route] -= 1
+                return True
+            return False
+
+    def log(self, route: str, method: str, port: int) -> None:
+        with self._lock:
+            self.requests.append((route, method, port))
+
+    def apply_delta(self, request: dict[str, Any]) -> dict[str, Any]:
+        batch = json.loads(gzip.decompress(base64.b64decode(request["payload"])))
+        with self._lock:
+            if request.get("reset"):
+                self.gas_rows = {}
+            elif request.get("baseRevision") != self.gas_revision:
+                return {"status": "conflict", "revision": self.gas_revision}
+            for code in batch.get("delete", []):
+                self.gas_rows.pop(code, None)
+            for row in batch.get("upsert", []):
+                self.gas_rows[str(row["종목코드"])] = row
+            self.gas_revision += 1
+            return {"status": "ok", "revision": self.gas_revision}
+
+
+def make_handler(state: StubState) -> type[BaseHTTPRequestHandler]:
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _route(self, method: str) -> str | None:
+            route = urlsplit(self.path).path.strip("/").split("/")[0]
+            state.log(route, method, self.client_address[1])
+            if state.take_failure(route):
+                self._send(b"stub failure", "text/plain", status=503)
+                return None
+            return route
+
+        def do_GET(self) -> None:
+            route = self._route("GET")
+            if route is None:
+                return
+            action = parse_qs(urlsplit(self.path).query).get("action", [""])[0]
+            if route == "naver":
+                self._send_json(state.naver)
+            elif route == "gas" and action == "getItemsVersion":
+                version = hashlib.sha256(json.dumps(state.managed, ensure_ascii=False).encode("utf-8")).hexdigest()
+                self._send_json({"version": version})
+            elif route == "gas" and action == "getItems":
+                self._send_json(state.managed)
+            elif route == "gas":
+                self._send_json(list(state.gas_rows.values()))
+            else:
+                self._send(b"not found", "text/plain", status=404)
+
+        def do_POST(self) -> None:
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            route = self._route("POST")
+            if route is None:
+                return
+            if route == "kofia":
+                self._send(state.kofia_xml, "application/xml; charset=utf-8")
+            elif route == "gas":
+                request = json.loads(body or b"null")
+                if isinstance(request, dict) and request.get("action") == "applyResultDelta":
+                    self._send_json(state.apply_delta(request))
+                else:
+                    self._send(b"Success Result Update", "text/plain")
+            else:
+                self._send(b"not found", "text/plain", status=404)
+
+        def _send_json(self, payload: Any) -> None:
+            self._send(json.dumps(payload, ensure_ascii=False).encode("utf-8"), "application/json; charset=utf-8")
+
+        def _send(self, body: bytes, content_type: str, status: int = 200) -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+    return StubHandler
+
+
+def start(state: StubState, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """Serves `state` from a background thread; port 0 picks a free port. Call shutdown() to stop."""
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="stub-server", daemon=True).start()
+    return server
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Serve KOFIA/GAS/NAVER stand-ins for offline ETL runs.")
+    parser.add_argument("workbook", type=Path, help="KOFIA '펀드별 보수비용비교' .xls/.xlsx served as the XML response")
+    parser.add_argument("managed", type=Path, help="Managed list (.tsv/.csv/.json) served by getItems")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8770, help="(default: %(default)s)")
+    return parser.parse_args()
+
+
+def main() -> int:
+    import backfill_kofia
+
+    args = parse_args()
+    table = etl_process.load_kofia_table(str(args.workbook))
+    managed = backfill_kofia.load_managed_list(args.managed).to_dict("records")
+    naver = {"result": {"etfItemList": [
+        {"itemcode": item["종목코드"], "marketSum": 1000 + i, "quant": i} for i, item in enumerate(managed)
+    ]}}
+    server = start(StubState(kofia_response_xml(table), managed, naver), args.host, args.port)
+    base = f"http://{args.host}:{server.server_address[1]}"
+    print(f"[stub] {len(table)} KOFIA rows, {len(managed)} managed items on {base}")
+    print(f"export KOFIA_API_URL={base}/kofia KOFIA_FETCH_MODE=http "
+          f"GAS_WEB_APP_URL={base}/gas NAVER_ETF_URL={base}/naver")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""Synthetic KOFIA fee workbooks, managed lists and NAVER etfItemList payloads.
+
+The workbook mirrors the KOFIA '펀드별 보수비용비교' export: a title row, a base-date
+row, a grouped header row ('보수' / '수수료') and the detail header with '합계(A)',
+'기타비용(B)', 'TER(A+B)' and '매매·중개수수료율(C)', some cells with embedded
+newlines, fee cells stored as text and '-' for missing values.
+
+.xls is written with xlwt (BIFF8), which holds at most 65,536 rows per sheet, so
+larger .xls requests are refused. .xlsx is written with openpyxl in write-only mode.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+
+XLS_MAX_DATA_ROWS = 65536 - 4
+
+MANAGERS = ["미래에셋", "삼성", "KB", "한국투자", "키움", "한화", "NH-Amundi", "신한", "하나", "타임폴리오"]
+BRANDS = {
+    "미래에셋": "TIGER", "삼성": "KODEX", "KB": "RISE", "한국투자": "ACE", "키움": "KIWOOM",
+    "한화": "PLUS", "NH-Amundi": "HANARO", "신한": "SOL", "하나": "1Q", "타임폴리오": "TIMEFOLIO",
+}
+INDEXES = [
+    ("S&P500", "미국S&P500"), ("나스닥100", "미국나스닥100"), ("코스피200", "200"),
+    ("배당", "미국배당다우존스"), ("채권", "국고채10년"), ("반도체", "Fn반도체TOP10"),
+    ("금", "금현물"), ("리츠", "리츠부동산인프라"), ("2차전지", "2차전지테마"), ("TDF", "TDF2045"),
+]
+SUFFIXES = ["증권상장지수투자신탁(주식)", "증권상장지수투자신탁(주식-파생형)", "증권상장지수투자신탁(채권)"]
+
+TITLE_ROWS = [
+    ["펀드별 보수비용비교"],
+    ["기준일 : 2026-10-16", "", "", "", "", "", "", "", "", "(단위 : %)"],
+    ["", "", "", "", "", "보수", "", "", "수수료", ""],
+]
+HEADER = ["번호", "펀드명", "표준코드", "운용사", "설정일", "합계(A)", "기타비용\n(B)", "TER\n(A+B)", "선취", "매매·중개\n수수료율(C)"]
+
+
+def check_digit(body: str) -> str:
+    """ISIN (Luhn) check digit of the 11-character body, e.g. 'KR7360750'+'00'."""
+    digits = "".join(str(int(ch, 36)) for ch in body)
+    total = 0
+    for i, ch in enumerate(reversed(digits)):
+        n = int(ch) * (2 if i % 2 == 0 else 1)
+        total += n // 10 + n % 10
+    return str((10 - total % 10) % 10)
+
+
+def std_code(code: str) -> str:
+    body = f"KR7{code}00"
+    return body + check_digit(body)
+
+
+def fee_text(value: float, rng: random.Random, missing_rate: float = 0.03) -> str:
+    return "-" if rng.random() < missing_rate else f"{value:.4f}"
+
+
+def make_funds(rows: int, seed: int = 1) -> list[dict[str, Any]]:
+    """`rows` KOFIA rows with unique 6-digit 종목코드 (>= 100000) and the matching KR7 표준코드."""
+    rng = random.Random(seed)
+    codes = rng.sample(range(100000, 999999), rows)
+    funds = []
+    for i, number in enumerate(codes):
+        manager = MANAGERS[i % len(MANAGERS)]
+        category, index_name = INDEXES[rng.randrange(len(INDEXES))]
+        code = f"{number:06d}"
+        total = rng.choice([0.0068, 0.0099, 0.07, 0.09, 0.15, 0.3, 0.45]) + rng.random() / 100
+        funds.append({
+            "종목코드": code,
+            "표준코드": std_code(code),
+            "구분": category,
+            "운용사": manager,
+            "종목명": f"{BRANDS[manager]} {index_name} {i}",
+            "펀드명": f"{manager} {BRANDS[manager]} {index_name} {i}{rng.choice(SUFFIXES)}",
+            "합계(A)": total,
+            "기타비용(B)": rng.random() / 20,
+            "매매·중개수수료율(C)": rng.random() / 10,
+        })
+    return funds
+
+
+def workbook_rows(funds: list[dict[str, Any]], seed: int = 1) -> list[list[Any]]:
+    rng = random.Random(seed)
+    rows: list[list[Any]] = [row + [""] * (len(HEADER) - len(row)) for row in TITLE_ROWS]
+    rows.append(list(HEADER))
+    for i, fund in enumerate(funds, start=1):
+        total = fee_text(fund["합계(A)"], rng)
+        other = fee_text(fund["기타비용(B)"], rng)
+        ter = f"{fund['합계(A)'] + fund['기타비용(B)']:.4f}"
+        rows.append([
+            i, fund["펀드명"], fund["표준코드"], fund["운용사"], "2020-01-01",
+            total, other, ter, "-", fee_text(fund["매매·중개수수료율(C)"], rng),
+        ])
+    return rows
+
+
+def write_kofia_workbook(path: Path, funds: list[dict[str, Any]], seed: int = 1) -> Path:
+    rows = workbook_rows(funds, seed)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    if path.suffix.lower() == ".xls":
+        if len(funds) > XLS_MAX_DATA_ROWS:
+            raise ValueError(f".xls holds at most {XLS_MAX_DATA_ROWS} data rows, got {len(funds)}")
+        try:
+            import xlwt
+        except ImportError as exc:
+            raise RuntimeError("xlwt is required to write .xls fixtures (pip install xlwt)") from exc
+        book = xlwt.Workbook(encoding="utf-8")
+        sheet = book.add_sheet("Sheet1")
+        for r, row in enumerate(rows):
+            for c, value in enumerate(row):
+                sheet.write(r, c, value)
+        book.save(str(path))
+        return path
+
+    from openpyxl import Workbook
+
+    book = Workbook(write_only=True)
+    sheet = book.create_sheet("Sheet1")
+    for row in rows:
+        sheet.append(row)
+    book.save(str(path))
+    return path
+
+
+def make_managed_items(
+    funds: list[dict[str, Any]],
+    count: int,
+    seed: int = 1,
+    missing_rate: float = 0.02,
+) -> pd.DataFrame:
+    """
+    A managed list (구분, 종목코드, 종목명, 표준코드, 펀드명) of `count` items drawn
+    from `funds`; about `missing_rate` of them carry a 표준코드 KOFIA does not list.
+    """
+    rng = random.Random(seed)
+    picked = rng.sample(funds, min(count, len(funds)))
+    items = []
+    for fund in picked:
+        code = fund["표준코드"]
+        if rng.random() < missing_rate:
+            code = std_code(f"{rng.randrange(100000):06d}")  # make_funds codes start at 100000
+        items.append({
+            "구분": fund["구분"],
+            "종목코드": fund["종목코드"],
+            "종목명": fund["종목명"],
+            "표준코드": code,
+            "펀드명": "",
+        })
+    return pd.DataFrame(items, columns=["구분", "종목코드", "종목명", "표준코드", "펀드명"])
+
+
+def make_naver_payload(funds: list[dict[str, Any]], seed: int = 1, coverage: float = 0.97) -> dict[str, Any]:
+    """NAVER etfItemList response covering about `coverage` of `funds`."""
+    rng = random.Random(seed)
+    items = []
+    for fund in funds:
+        if rng.random() > coverage:
+            continue
+        price = rng.randrange(5000, 150000)
+        items.append({
+            "itemcode": fund["종목코드"],
+            "etfTabCode": rng.randrange(1, 8),
+            "itemname": fund["종목명"],
+            "nowVal": price,
+            "risefall": "2",
+            "changeVal": rng.randrange(0, 500),
+            "changeRate": round(rng.uniform(-3, 3), 2),
+            "nav": price + rng.uniform(-50, 50),
+            "threeMonthEarnRate": round(rng.uniform(-20, 20), 4),
+            "quant": rng.randrange(0, 5_000_000),
+            "amonut": rng.randrange(0, 500_000),
+            "marketSum": rng.randrange(50, 200_000),
+        })
+    return {"resultCode": "success", "result": {"etfItemTabCode": [], "etfItemList": items}}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Write synthetic KOFIA / managed-list / NAVER fixtures.")
+    parser.add_argument("--out", type=Path, default=Path(".bench/fixtures"), help="Output directory (default: %(default)s)")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--formats", nargs="+", default=["xls", "xlsx"], choices=["xls", "xlsx"])
+    parser.add_argument("--managed", type=int, nargs="+", default=[50, 500, 5000])
+    parser.add_argument("--seed", type=int, default=1)
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    for rows in args.rows:
+        funds = make_funds(rows, args.seed)
+        for fmt in args.formats:
+            path = args.out / f"kofia_{rows}.{fmt}"
+            try:
+                write_kofia_workbook(path, funds, args.seed)
+            except ValueError as exc:
+                print(f"[synth] skip {path}: {exc}")
+                continue
+            print(f"[synth] {path} ({path.stat().st_size} bytes)")
+
+        for count in args.managed:
+            if count > rows:
+                continue
+            path = args.out / f"managed_{rows}_{count}.tsv"
+            make_managed_items(funds, count, args.seed).to_csv(path, sep="\t", index=False)
+            print(f"[synth] {path}")
+
+        path = args.out / f"naver_{rows}.json"
+        path.write_text(json.dumps(make_naver_payload(funds, args.seed), ensure_ascii=False), encoding="utf-8")
+        print(f"[synth] {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,22 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "scripts"))
+
+import stub_server  # noqa: E402
+
+
+@pytest.fixture
+def stub():
+    """A fresh stub_server on a free port; yields (state, base URL)."""
+    state = stub_server.StubState()
+    server = stub_server.start(state)
+    try:
+        yield state, f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,63 @@
+import json
+import os
+import sys
+
+import backfill_kofia
+import build_changelog
+import etf_timeseries
+import kofia_archive
+import synth_kofia
+
+
+def test_date_from_name_and_duplicates(tmp_path):
+    assert backfill_kofia.date_from_name(tmp_path / "펀드별 보수비용비교_20260211 (1).xls") == "2026-02-11"
+    assert backfill_kofia.date_from_name(tmp_path / "export_20261341.xls") is None
+
+    older = tmp_path / "펀드별 보수비용비교_20260211.xls"
+    newer = tmp_path / "펀드별 보수비용비교_20260211 (1).xlsx"
+    for i, path in enumerate((older, newer, tmp_path / "notes.xlsx", tmp_path / "x_20260212.txt")):
+        path.write_bytes(b"")
+        os.utime(path, (1_700_000_000 + i, 1_700_000_000 + i))
+
+    assert backfill_kofia.find_workbooks([str(tmp_path)]) == {"2026-02-11": newer}
+
+
+def test_backfill_fills_archive_store_and_changelog(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    funds = synth_kofia.make_funds(200, seed=7)
+    managed = synth_kofia.make_managed_items(funds, 30, seed=7)
+    managed.to_csv(tmp_path / "managed.tsv", sep="\t", index=False)
+    managed_codes = set(managed["표준코드"])
+    bumped = next(f for f in funds if f["표준코드"] in managed_codes)
+
+    exports = tmp_path / "exports"
+    exports.mkdir()
+    for day, fee in (("20260105", bumped["합계(A)"]), ("20260106", bumped["합계(A)"]), ("20260107", 0.5)):
+        day_funds = [dict(f, **{"합계(A)": fee}) if f is bumped else f for f in funds]
+        synth_kofia.write_kofia_workbook(exports / f"펀드별 보수비용비교_{day}.xlsx", day_funds, seed=7)
+
+    monkeypatch.setattr(sys, "argv", ["backfill_kofia.py", str(exports), "--managed", "managed.tsv", "--workers", "2"])
+    assert backfill_kofia.main() == 0
+
+    dates = ["2026-01-05", "2026-01-06", "2026-01-07"]
+    assert kofia_archive.list_dates() == dates
+    conn = etf_timeseries.connect()
+    try:
+        assert etf_timeseries.list_dates(conn) == dates
+        stored = etf_timeseries.query_range(conn, start="2026-01-07", end="2026-01-07")
+    finally:
+        conn.close()
+    assert 0 < len(stored) <= len(managed)
+    assert {row["종목코드"] for row in stored} <= set(managed["종목코드"])
+
+    # 01-06 repeats 01-05, so only 01-07 gets an entry: the one fund whose fee changed.
+    changelog = json.loads(build_changelog.CHANGELOG_FILE.read_text(encoding="utf-8"))
+    assert [entry["updatedAt"] for entry in changelog] == ["2026-01-07"]
+    changed = {(c["code"], c["field"]) for c in changelog[0]["changes"]}
+    assert (bumped["종목코드"], "총보수") in changed
+    assert {code for code, _ in changed} == {bumped["종목코드"]}
+    assert build_changelog.MANIFEST_FILE.exists() and build_changelog.LATEST_FILE.exists()
+
+    # A rerun over the same workbooks rewrites the same entries.
+    assert backfill_kofia.main() == 0
+    assert json.loads(build_changelog.CHANGELOG_FILE.read_text(encoding="utf-8")) == changelog
@@ -0,0 +1,156 @@
+import json
+
+import pandas as pd
+
+import bench_etl
+import build_changelog
+from conftest import ROOT
+
+
+def loop_changes(prev_rows, curr_rows):
+    """The per-row loop build_changes used before diff_frames, keyed by (종목코드, 종목명)."""
+
+    def index(rows):
+        out = {}
+        for row in rows:
+            key = (str(row.get("종목코드", "")).strip(), str(row.get("종목명", "")).strip())
+            if key[0] or key[1]:
+                out[key] = row
+        return out
+
+    prev_index = index(prev_rows)
+    changes = []
+    for key, curr_row in index(curr_rows).items():
+        prev_row = prev_index.get(key)
+        if not prev_row:
+            continue
+        for field in build_changelog.FIELDS:
+            before = build_changelog.to_float(prev_row.get(field))
+            after = build_changelog.to_float(curr_row.get(field))
+            if (before is not None or after is not None) and before != after:
+                changes.append({"code": key[0], "name": key[1], "field": field, "before": before, "after": after})
+    changes.sort(key=lambda item: (item["code"], build_changelog.FIELDS.index(item["field"])))
+    return changes
+
+
+def test_changes_match_the_row_loop():
+    records = json.loads((ROOT / "data.json").read_text(encoding="utf-8"))
+    bumped = [dict(r, 총보수=round(r["총보수"] * 1.1, 4)) if i % 7 == 0 else r for i, r in enumerate(records)]
+    assert build_changelog.build_changes(records, bumped) == loop_changes(records, bumped)
+
+    for seed in (1, 2):
+        prev, curr = bench_etl.changelog_snapshots(2000, seed)
+        diff = build_changelog.build_diff(prev, curr)
+        # The loop keyed rows by name too, so it never compared a renamed fund.
+        renamed = {item["code"] for item in diff["renamed"]}
+        assert renamed
+        assert [c for c in diff["changes"] if c["code"] not in renamed] == loop_changes(prev, curr)
+
+
+def test_diff_reports_membership_events():
+    prev = [
+        {"종목코드": "000001", "종목명": "A", "총보수": 0.1, "기타비용": None},
+        {"종목코드": "000002", "종목명": "B", "총보수": "0.20%", "기타비용": "1,000"},
+        {"종목코드": "000003", "종목명": "C", "총보수": 0.3},
+        {"종목코드": "", "종목명": "no code", "총보수": 9.9},
+    ]
+    curr = [
+        {"종목코드": "000004", "종목명": "D", "총보수": 0.4},
+        {"종목코드": "000002", "종목명": "B2", "총보수": 0.25, "기타비용": 1000},
+        {"종목코드": "000001", "종목명": "A", "총보수": 0.1, "기타비용": 0.05},
+    ]
+    diff = build_changelog.build_diff(prev, curr)
+
+    assert diff["changes"] == [
+        {"code": "000001", "name": "A", "field": "기타비용", "before": None, "after": 0.05},
+        {"code": "000002", "name": "B2", "field": "총보수", "before": 0.2, "after": 0.25},
+    ]
+    assert diff["added"] == [{"code": "000004", "name": "D"}]
+    assert diff["removed"] == [{"code": "000003", "name": "C"}]
+    assert diff["renamed"] == [{"code": "000002", "before": "B", "after": "B2"}]
+    assert build_changelog.build_diff([], curr) == build_changelog._empty_diff()
+
+
+def test_backfill_matches_pairwise_diffs():
+    snapshots = {
+        "2026-01-02": [{"종목코드": "000001", "종목명": "A", "총보수": 0.1}, {"종목코드": "000002", "종목명": "B", "총보수": 0.2}],
+        "2026-01-05": [{"종목코드": "000001", "종목명": "A", "총보수": 0.1}, {"종목코드": "000002", "종목명": "B", "총보수": 0.2}],
+        "2026-01-06": [{"종목코드": "000001", "종목명": "A", "총보수": 0.15}, {"종목코드": "000003", "종목명": "C", "총보수": 0.3}],
+        "2026-01-07": [{"종목코드": "000001", "종목명": "A'", "총보수": 0.15}, {"종목코드": "000003", "종목명": "C", "총보수": 0.3}],
+    }
+    history = pd.DataFrame([{"date": date, **row} for date, rows in snapshots.items() for row in rows])
+    dates = list(snapshots)
+    expected = []
+    for before, after in zip(dates, dates[1:]):
+        diff = build_changelog.build_diff(snapshots[before], snapshots[after])
+        if build_changelog.has_events(diff):
+            expected.append(build_changelog.make_entry(after, diff))
+
+    entries = build_changelog.backfill_entries(history)
+
+    assert entries == expected
+    assert [e["updatedAt"] for e in entries] == ["2026-01-06", "2026-01-07"]
+    assert entries[0]["changes"] == [{"code": "000001", "name": "A", "field": "총보수", "before": 0.1, "after": 0.15}]
+    assert entries[0]["added"] == [{"code": "000003", "name": "C"}]
+    assert entries[0]["removed"] == [{"code": "000002", "name": "B"}]
+    assert "renamed" not in entries[0]
+    assert entries[1] == {
+        "month": "2026-01",
+        "updatedAt": "2026-01-07",
+        "changes": [],
+        "renamed": [{"code": "000001", "before": "A", "after": "A'"}],
+    }
+    assert build_changelog.backfill_entries(history[history["date"] == "2026-01-02"]) == []
+
+
+def test_artifacts_round_trip(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    entries = [
+        {"month": "2026-01", "updatedAt": "2026-01-06", "changes": [
+            {"code": "000001", "name": "A", "field": "실부담비용", "before": 0.1, "after": 0.2},
+        ]},
+        {"month": "2026-02", "updatedAt": "2026-02-02", "changes": [
+            {"code": "000001", "name": "A", "field": "실부담비용", "before": 0.2, "after": 0.15},
+            {"code": "000002", "name": "B", "field": "총보수", "before": 0.3, "after": 0.25},
+        ]},
+        {"month": "2026-02", "updatedAt": "2026-02-09", "changes": [
+            {"code": "000002", "name": "B", "field": "실부담비용", "before": "0.5", "after": "0.45"},
+            {"code": "000003", "name": "C", "field": "실부담비용", "before": None, "after": 0.3},
+        ], "added": [{"code": "000003", "name": "C"}]},
+    ]
+    stale = build_changelog.SHARD_DIR / "2025-12.json"
+    stale.parent.mkdir(parents=True)
+    stale.write_text("[]\n", encoding="utf-8")
+
+    build_changelog.write_artifacts(entries)
+
+    manifest = json.loads(build_changelog.MANIFEST_FILE.read_text(encoding="utf-8"))
+    assert manifest == {"version": 1, "months": [
+        {"month": "2026-02", "file": "2026-02.json", "entries": 2, "changes": 4},
+        {"month": "2026-01", "file": "2026-01.json", "entries": 1, "changes": 1},
+    ]}
+    assert not stale.exists()
+    shards = [
+        json.loads((build_changelog.SHARD_DIR / item["file"]).read_text(encoding="utf-8"))
+        for item in manifest["months"]
+    ]
+    # Shards are newest first; together they hold every entry unchanged.
+    assert [e["updatedAt"] for e in shards[0]] == ["2026-02-09", "2026-02-02"]
+    assert sorted((e for shard in shards for e in shard), key=lambda e: e["updatedAt"]) == entries
+
+    latest = json.loads(build_changelog.LATEST_FILE.read_text(encoding="utf-8"))
+    assert latest == {
+        "month": "2026-02",
+        "updatedAt": "2026-02-09",
+        "fields": ["before", "after", "diff"],
+        "byCode": {"000001": [0.2, 0.15, -0.05], "000002": [0.5, 0.45, -0.05]},
+    }
+
+    # A second run with the same changelog rewrites nothing.
+    written = {p: p.stat().st_mtime_ns for p in tmp_path.rglob("*.json")}
+    build_changelog.write_artifacts(entries)
+    assert {p: p.stat().st_mtime_ns for p in tmp_path.rglob("*.json")} == written
+
+    build_changelog.write_artifacts([])
+    assert json.loads(build_changelog.MANIFEST_FILE.read_text(encoding="utf-8")) == {"version": 1, "months": []}
+    assert json.loads(build_changelog.LATEST_FILE.read_text(encoding="utf-8"))["byCode"] == {}
@@ -0,0 +1,71 @@
+import gzip
+import hashlib
+import json
+
+import etl_process
+from conftest import ROOT
+
+
+def read_index(out_dir):
+    return json.loads((out_dir / etl_process.PUBLISH_INDEX_FILE).read_text(encoding="utf-8"))
+
+
+def test_category_files_round_trip(tmp_path):
+    records = json.loads((ROOT / "data.json").read_text(encoding="utf-8"))
+    out_dir = tmp_path / "data"
+
+    index = etl_process.publish_category_artifacts(records, out_dir=str(out_dir))
+
+    assert read_index(out_dir) == index
+    assert index["version"] == 1 and index["total"] == len(records)
+    names = list(dict.fromkeys(str(r["구분"]).strip() for r in records))
+    assert [c["name"] for c in index["categories"]] == names
+
+    published = []
+    for category in index["categories"]:
+        path = out_dir / category["file"]
+        payload = path.read_bytes()
+        category_id, content_hash, _ = category["file"].split(".")
+        assert category_id == hashlib.sha256(category["name"].encode("utf-8")).hexdigest()[:8]
+        assert content_hash == hashlib.sha256(payload).hexdigest()[:12]
+        assert category["bytes"] == len(payload)
+        assert gzip.decompress((out_dir / (category["file"] + ".gz")).read_bytes()) == payload
+
+        rows = json.loads(payload)
+        assert len(rows) == category["count"]
+        assert [row["순위"] for row in rows] == list(range(1, len(rows) + 1))
+        costs = [row["실부담비용"] for row in rows]
+        assert costs == sorted(costs) and category["minRealCost"] == costs[0]
+        published.extend({k: v for k, v in row.items() if k != "순위"} for row in rows)
+
+    key = lambda row: row["종목코드"]
+    assert sorted(published, key=key) == sorted(records, key=key)
+
+
+def test_previous_files_are_kept_one_run(tmp_path):
+    records = json.loads((ROOT / "data.json").read_text(encoding="utf-8"))
+    out_dir = tmp_path / "data"
+    out_dir.mkdir()
+    for kept in (etl_process.PUBLISH_UNIVERSE_FILE, etl_process.PUBLISH_PROJECTION_FILE):
+        (out_dir / kept).write_text("{}", encoding="utf-8")
+    (out_dir / "orphan.json").write_text("[]", encoding="utf-8")
+
+    first = etl_process.publish_category_artifacts(records, out_dir=str(out_dir))
+    changed = [dict(r, 실부담비용=r["실부담비용"] + 0.01) if i == 0 else r for i, r in enumerate(records)]
+    second = etl_process.publish_category_artifacts(changed, out_dir=str(out_dir))
+
+    first_files = {c["file"] for c in first["categories"]}
+    second_files = {c["file"] for c in second["categories"]}
+    replaced = first_files - second_files
+    assert len(replaced) == 1
+    # Pages still holding the first index can load its files for one more run.
+    assert first_files | second_files <= {p.name for p in out_dir.iterdir()}
+
+    third = etl_process.publish_category_artifacts(changed, out_dir=str(out_dir))
+    assert third == second
+    files = {p.name for p in out_dir.iterdir()}
+    # After one more run only the current files and the fixed-name artifacts remain.
+    assert not any(name.startswith(tuple(replaced)) for name in files)
+    assert second_files <= files
+    assert "orphan.json" not in files
+    assert {etl_process.PUBLISH_UNIVERSE_FILE, etl_process.PUBLISH_PROJECTION_FILE} <= files
@@ -0,0 +1,51 @@
+import json
+
+import pandas as pd
+
+import etf_columnar
+from conftest import ROOT
+
+
+def read_back(tmp_path, records):
+    path = tmp_path / etf_columnar.COLUMNAR_FILE.name
+    path.write_text(etf_columnar.dumps(records), encoding="utf-8")
+    return etf_columnar.loads(path.read_text(encoding="utf-8"))
+
+
+def test_published_rows_round_trip(tmp_path):
+    records = json.loads((ROOT / "data.json").read_text(encoding="utf-8"))
+    decoded = read_back(tmp_path, records)
+
+    assert decoded == records
+    assert [r["종목코드"] for r in decoded] == [r["종목코드"] for r in records]
+    for before, after in zip(records, decoded):
+        assert list(after) == list(before)
+        assert {k: type(v) for k, v in after.items()} == {k: type(v) for k, v in before.items()}
+
+    expected = pd.DataFrame(records)
+    actual = pd.DataFrame(decoded)
+    assert actual.dtypes.to_dict() == expected.dtypes.to_dict()
+    assert actual.isna().equals(expected.isna())
+    pd.testing.assert_frame_equal(actual, expected)
+
+
+def test_nulls_absent_keys_and_mixed_numbers(tmp_path):
+    records = [
+        {"구분": "S&P500", "종목코드": "360200", "총보수": 0.0047, "AUM": 36474},
+        {"구분": None, "종목코드": "000001", "총보수": None, "AUM": None},
+        {"구분": "S&P500", "종목코드": "000002", "총보수": 1, "AUM": 12, "비고": "new"},
+        {"구분": "나스닥100", "종목코드": "000003", "총보수": 0.5, "AUM": 7},
+    ]
+    decoded = read_back(tmp_path, records)
+
+    assert [r["종목코드"] for r in decoded] == ["360200", "000001", "000002", "000003"]
+    assert decoded[1]["구분"] is None and decoded[1]["총보수"] is None and decoded[1]["AUM"] is None
+    # A key missing from a record decodes as null.
+    assert decoded[0]["비고"] is None and decoded[2]["비고"] == "new"
+    assert [type(r["총보수"]) for r in decoded] == [float, type(None), int, float]
+    assert all(isinstance(r["AUM"], int) for r in decoded if r["AUM"] is not None)
+    assert decoded == [{**dict.fromkeys(decoded[0]), **r} for r in records]
+
+
+def test_empty_round_trip(tmp_path):
+    assert read_back(tmp_path, []) == []
@@ -0,0 +1,45 @@
+import json
+
+import numpy as np
+import pytest
+
+import etf_cost_projection
+import etl_process
+from conftest import ROOT
+
+
+def test_published_payload_fits_budget_and_gaps_are_derivable():
+    records = json.loads((ROOT / "data.json").read_text(encoding="utf-8"))
+    payload = json.loads(etf_cost_projection.dumps(records))
+
+    assert "vs" not in payload
+    codes = [fund[0] for fund in payload["funds"]]
+    cost = np.asarray(payload["cost"])
+    best = [codes.index(payload["cheapest"][category]) for _, category, _ in payload["funds"]]
+
+    projection = etf_cost_projection.project_records(records)
+    expected = projection.vs().reshape(len(codes), -1) / payload["unit"]
+    # Each grid is rounded to whole units, so a derived gap is off by at most one.
+    assert np.abs((cost - cost[best]) - expected).max() <= 1.0
+    assert (cost - cost[best]).min() >= 0
+
+
+def test_payload_over_budget_is_refused():
+    records = json.loads((ROOT / "data.json").read_text(encoding="utf-8"))
+    with pytest.raises(ValueError, match="budget"):
+        etf_cost_projection.dumps(records, budget=10_000)
+
+
+def test_over_budget_removes_published_projection(tmp_path, monkeypatch):
+    records = json.loads((ROOT / "data.json").read_text(encoding="utf-8"))
+    out_dir = tmp_path / "data"
+    path = out_dir / etl_process.PUBLISH_PROJECTION_FILE
+
+    etl_process.publish_cost_projection(records, out_dir=str(out_dir))
+    assert json.loads(path.read_text(encoding="utf-8")) == json.loads(etf_cost_projection.dumps(records))
+    assert (out_dir / (path.name + ".gz")).exists()
+
+    dumps = etf_cost_projection.dumps
+    monkeypatch.setattr(etf_cost_projection, "dumps", lambda data: dumps(data, budget=10_000))
+    etl_process.publish_cost_projection(records, out_dir=str(out_dir))
+    assert not any(p.name.startswith(path.name) for p in out_dir.iterdir())
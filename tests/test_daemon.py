@@ -0,0 +1,78 @@
+import etl_daemon
+import etl_process
+
+FEES = [
+    {"구분": "S&P500", "종목코드": "360200", "종목명": "ACE 미국S&P500", "실부담비용": 0.0887},
+    {"구분": "S&P500", "종목코드": "379800", "종목명": "KODEX 미국S&P500", "실부담비용": 0.0959},
+]
+
+
+def naver(aum):
+    return {code: {"itemcode": code, "marketSum": aum, "quant": 10} for code in ("360200", "379800")}
+
+
+class Calls:
+    def __init__(self, monkeypatch):
+        self.writes, self.recorded, self.waits = [], 0, 0
+        self.today = "2026-10-17"
+        monkeypatch.setattr(etl_process, "update_google_sheets", lambda rows, shared=True: self.writes.append(shared) or True)
+        monkeypatch.setattr(etl_process, "record_timeseries", lambda rows: setattr(self, "recorded", self.recorded + 1))
+        monkeypatch.setattr(etl_process, "wait_for_gas_uploads", lambda: setattr(self, "waits", self.waits + 1))
+        monkeypatch.setattr(etl_process, "kst_today", lambda: self.today)
+
+
+def test_market_only_changes_stay_local(monkeypatch):
+    calls = Calls(monkeypatch)
+    daemon = etl_daemon.RefreshDaemon(market_interval=600, kofia_interval=43200)
+    daemon.fees = [dict(row) for row in FEES]
+
+    daemon.naver_map = naver(100)
+    assert daemon.publish()
+    daemon.naver_map = naver(101)
+    assert daemon.publish()
+    daemon.naver_map = naver(102)
+    assert daemon.publish()
+    assert not daemon.publish()  # unchanged rows
+
+    assert calls.writes == [True, False, False]
+    assert (calls.recorded, calls.waits) == (1, 1)
+
+    calls.today = "2026-10-18"
+    daemon.naver_map = naver(103)
+    daemon.publish()
+    assert calls.writes[-1] is False and calls.recorded == 2
+
+    daemon.fees = [dict(row, 실부담비용=0.05) for row in FEES]
+    daemon.publish()
+    assert calls.writes[-1] is True and (calls.recorded, calls.waits) == (3, 2)
+
+
+def test_market_changes_shared_after_interval(monkeypatch):
+    calls = Calls(monkeypatch)
+    daemon = etl_daemon.RefreshDaemon(market_interval=600, kofia_interval=43200, share_interval=0)
+    daemon.fees = [dict(row) for row in FEES]
+
+    for aum in (100, 101):
+        daemon.naver_map = naver(aum)
+        daemon.publish()
+
+    assert calls.writes == [True, True]
+    assert calls.recorded == 1
+
+
+def test_publish_waits_for_market_data(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # run_job writes run-report.json
+    calls = Calls(monkeypatch)
+    daemon = etl_daemon.RefreshDaemon(market_interval=600, kofia_interval=43200)
+    monkeypatch.setattr(etl_process, "fetch_naver_etf_list", lambda: None)
+
+    daemon.fees = [dict(row) for row in FEES]
+    assert not daemon.publish()  # KOFIA job done, NAVER not fetched yet
+    daemon.run_job("market", daemon.refresh_market)  # NAVER down: still nothing published
+    assert calls.writes == [] and calls.recorded == 0
+    assert daemon.health()["status"] == "starting"
+
+    monkeypatch.setattr(etl_process, "fetch_naver_etf_list", lambda: naver(100))
+    daemon.run_job("market", daemon.refresh_market)
+    assert calls.writes == [True]
+    assert all(row["AUM"] is not None for row in daemon.published)
@@ -0,0 +1,62 @@
+import dataclasses
+
+import etl_http
+
+FAST = dict(backoff_base=0.01, backoff_cap=0.01)
+
+
+def make_client(**sources):
+    return etl_http.HttpClient(sources=sources, cache_dir=None)
+
+
+def test_retries_5xx_on_one_connection(stub):
+    state, base = stub
+    client = make_client(naver=etl_http.SourceConfig(**FAST))
+    state.fail_next("naver", 2)
+
+    response = client.get("naver", f"{base}/naver")
+
+    assert response.status_code == 200
+    assert response.json() == state.naver
+    stats = client.stats()["naver"]
+    assert (stats["requests"], stats["attempts"], stats["retries"], stats["failures"]) == (1, 3, 2, 0)
+    assert [method for _, method, _ in state.requests] == ["GET"] * 3
+    # The 503s carry a body and Content-Length, so the pooled connection survives them.
+    assert len({port for _, _, port in state.requests}) == 1
+
+
+def test_session_reused_across_sources(stub):
+    state, base = stub
+    client = make_client()
+    state.kofia_xml = b"<message/>"
+
+    client.get("naver", f"{base}/naver")
+    client.post("kofia", f"{base}/kofia", data=b"<message/>")
+    client.get("gas", f"{base}/gas", params={"action": "getItems"})
+    client.get("naver", f"{base}/naver")
+
+    assert [route for route, _, _ in state.requests] == ["naver", "kofia", "gas", "naver"]
+    assert len({port for _, _, port in state.requests}) == 1
+
+
+def test_post_not_retried_unless_source_allows(stub):
+    state, base = stub
+    client = make_client(naver=etl_http.SourceConfig(**FAST))
+    state.fail_next("naver", 1)
+
+    assert client.post("naver", f"{base}/naver").status_code == 503
+    assert client.stats()["naver"]["attempts"] == 1
+
+
+def test_kofia_gives_up_before_selenium_fallback(stub):
+    state, base = stub
+    config = etl_http.SOURCES["kofia"]
+    client = make_client(kofia=dataclasses.replace(config, **FAST))
+    state.fail_next("kofia", 10)
+
+    assert client.post("kofia", f"{base}/kofia").status_code == 503
+    assert len(state.requests) == config.max_attempts
+    # Worst case with every attempt timing out, plus capped backoff.
+    budget = config.max_attempts * (config.connect_timeout + config.read_timeout)
+    budget += sum(min(config.backoff_cap, config.backoff_base * 2 ** attempt) for attempt in range(1, config.max_attempts))
+    assert budget <= 60
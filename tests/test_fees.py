@@ -0,0 +1,17 @@
+import pandas as pd
+
+import etl_process
+
+
+def kofia_table(rows):
+    return pd.DataFrame(rows, columns=["표준코드", "펀드명", "합계(A)", "기타비용(B)", "매매·중개수수료율(C)"])
+
+
+def test_real_cost_keeps_python_rounding():
+    # 0.4222 + 0.379 + 0.21035 is a half-way case where Series.round(4) gives 1.0116.
+    table = kofia_table([["KR7360200000", "A", 0.4222, 0.379, 0.21035], ["KR7379800004", "B", 0.1, 0.02, 0.003]])
+    universe = etl_process.compute_universe_fees(table)
+
+    assert universe["실부담비용"].tolist() == [round((0.4222 + 0.379) + 0.21035, 4), round(0.123, 4)]
+    assert universe["실부담비용"].tolist()[0] == 1.0115
+    assert universe["실부담비용"].dtype == "float64"
@@ -0,0 +1,61 @@
+import pandas as pd
+
+import etl_process
+import fund_matcher
+
+
+def universe(rows):
+    return pd.DataFrame(rows, columns=["표준코드", "펀드명"]).set_index("표준코드")
+
+
+def test_kr7_std_code():
+    assert fund_matcher.kr7_std_code("069500") == "KR7069500007"
+    assert fund_matcher.kr7_std_code(" 360750 ") == "KR7360750004"
+    assert fund_matcher.kr7_std_code("102110") == "KR7102110004"
+    # Newer short codes carry letters; they are upper-cased before the check digit.
+    assert fund_matcher.kr7_std_code("0005a0") == fund_matcher.kr7_std_code("0005A0")
+    assert fund_matcher.kr7_std_code("0005A0")[:11] == "KR70005A000"
+    assert fund_matcher.kr7_std_code("69500") is None
+    assert fund_matcher.kr7_std_code(None) is None
+
+
+def test_resolve_unmatched_items_tiers():
+    table = universe([
+        ["KR7069500007", "삼성 KODEX 200증권상장지수투자신탁(주식)"],
+        ["KR7360750004", "미래에셋 TIGER 미국S&P500증권상장지수투자신탁(주식)"],
+        ["KR7133690008", "미래에셋 TIGER 미국나스닥100증권상장지수투자신탁(주식)"],
+        ["KR7000001001", "한국투자 ACE 미국배당다우존스증권상장지수투자신탁(주식)"],
+        ["KR7000002009", "한국투자 ACE 미국배당다우존스(H)증권상장지수투자신탁(주식)"],
+    ])
+    items = [
+        # 표준코드 typo, but the 종목코드 gives the KR7 code.
+        {"종목코드": "069500", "종목명": "KODEX 200", "표준코드": "KR7069500000"},
+        # Unknown 종목코드: matched by 펀드명 with a clear lead.
+        {"종목코드": "999999", "종목명": "TIGER 미국S&P500", "펀드명": "미래에셋 TIGER 미국S&P500 증권상장지수투자신탁(주식)"},
+        # Two near-identical names: the best candidate is reported but not used.
+        {"종목코드": "888888", "종목명": "ACE 미국배당다우존스", "펀드명": "한국투자 ACE 미국배당다우존스"},
+        {"종목코드": "", "종목명": "", "펀드명": ""},
+    ]
+
+    resolved = etl_process.resolve_unmatched_items(items, range(len(items)), table)
+
+    assert resolved[0] == {
+        "표준코드": "KR7069500007",
+        "펀드명": "삼성 KODEX 200증권상장지수투자신탁(주식)",
+        "tier": "kr7_code",
+        "confidence": 1.0,
+    }
+    assert resolved[1]["tier"] == "name" and resolved[1]["표준코드"] == "KR7360750004"
+    assert resolved[1]["confidence"] >= fund_matcher.NAME_MIN_SCORE
+    assert resolved[2]["tier"] is None and resolved[2]["표준코드"] in {"KR7000001001", "KR7000002009"}
+    assert 3 not in resolved
+
+
+def test_name_index_best_match():
+    index = fund_matcher.FundNameIndex([
+        "미래에셋 TIGER 미국나스닥100증권상장지수투자신탁(주식)",
+        "삼성 KODEX 200증권상장지수투자신탁(주식)",
+    ])
+
+    assert index.best_match("삼성 KODEX 200 증권상장지수투자신탁(주식)") == (1, 1.0, (1, 1.0))
+    assert index.best_match("전혀다른이름") == (None, 0.0, None)
@@ -0,0 +1,106 @@
+import json
+
+import pytest
+
+import etl_http
+import etl_process
+from conftest import ROOT
+
+
+@pytest.fixture
+def gas(stub, tmp_path, monkeypatch):
+    """upload_to_gas pointed at the stub, one attempt per POST, state under tmp_path."""
+    state, base = stub
+    client = etl_http.HttpClient(sources={"gas": etl_http.SourceConfig(max_attempts=1)}, cache_dir=None)
+    monkeypatch.setattr(etl_http, "client", client)
+    monkeypatch.setattr(etl_process, "GAS_WEB_APP_URL", f"{base}/gas")
+    monkeypatch.setattr(etl_process, "GAS_UPLOAD_STATE_FILE", str(tmp_path / "gas_upload.json"))
+    return state
+
+
+def records():
+    return json.loads((ROOT / "data.json").read_text(encoding="utf-8"))
+
+
+def gas_posts(state):
+    return [method for route, method, _ in state.requests if route == "gas"].count("POST")
+
+
+def test_compute_gas_delta():
+    previous = {"1": {"종목코드": "1", "총보수": 0.1}, "2": {"종목코드": "2", "총보수": 0.2}, "3": {"종목코드": "3"}}
+    rows = {"1": {"종목코드": "1", "총보수": 0.1}, "2": {"종목코드": "2", "총보수": 0.25}, "4": {"종목코드": "4"}}
+
+    assert etl_process.compute_gas_delta(previous, rows) == {
+        "inserted": [{"종목코드": "4"}],
+        "updated": [{"종목코드": "2", "총보수": 0.25}],
+        "deleted": ["3"],
+    }
+    assert etl_process.compute_gas_delta(rows, rows) == {"inserted": [], "updated": [], "deleted": []}
+
+
+def test_batches_split_at_batch_rows(monkeypatch):
+    monkeypatch.setattr(etl_process, "GAS_UPLOAD_BATCH_ROWS", 3)
+    batches = etl_process.gas_delta_batches([{"종목코드": str(i)} for i in range(5)], ["a", "b"])
+
+    # Deletes go first so an upsert of a re-listed code is never removed afterwards.
+    assert [(len(b["delete"]), len(b["upsert"])) for b in batches] == [(2, 1), (0, 3), (0, 1)]
+    assert etl_process.gas_delta_batches([], []) == [{"delete": [], "upsert": []}]
+
+
+def test_full_then_delta_upload(gas, monkeypatch):
+    monkeypatch.setattr(etl_process, "GAS_UPLOAD_BATCH_ROWS", 10)
+    data = records()
+
+    assert etl_process.upload_to_gas(data) is True
+    assert gas_posts(gas) == -(-len(data) // 10)
+    assert gas.gas_revision == gas_posts(gas)
+    assert gas.gas_rows == etl_process.rows_by_code(data)
+
+    changed = [dict(row, 총보수=0.5) if i == 0 else row for i, row in enumerate(data[:-1])]
+    changed.append(dict(data[0], 종목코드="999999", 종목명="NEW"))
+    gas.requests.clear()
+
+    assert etl_process.upload_to_gas(changed) is True
+    # One changed, one added, one removed: a single delta batch on the acknowledged revision.
+    assert gas_posts(gas) == 1
+    assert gas.gas_rows == etl_process.rows_by_code(changed)
+    assert etl_process.load_gas_upload_state()["revision"] == gas.gas_revision
+
+    gas.requests.clear()
+    assert etl_process.upload_to_gas(changed) is True
+    assert gas_posts(gas) == 0
+
+
+def test_stale_revision_falls_back_to_full_reset(gas):
+    data = records()
+    assert etl_process.upload_to_gas(data) is True
+
+    # Someone else wrote the sheet since our last acknowledged upload.
+    gas.gas_rows.pop(data[1]["종목코드"])
+    gas.gas_revision += 1
+    gas.requests.clear()
+    changed = [dict(row, 총보수=0.5) if i == 0 else row for i, row in enumerate(data)]
+
+    assert etl_process.upload_to_gas(changed) is True
+    assert gas_posts(gas) == 2  # conflicting delta, then the reset
+    assert gas.gas_rows == etl_process.rows_by_code(changed)
+    assert etl_process.load_gas_upload_state()["revision"] == gas.gas_revision
+
+
+def test_lost_ack_falls_back_to_legacy_upload(gas):
+    data = records()
+    assert etl_process.upload_to_gas(data) is True
+    gas.requests.clear()
+    gas.fail_next("gas", 2)
+    changed = [dict(row, 총보수=0.5) if i == 0 else row for i, row in enumerate(data)]
+
+    assert etl_process.upload_to_gas(changed) is False
+    # Delta, full reset, then the legacy single POST of the whole list.
+    assert gas_posts(gas) == 3
+    assert etl_process.load_gas_upload_state() is None
+
+    # Without state the next run starts over with a full reset.
+    gas.requests.clear()
+    assert etl_process.upload_to_gas(changed) is True
+    assert gas_posts(gas) == 1
+    assert gas.gas_rows == etl_process.rows_by_code(changed)
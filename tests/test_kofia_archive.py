@@ -0,0 +1,57 @@
+import pandas as pd
+
+import kofia_archive
+
+
+def fee_table(rows):
+    return pd.DataFrame(rows, columns=["표준코드", "펀드명", "총보수", "기타비용", "매매중개수수료"])
+
+
+DAY1 = fee_table([
+    ["KR7379800004", "KODEX 미국S&P500", 0.0099, 0.02, 0.03],
+    ["KR7360200000", "ACE 미국S&P500", 0.0047, None, 0.024],
+])
+DAY2 = fee_table([
+    ["KR7360200000", "ACE 미국S&P500", 0.0047, 0.06, 0.024],
+    ["KR7379800004", "KODEX 미국S&P500", 0.0062, 0.02, 0.03],
+])
+
+
+def test_snapshot_round_trip(tmp_path):
+    kofia_archive.write_snapshot(DAY1, "2026-10-16", "digest-1", root=tmp_path)
+    kofia_archive.write_snapshot(DAY2, "2026-10-17", "digest-2", root=tmp_path)
+
+    assert kofia_archive.list_dates(tmp_path) == ["2026-10-16", "2026-10-17"]
+    assert kofia_archive.read_digest("2026-10-16", tmp_path) == "digest-1"
+
+    frame = kofia_archive.read_archive(start="2026-10-16", end="2026-10-16", root=tmp_path)
+    expected = DAY1.sort_values("표준코드").reset_index(drop=True)
+    assert frame["date"].tolist() == ["2026-10-16"] * 2
+    pd.testing.assert_frame_equal(frame.drop(columns="date"), expected, check_dtype=False)
+    assert frame[kofia_archive.FEE_COLUMNS].dtypes.eq("float64").all()
+    assert pd.isna(frame.loc[0, "기타비용"])
+
+    only = kofia_archive.read_archive(codes=["KR7379800004"], root=tmp_path)
+    assert only["date"].tolist() == ["2026-10-16", "2026-10-17"]
+    assert only["총보수"].tolist() == [0.0099, 0.0062]
+
+
+def test_reuse_latest_snapshot_only_for_same_digest(tmp_path):
+    kofia_archive.write_snapshot(DAY1, "2026-10-16", "digest-1", root=tmp_path)
+
+    assert not kofia_archive.reuse_latest_snapshot("2026-10-17", "digest-2", root=tmp_path)
+    assert kofia_archive.reuse_latest_snapshot("2026-10-17", "digest-1", root=tmp_path)
+    assert kofia_archive.list_dates(tmp_path) == ["2026-10-16", "2026-10-17"]
+    assert kofia_archive.read_digest("2026-10-17", tmp_path) == "digest-1"
+
+
+def test_fee_changes_between_dates(tmp_path):
+    kofia_archive.write_snapshot(DAY1, "2026-10-16", root=tmp_path)
+    kofia_archive.write_snapshot(DAY2, "2026-10-17", root=tmp_path)
+
+    changes = kofia_archive.fee_changes("총보수", root=tmp_path)
+    assert changes.to_dict("records") == [
+        {"date": "2026-10-17", "표준코드": "KR7379800004", "펀드명": "KODEX 미국S&P500", "before": 0.0099, "after": 0.0062}
+    ]
+    # A value appearing after a null is not a change between two values.
+    assert kofia_archive.fee_changes("기타비용", root=tmp_path).empty
@@ -0,0 +1,31 @@
+import pandas as pd
+
+import etl_process
+import stub_server
+import synth_kofia
+
+
+def test_http_fetch_matches_workbook_path(stub, tmp_path, monkeypatch):
+    funds = synth_kofia.make_funds(300, seed=3)
+    workbook = synth_kofia.write_kofia_workbook(tmp_path / "kofia.xlsx", funds, seed=3)
+    from_workbook = etl_process.load_kofia_table(str(workbook))
+
+    state, base = stub
+    state.kofia_xml = stub_server.kofia_response_xml(from_workbook)
+    monkeypatch.setattr(etl_process, "KOFIA_API_URL", f"{base}/kofia")
+    from_http = etl_process.fetch_kofia_fee_table()
+
+    assert from_http is not None
+    pd.testing.assert_frame_equal(etl_process.kofia_fee_frame(from_http), etl_process.kofia_fee_frame(from_workbook))
+
+    managed = synth_kofia.make_managed_items(funds, 60, seed=3)
+    records = etl_process.process_data(managed, from_http)
+    assert records
+    assert records == etl_process.process_data(managed, from_workbook)
+
+
+def test_http_fetch_returns_none_on_empty_response(stub, monkeypatch):
+    state, base = stub
+    state.kofia_xml = b'<?xml version="1.0" encoding="utf-8"?><message/>'
+    monkeypatch.setattr(etl_process, "KOFIA_API_URL", f"{base}/kofia")
+    assert etl_process.fetch_kofia_fee_table() is None
@@ -0,0 +1,81 @@
+import time
+
+import pytest
+
+import etl_http
+import etl_process
+
+ITEMS = [
+    {"구분": "S&P500", "종목코드": "360200", "종목명": "ACE 미국S&P500", "표준코드": "KR7360200000"},
+    {"구분": "S&P500", "종목코드": "360750", "종목명": "TIGER 미국S&P500", "표준코드": "KR7360750004"},
+]
+
+
+@pytest.fixture
+def gas(stub, tmp_path, monkeypatch):
+    """fetch_managed_items_live pointed at the stub, one attempt per request, cache under tmp_path."""
+    state, base = stub
+    state.managed = [dict(item) for item in ITEMS]
+    client = etl_http.HttpClient(sources={"gas": etl_http.SourceConfig(max_attempts=1)}, cache_dir=None)
+    monkeypatch.setattr(etl_http, "client", client)
+    monkeypatch.setattr(etl_process, "GAS_WEB_APP_URL", f"{base}/gas")
+    monkeypatch.setattr(etl_process, "MANAGED_CACHE_FILE", str(tmp_path / "managed_items.json"))
+    return state
+
+
+def actions(state):
+    return [route for route, _, _ in state.requests]
+
+
+def age_cache(hours):
+    cache = etl_process.load_managed_cache()
+    etl_process.save_managed_cache(cache["items"], cache["version"], fetched_at=time.time() - hours * 3600)
+
+
+def test_fresh_cache_skips_gas(gas):
+    assert etl_process.fetch_managed_items_live().to_dict("records") == ITEMS
+    assert len(actions(gas)) == 2  # getItemsVersion + getItems
+    gas.requests.clear()
+
+    assert etl_process.fetch_managed_items_live().to_dict("records") == ITEMS
+    assert actions(gas) == []
+
+
+def test_expired_cache_revalidates_on_version(gas):
+    etl_process.fetch_managed_items_live()
+    age_cache(etl_process.MANAGED_CACHE_TTL_HOURS + 1)
+    gas.requests.clear()
+
+    # Same sheet: only the version is fetched and the cache is refreshed.
+    assert etl_process.fetch_managed_items_live().to_dict("records") == ITEMS
+    assert len(actions(gas)) == 1
+    assert time.time() - etl_process.load_managed_cache()["fetchedAt"] < 60
+
+    age_cache(etl_process.MANAGED_CACHE_TTL_HOURS + 1)
+    gas.managed = gas.managed[:1]
+    gas.requests.clear()
+
+    # Changed sheet: the new version triggers a full fetch.
+    assert etl_process.fetch_managed_items_live().to_dict("records") == ITEMS[:1]
+    assert len(actions(gas)) == 2
+    assert etl_process.load_managed_cache()["items"] == ITEMS[:1]
+
+
+def test_gas_error_uses_stale_cache_within_limit(gas):
+    etl_process.fetch_managed_items_live()
+    age_cache(24 * (etl_process.MANAGED_CACHE_MAX_STALE_DAYS - 1))
+    gas.fail_next("gas", 1)
+
+    assert etl_process.fetch_managed_items_live().to_dict("records") == ITEMS
+
+    age_cache(24 * (etl_process.MANAGED_CACHE_MAX_STALE_DAYS + 1))
+    gas.fail_next("gas", 1)
+    with pytest.raises(RuntimeError, match="Error fetching items from GAS"):
+        etl_process.fetch_managed_items_live()
+
+
+def test_gas_error_without_cache_raises(gas):
+    gas.fail_next("gas", 1)
+    with pytest.raises(RuntimeError, match="Error fetching items from GAS"):
+        etl_process.fetch_managed_items_live()
+    assert etl_process.load_managed_cache() is None
@@ -0,0 +1,114 @@
+import gzip
+import http.client
+import json
+import os
+import threading
+from http.server import ThreadingHTTPServer
+from urllib.parse import quote
+
+import pytest
+
+import etf_read_api
+from conftest import ROOT
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    """The read API over a copy of data.json on a free port; yields (ReadApi, GET helper)."""
+    monkeypatch.setattr(etf_read_api, "RELOAD_CHECK_SECONDS", 0.0)
+    data_file = tmp_path / "data.json"
+    data_file.write_bytes((ROOT / "data.json").read_bytes())
+    read_api = etf_read_api.ReadApi(data_file)
+    read_api.quiet = True
+    server = ThreadingHTTPServer(("127.0.0.1", 0), etf_read_api.make_handler(read_api))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    def get(path, **headers):
+        conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=10)
+        try:
+            conn.request("GET", path, headers=headers)
+            response = conn.getresponse()
+            return response.status, dict(response.getheaders()), response.read()
+        finally:
+            conn.close()
+
+    try:
+        yield read_api, get
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def records():
+    return json.loads((ROOT / "data.json").read_text(encoding="utf-8"))
+
+
+def test_data_json_etag_and_gzip(api):
+    _, get = api
+    status, headers, body = get("/data.json")
+    assert status == 200 and body == (ROOT / "data.json").read_bytes()
+    assert "Content-Encoding" not in headers
+
+    status, zipped_headers, zipped = get("/data.json", **{"Accept-Encoding": "gzip"})
+    assert status == 200 and zipped_headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(zipped) == body
+    assert zipped_headers["ETag"] == headers["ETag"][:-1] + '-gzip"'
+    assert zipped_headers["Vary"] == "Accept-Encoding"
+
+    for etag in (headers["ETag"], zipped_headers["ETag"], f'W/{headers["ETag"]}, "other"'):
+        status, not_modified, body_304 = get("/data.json", **{"If-None-Match": etag})
+        assert (status, body_304) == (304, b"")
+    assert get("/data.json", **{"If-None-Match": '"other"'})[0] == 200
+
+
+def test_etfs_sort_category_and_search(api):
+    _, get = api
+    rows = records()
+
+    status, _, body = get("/etfs?limit=500")
+    page = json.loads(body)
+    assert status == 200 and page["total"] == len(rows)
+    costs = [item["실부담비용"] for item in page["items"]]
+    assert costs == sorted(costs)
+
+    category = rows[0]["구분"]
+    members = [r for r in rows if r["구분"] == category]
+    # Nulls sort last either way.
+    expected = sorted((r for r in members if r["AUM"] is not None), key=lambda r: -r["AUM"])
+    expected += [r for r in members if r["AUM"] is None]
+    for param in ("구분", "category"):
+        page = json.loads(get(f"/etfs?{quote(param)}={quote(category)}&sort=-AUM&limit=2&offset=1")[2])
+        assert page["total"] == len(expected)
+        assert (page["offset"], page["limit"]) == (1, 2)
+        assert [item["종목코드"] for item in page["items"]] == [r["종목코드"] for r in expected[1:3]]
+
+    page = json.loads(get("/etfs?q=TIGER&limit=500")[2])
+    assert {item["종목코드"] for item in page["items"]} == {r["종목코드"] for r in rows if "tiger" in r["종목명"].lower()}
+
+    categories = json.loads(get("/categories")[2])
+    cheapest = {}
+    for r in sorted(rows, key=lambda r: r["실부담비용"]):
+        cheapest.setdefault(r["구분"], r["종목코드"])
+    assert [(c["구분"], c["cheapest"]) for c in categories] == list(cheapest.items())
+    assert sum(c["count"] for c in categories) == len(rows)
+
+
+def test_errors_and_reload(api):
+    read_api, get = api
+    rows = records()
+
+    status, _, body = get(f"/etfs/{rows[0]['종목코드']}")
+    assert status == 200 and json.loads(body) == rows[0]
+    assert get("/etfs/000000")[0] == 404
+    assert get("/nowhere")[0] == 404
+    status, _, body = get(f"/etfs?sort={quote('수익률')}")
+    assert status == 400 and "sort" in json.loads(body)["error"]
+    assert get("/etfs?limit=abc")[0] == 400
+
+    # A rewritten data.json is picked up and old ETags stop matching.
+    etag = get("/data.json")[1]["ETag"]
+    read_api.data_file.write_text(json.dumps(rows[:3], ensure_ascii=False), encoding="utf-8")
+    os.utime(read_api.data_file, (1, 1))
+    status, _, body = get("/etfs", **{"If-None-Match": etag})
+    assert status == 200 and json.loads(body)["total"] == 3
+    assert get("/data.json", **{"If-None-Match": etag})[0] == 200
@@ -0,0 +1,46 @@
+import json
+import threading
+
+import pytest
+
+import etl_metrics
+
+
+def test_report_round_trip(tmp_path):
+    report = etl_metrics.RunReport()
+
+    with report.span("page load"):
+        report.count("kofia_rows", 1000)
+        report.count("kofia_rows", 32)
+    with pytest.raises(ValueError):
+        with report.span("upload"):
+            raise ValueError("boom")
+
+    def worker():
+        with report.span("naver"):
+            report.count("matched")
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    report.set_count("gas_inserted", 3)
+    report.set_count("gas_inserted", 2)
+    report.detail("missing", ["000001"])
+
+    path = report.write(str(tmp_path / etl_metrics.RUN_REPORT_FILE), exit_code=1)
+    written = json.loads((tmp_path / etl_metrics.RUN_REPORT_FILE).read_text(encoding="utf-8"))
+
+    assert path.endswith(etl_metrics.RUN_REPORT_FILE)
+    assert written["exitCode"] == 1
+    assert written["counts"] == {"gas_inserted": 2, "kofia_rows": 1032, "matched": 4}
+    assert list(written["counts"]) == sorted(written["counts"])
+    assert written["details"] == {"missing": ["000001"]}
+    assert [span["name"] for span in written["spans"]] == ["page load", "upload"] + ["naver"] * 4
+    assert [span["ok"] for span in written["spans"][:2]] == [True, False]
+    starts = [span["start"] for span in written["spans"]]
+    assert starts == sorted(starts)
+    assert all(span["seconds"] >= 0 for span in written["spans"])
+    assert written["seconds"] >= max(span["start"] + span["seconds"] for span in written["spans"]) - 0.01
+    assert "profile" not in written
@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+import etf_search_index
+import etl_process
+from conftest import ROOT
+
+
+@pytest.fixture(scope="module")
+def records():
+    return json.loads((ROOT / "data.json").read_text(encoding="utf-8"))
+
+
+@pytest.fixture(scope="module")
+def index(records):
+    payload = json.loads(etf_search_index.dumps(etf_search_index.build_index(records)))
+    return etf_search_index.SearchIndex(payload)
+
+
+def codes(hits):
+    return {hit["종목코드"] for hit in hits}
+
+
+def test_code_prefix(index, records):
+    assert codes(index.search("3602", limit=100)) == {r["종목코드"] for r in records if r["종목코드"].startswith("3602")}
+    assert [hit["종목명"] for hit in index.search("069500")] == ["KODEX 200"]
+
+
+def test_chosung(index, records):
+    expected = {r["종목코드"] for r in records if "미국배당" in r["종목명"]}
+    assert expected
+    assert codes(index.search("ㅁㄱㅂㄷ", limit=100)) == expected
+    assert codes(index.search("미국배당", limit=100)) == expected
+
+
+def test_name_tokens_and_brand_aliases(index, records):
+    expected = {r["종목코드"] for r in records if "TIGER" in r["종목명"] and "나스닥" in r["종목명"]}
+    assert expected
+    assert codes(index.search("tiger 나스닥", limit=100)) == expected
+    assert index.search("타이거 나스닥", limit=100) == index.search("tiger 나스닥", limit=100)
+    # Whole-token hits rank first, then the shorter name.
+    assert index.search("KODEX 200")[0]["종목명"] == "KODEX 200"
+    assert index.search("없는이름") == []
+
+
+def test_budget(records):
+    full = etf_search_index.build_index(records)
+    small = etf_search_index.build_index(records, budget=len(etf_search_index.dumps(full)) - 1)
+    assert small["maxPrefix"] < full["maxPrefix"] or not small["postings"]["gram"]
+
+    with pytest.raises(ValueError, match="budget"):
+        etf_search_index.build_index(records, budget=1000)
+
+
+def test_over_budget_removes_stale_index(records, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assert etl_process.update_google_sheets(records, shared=False)
+    search_path = tmp_path / etf_search_index.SEARCH_INDEX_FILE
+    assert etf_search_index.SearchIndex.load(search_path).search("069500")
+
+    build_index = etf_search_index.build_index
+    monkeypatch.setattr(etf_search_index, "build_index", lambda data: build_index(data, budget=1000))
+    assert etl_process.update_google_sheets(records, shared=False)
+    assert not search_path.exists()
@@ -0,0 +1,27 @@
+import json
+
+import etl_process
+import synth_kofia
+
+
+def test_snapshot_hit_still_publishes_universe(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    funds = synth_kofia.make_funds(300, seed=5)
+    workbook = synth_kofia.write_kofia_workbook(tmp_path / "kofia.xlsx", funds, seed=5)
+    table = etl_process.load_kofia_table(str(workbook))
+    managed = synth_kofia.make_managed_items(funds, 40, seed=5)
+
+    first = etl_process.compute_fee_records((table, None), managed)
+    universe = tmp_path / etl_process.PUBLISH_DIR / etl_process.PUBLISH_UNIVERSE_FILE
+    published = universe.read_text(encoding="utf-8")
+    universe.unlink()
+    capsys.readouterr()
+
+    second = etl_process.compute_fee_records((table, None), managed)
+
+    assert "Snapshot cache hit" in capsys.readouterr().out
+    assert second == first
+    assert universe.read_text(encoding="utf-8") == published
+    payload = json.loads(published)
+    assert payload["total"] == len(payload["rows"]) > 0
+    assert 0 < payload["managed"] <= len(first)
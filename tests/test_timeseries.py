@@ -0,0 +1,53 @@
+import etf_timeseries
+import etl_process
+
+ROWS = [
+    {"구분": "S&P500", "종목코드": "360200", "종목명": "ACE 미국S&P500", "총보수": 0.0047, "기타비용": 0.06,
+     "매매중개수수료": 0.024, "실부담비용": 0.0887, "AUM": 36474, "거래량": 405584},
+    {"구분": "나스닥100", "종목코드": "133690", "종목명": "TIGER 미국나스닥100", "총보수": 0.07, "기타비용": 0.01,
+     "매매중개수수료": 0.01, "실부담비용": 0.09, "AUM": None, "거래량": None},
+]
+
+
+def test_upsert_day_is_idempotent_and_ordered(tmp_path):
+    conn = etf_timeseries.connect(tmp_path / "store.sqlite")
+    etf_timeseries.upsert_day(conn, "2026-10-17", ROWS)
+    etf_timeseries.upsert_day(conn, "2026-10-16", ROWS[:1])
+    etf_timeseries.upsert_day(conn, "2026-10-17", [dict(ROWS[0], 총보수=0.004, AUM=40000)])
+
+    assert etf_timeseries.list_dates(conn) == ["2026-10-16", "2026-10-17"]
+    rows = etf_timeseries.query_range(conn, code="360200")
+    assert [(r["date"], r["총보수"], r["AUM"]) for r in rows] == [("2026-10-16", 0.0047, 36474), ("2026-10-17", 0.004, 40000)]
+    assert [r["종목코드"] for r in etf_timeseries.query_range(conn, start="2026-10-17")] == ["133690", "360200"]
+    assert [r["종목코드"] for r in etf_timeseries.query_range(conn, category="나스닥100")] == ["133690"]
+    latest = etf_timeseries.query_latest(conn, n=1)
+    assert [(r["종목코드"], r["date"]) for r in latest] == [("133690", "2026-10-17"), ("360200", "2026-10-17")]
+
+
+def test_keep_missing_preserves_stored_market_values(tmp_path):
+    conn = etf_timeseries.connect(tmp_path / "store.sqlite")
+    etf_timeseries.upsert_day(conn, "2026-10-17", ROWS[:1])
+    backfill = dict(ROWS[0], 총보수=0.005, AUM=None, 거래량=None)
+
+    etf_timeseries.upsert_day(conn, "2026-10-17", [backfill], keep_missing=True)
+    (row,) = etf_timeseries.query_range(conn, code="360200")
+    assert (row["총보수"], row["AUM"], row["거래량"]) == (0.005, 36474, 405584)
+
+    etf_timeseries.upsert_day(conn, "2026-10-17", [backfill])
+    (row,) = etf_timeseries.query_range(conn, code="360200")
+    assert (row["AUM"], row["거래량"]) == (None, None)
+
+
+def test_record_timeseries_writes_today(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(etl_process, "kst_today", lambda: "2026-10-17")
+    etl_process.record_timeseries(ROWS)
+    etl_process.record_timeseries(ROWS)
+
+    conn = etf_timeseries.connect()
+    try:
+        rows = etf_timeseries.query_range(conn)
+    finally:
+        conn.close()
+    assert [(r["date"], r["종목코드"]) for r in rows] == [("2026-10-17", "133690"), ("2026-10-17", "360200")]
+    assert rows[1]["거래량"] == 405584 and rows[0]["AUM"] is None